@@ -5,15 +5,89 @@ Flask API to handle natural language requests and execute Unity Catalog operatio
 
 from flask import Flask, request, jsonify, send_from_directory
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
+import functools
+import hmac
 import os
 import re
-from typing import Dict, List, Optional
-import anthropic
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+from audit import AuditLog
+from config import Config
+from conversation import ConversationStore
+from entity_resolver import EntityResolver, Resolution
+from checkpoint import Checkpoint
+from http_cache import ResponseCache
+from jobs import JobContext, JobManager, JobQueueFull
+from json_provider import FastJSONProvider
+from llm_scheduler import PRIORITIES, LLMOverloaded, LLMScheduler
+from metadata_cache import MetadataCache
+from metadata_export import InventoryStore, export_inventory, inventory_schema
+from prefetch import PrefetchScheduler
+from semantic_cache import SemanticIntentCache
+from securables import ObjectPath, parse_object_path, qualify
+from speculation import Speculation, Speculator
+from sql_script import compile_batch
+from startup import LazyImport, configure_logging
 from unity_catalog_service import UnityCatalogService
+from replay import install_from_env as install_cassettes
+from profiling import RequestProfiler
+from tracing import TracedClient, current_span, instrument_app, tracer
 
-app = Flask(__name__, static_folder='.', static_url_path='')
+# Imported on first client construction to keep cold start fast
+anthropic = LazyImport("anthropic")
+
+# No static folder: the working directory also holds data/, logs/ and cassettes/
+app = Flask(__name__, static_folder=None)
+app.json = FastJSONProvider(app)
 CORS(app)
 
+config = Config()
+if config.security.trusted_proxy_hops:
+    # remote_addr becomes the client address as seen by the trusted proxies
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=config.security.trusted_proxy_hops,
+                            x_proto=config.security.trusted_proxy_hops)
+
+
+def _is_admin() -> bool:
+    """The request carries the configured ADMIN_TOKEN"""
+    token = config.security.admin_token
+    supplied = request.headers.get(config.security.admin_header, "")
+    return bool(token) and hmac.compare_digest(supplied.encode(), token.encode())
+
+
+def _admin_only(view: Callable) -> Callable:
+    """Admin endpoints: 404 unless ADMIN_TOKEN is set, 403 without the token"""
+    @functools.wraps(view)
+    def guarded(*args, **kwargs):
+        if not config.security.admin_token:
+            return jsonify({'success': False, 'message': 'Admin endpoints are disabled'}), 404
+        if not _is_admin():
+            return jsonify({'success': False, 'message': 'Admin token required'}), 403
+        return view(*args, **kwargs)
+    return guarded
+
+
+request_profiler = RequestProfiler.from_config(config.profiling, authorize=_is_admin)
+conversations = ConversationStore.from_config(config.conversation)
+inventory_store = InventoryStore(config.inventory.sqlite_path, config.inventory.max_rows,
+                                 config.inventory.query_timeout)
+instrument_app(app, tracer.configure(config.tracing))
+speculator = Speculator.from_config(config.speculation)
+intent_cache = SemanticIntentCache.from_config(config.intent_cache)
+llm_scheduler = LLMScheduler.from_config(config.llm_scheduler)
+audit_log = AuditLog.from_config(config.audit)
+response_cache = ResponseCache(config.server.compression_min_bytes, config.server.compression_level)
+app.after_request(response_cache.compress)
+
+
+# Output of `npm run build`: dist/index.html plus content-hashed bundles in dist/assets
+FRONTEND_DIST = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dist')
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+# The only files of the working directory served over HTTP (the unbundled development page)
+PUBLIC_FILES = ('index.html', 'unity-catalog-chatbot.jsx')
+
 
 def _no_cache(response):
     """Disable caching for SPA assets to avoid stale UI (304s)."""
@@ -22,20 +96,74 @@ def _no_cache(response):
     response.headers["Expires"] = "0"
     return response
 
+
+def _index_response():
+    """The built index.html when a bundle exists, else the unbundled development page"""
+    if os.path.exists(os.path.join(FRONTEND_DIST, 'index.html')):
+        return _no_cache(send_from_directory(FRONTEND_DIST, 'index.html'))
+    return _no_cache(send_from_directory('.', 'index.html'))
+
 # Initialize services (lazy to allow mocking in tests)
 uc_service = None
 claude_client = None
+entity_resolver = None
 
 def _init_services():
     """Lazy initialize services."""
     global uc_service, claude_client
     if uc_service is None:
-        uc_service = UnityCatalogService()
+        cache_ttl = config.cache['cache_ttl'] if config.features['caching'] else 0
+        uc_service = UnityCatalogService(cache=MetadataCache(ttl=cache_ttl))
+        # Prefetched listings are only useful while the cache serves them
+        if config.prefetch.enabled and uc_service.cache.enabled:
+            uc_service.prefetcher = PrefetchScheduler.from_config(uc_service, config.prefetch)
     if claude_client is None:
-        claude_client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+        claude_client = _anthropic_client()
+        # Record or replay SDK/LLM traffic when CASSETTE_MODE is set
+        claude_client = install_cassettes(uc_service, claude_client)
+        # Span per underlying SDK/LLM call (no-op unless tracing is enabled)
+        uc_service.client = TracedClient(uc_service.client, tracer, "databricks")
+        claude_client = TracedClient(claude_client, tracer, "anthropic")
     return uc_service, claude_client
 
 
+def _anthropic_client():
+    """
+    Claude client. With the LLM scheduler on, the SDK does not retry: the
+    scheduler retries 429/529 itself after releasing the slot, and SDK
+    retries would hold the slot through their backoff and multiply attempts.
+    """
+    max_retries = 0 if llm_scheduler is not None else anthropic.DEFAULT_MAX_RETRIES
+    return anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"), max_retries=max_retries)
+
+
+def _resolve_entities(intent_data: Dict) -> Optional[Resolution]:
+    """Correct object references in parsed params against known names"""
+    global entity_resolver
+    if not config.features['entity_resolution']:
+        return None
+    uc, _ = _init_services()
+    if entity_resolver is None or entity_resolver.uc_service is not uc:
+        entity_resolver = EntityResolver(uc)
+    try:
+        return entity_resolver.resolve(intent_data)
+    except Exception as e:
+        print(f"Entity resolution skipped: {e}")
+        return None
+
+
+def _speculate(user_message: str) -> Optional[Speculation]:
+    """Start the reads the message most likely needs while it is being parsed"""
+    if not speculator.enabled:
+        return None
+    uc, _ = _init_services()
+    try:
+        return speculator.start(uc, user_message)
+    except Exception as e:
+        print(f"Speculation skipped: {e}")
+        return None
+
+
 def validate_databricks_connection(host: str, token: str, workspace_id: str = None) -> Dict:
     """Validate connection to Databricks workspace."""
     try:
@@ -81,6 +209,15 @@ Available intents:
 - showPermissions: Show permissions for an object
 - setOwner: Set the owner of an object
 - getTableDetails: Get detailed information about a table
+- findColumns: Find tables containing a column by name (wildcards allowed) and/or data type
+- bulkGrant: Grant a privilege on every table (or, with securable_type SCHEMA, every schema) of a
+  catalog or schema; runs as a background job
+- exportInventory: Refresh the local inventory export from the workspace; runs as a background job
+- inventoryQuery: Answer inventory questions from the local export; params.report is one of
+  summary, tablesByOwner, owners, undocumentedTables, grantsForPrincipal,
+  principalsWithPrivilege, formats, largestSchemas (filters: catalog, owner, principal, privilege)
+- analyticsQuery: Any other aggregate or inventory question; params.sql is one SQLite SELECT
+  over the inventory tables listed below
 - help: Provide help information
 - complex: Multi-step operation requiring clarification
 
@@ -91,10 +228,17 @@ For each request, analyze the user's intent and return a JSON object with:
     "catalog": "string (optional)",
     "schema": "string (optional)", 
     "table": "string (optional)",
+    "object": "string (optional, dotted path of the securable)",
+    "securable_type": "string (optional, e.g. VOLUME or FUNCTION when not implied by the path)",
     "principal": "string (optional)",
     "privilege": "string (optional)",
+    "owner": "string (optional)",
     "comment": "string (optional)",
-    "columns": [{"name": "string", "type_name": "string"}] (optional)
+    "columns": [{"name": "string", "type_name": "string"}] (optional),
+    "column": "string (optional, column name or pattern such as *_id)",
+    "data_type": "string (optional)",
+    "report": "string (optional, inventoryQuery report name)",
+    "sql": "string (optional, analyticsQuery SELECT statement)"
   },
   "explanation": "Brief explanation of what will be done"
 }
@@ -106,22 +250,56 @@ Response: {"intent": "createCatalog", "params": {"catalog": "sales_data"}, "expl
 User: "Grant SELECT permission on sales.customers to data_analysts group"
 Response: {"intent": "grantPermission", "params": {"privilege": "SELECT", "object": "sales.customers", "principal": "data_analysts"}, "explanation": "Will grant SELECT privileges on sales.customers table to data_analysts group"}
 
+User: "Grant SELECT on all tables in sales to data_analysts"
+Response: {"intent": "bulkGrant", "params": {"privilege": "SELECT", "catalog": "sales", "securable_type": "TABLE", "principal": "data_analysts"}, "explanation": "Will grant SELECT on every table in the sales catalog to data_analysts"}
+
+User: "How many tables does each owner have in prod?"
+Response: {"intent": "analyticsQuery", "params": {"sql": "SELECT owner, COUNT(*) AS tables FROM tables WHERE catalog = 'prod' GROUP BY owner ORDER BY tables DESC"}, "explanation": "Will count tables per owner in prod"}
+
+Inventory tables (SQLite, catalog/schema/table names are plain text, full_name is dotted):
+""" + inventory_schema() + """
+
 Always return valid JSON only, no additional text."""
 
 
-def parse_with_claude(user_message: str) -> Dict:
-    """Use Claude to parse complex natural language requests"""
+@tracer.traced("parse_with_claude")
+def parse_with_claude(user_message: str, context: str = None, priority: str = "interactive",
+                      user: str = None) -> Dict:
+    """
+    Use Claude to parse complex natural language requests
+
+    Args:
+        user_message: The latest user message
+        context: Compact conversation context appended to the system prompt
+        priority: LLM scheduler class (interactive, batch or background)
+        user: Caller the scheduler shares capacity fairly between
+
+    Raises:
+        LLMOverloaded: when no LLM capacity frees up in time
+    """
+    # Paraphrases and re-targeted repeats of earlier messages reuse their parse
+    cached = intent_cache.lookup(user_message) if intent_cache is not None else None
+    if cached is not None:
+        span = current_span()
+        if span is not None:
+            span.set_attribute("uc.intent", cached.get("intent"))
+            span.set_attribute("uc.intent_cache", "hit")
+        return cached
+    
     try:
         _, client = _init_services()  # Lazy init
-        message = client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=1000,
-            system=SYSTEM_PROMPT,
-            messages=[{
-                "role": "user",
-                "content": user_message
-            }]
-        )
+        def create():
+            return client.messages.create(
+                model="claude-sonnet-4-20250514",
+                max_tokens=1000,
+                system=f"{SYSTEM_PROMPT}\n\n{context}" if context else SYSTEM_PROMPT,
+                messages=[{
+                    "role": "user",
+                    "content": user_message
+                }]
+            )
+        # Bounded, prioritized and fair across users; backs off on 429s
+        message = llm_scheduler.call(create, priority, user) if llm_scheduler is not None else create()
         
         # Extract JSON from response
         response_text = message.content[0].text
@@ -132,8 +310,15 @@ def parse_with_claude(user_message: str) -> Dict:
         response_text = re.sub(r'```json\s*|\s*```', '', response_text)
         
         parsed = json.loads(response_text.strip())
+        if intent_cache is not None:
+            intent_cache.store(user_message, parsed)
+        span = current_span()
+        if span is not None:
+            span.set_attribute("uc.intent", parsed.get("intent"))
         return parsed
         
+    except LLMOverloaded:
+        raise
     except Exception as e:
         print(f"Error parsing with Claude: {e}")
         return {
@@ -143,144 +328,7 @@ def parse_with_claude(user_message: str) -> Dict:
         }
 
 
-def execute_intent(intent_data: Dict) -> Dict:
-    """Execute the parsed intent using Unity Catalog service"""
-    uc, _ = _init_services()  # Lazy init
-    intent = intent_data.get("intent")
-    params = intent_data.get("params", {})
-    
-    try:
-        if intent == "createCatalog":
-            return uc.create_catalog(
-                name=params.get("catalog"),
-                comment=params.get("comment")
-            )
-        
-        elif intent == "createSchema":
-            catalog, schema = params.get("catalog"), params.get("schema")
-            # If full path provided (e.g., "catalog.schema")
-            if not schema and catalog and '.' in catalog:
-                catalog, schema = catalog.split('.', 1)
-            return uc.create_schema(
-                catalog=catalog,
-                schema=schema,
-                comment=params.get("comment")
-            )
-        
-        elif intent == "createTable":
-            catalog = params.get("catalog")
-            schema = params.get("schema")
-            table = params.get("table")
-            
-            # Parse full table path if needed
-            if table and '.' in table:
-                parts = table.split('.')
-                if len(parts) == 3:
-                    catalog, schema, table = parts
-                elif len(parts) == 2 and catalog:
-                    schema, table = parts
-            
-            return uc.create_table(
-                catalog=catalog,
-                schema=schema,
-                table=table,
-                columns=params.get("columns"),
-                comment=params.get("comment")
-            )
-        
-        elif intent == "grantPermission":
-            # Determine securable type from object path
-            obj = params.get("object", "")
-            parts = obj.split('.')
-            
-            if len(parts) == 1:
-                securable_type = "CATALOG"
-            elif len(parts) == 2:
-                securable_type = "SCHEMA"
-            else:
-                securable_type = "TABLE"
-            
-            return uc.grant_permission(
-                principal=params.get("principal"),
-                privilege=params.get("privilege"),
-                securable_type=securable_type,
-                securable_name=obj
-            )
-        
-        elif intent == "revokePermission":
-            obj = params.get("object", "")
-            parts = obj.split('.')
-            
-            if len(parts) == 1:
-                securable_type = "CATALOG"
-            elif len(parts) == 2:
-                securable_type = "SCHEMA"
-            else:
-                securable_type = "TABLE"
-            
-            return uc.revoke_permission(
-                principal=params.get("principal"),
-                privilege=params.get("privilege"),
-                securable_type=securable_type,
-                securable_name=obj
-            )
-        
-        elif intent == "listCatalogs":
-            return uc.list_catalogs()
-        
-        elif intent == "listSchemas":
-            return uc.list_schemas(params.get("catalog"))
-        
-        elif intent == "listTables":
-            return uc.list_tables(
-                params.get("catalog"),
-                params.get("schema")
-            )
-        
-        elif intent == "showPermissions":
-            obj = params.get("object", "")
-            parts = obj.split('.')
-            
-            if len(parts) == 1:
-                securable_type = "CATALOG"
-            elif len(parts) == 2:
-                securable_type = "SCHEMA"
-            else:
-                securable_type = "TABLE"
-            
-            return uc.show_grants(securable_type, obj)
-        
-        elif intent == "setOwner":
-            obj = params.get("object", "")
-            parts = obj.split('.')
-            
-            if len(parts) == 1:
-                securable_type = "CATALOG"
-            elif len(parts) == 2:
-                securable_type = "SCHEMA"
-            else:
-                securable_type = "TABLE"
-            
-            return uc.set_owner(
-                securable_type=securable_type,
-                securable_name=obj,
-                owner=params.get("owner")
-            )
-        
-        elif intent == "getTableDetails":
-            parts = params.get("table", "").split('.')
-            if len(parts) == 3:
-                return uc.get_table(parts[0], parts[1], parts[2])
-            else:
-                return {
-                    "success": False,
-                    "message": "Invalid table path. Use format: catalog.schema.table"
-                }
-        
-        elif intent == "help":
-            return {
-                "success": True,
-                "message": """I can help you with Unity Catalog operations:
+HELP_MESSAGE = """I can help you with Unity Catalog operations:
 
 **Creating Objects:**
 • Create a catalog: "Create a catalog named sales_catalog"
@@ -300,17 +348,263 @@ def execute_intent(intent_data: Dict) -> Dict:
 
 **Table Details:**
 • Get table info: "Show details for sales_catalog.analytics.customers"
+• Find columns: "Which tables have a column named customer_id?"
 
-Just describe what you want to do in natural language!""",
-                "sql": None
-            }
-        
-        else:
-            return {
-                "success": False,
-                "message": f"Unknown intent: {intent}. Type 'help' for available commands."
-            }
+**Bulk Operations (run in the background with live progress):**
+• "Grant SELECT on all tables in sales_catalog.analytics to data_analysts"
+• "Export the inventory"
+
+**Inventory (from the local export):**
+• "How many tables does each catalog have?"
+• "Which tables are owned by analytics_team?"
+• "Which tables have no description?"
+• "What are the largest schemas in prod?"
+
+Just describe what you want to do in natural language!"""
+
+
+def _securable(params: Dict) -> ObjectPath:
+    """Object path named by an intent's `object` parameter"""
+    return parse_object_path(params.get("object", ""))
+
+
+def _securable_type(params: Dict, path: ObjectPath) -> str:
+    """Explicit securable type from the parser, else the one implied by the path depth"""
+    return params.get("securable_type") or path.securable_type
+
+
+def _create_schema(uc: UnityCatalogService, params: Dict) -> Dict:
+    # Accepts a full "catalog.schema" path in either parameter
+    if params.get("schema"):
+        path = qualify(params["schema"], catalog=params.get("catalog"), depth=2)
+    else:
+        path = qualify(params.get("catalog"), depth=2)
+    return uc.create_schema(catalog=path.catalog, schema=path.schema, comment=params.get("comment"),
+                            if_not_exists=True)
+
+
+def _create_table(uc: UnityCatalogService, params: Dict) -> Dict:
+    path = qualify(params.get("table"), catalog=params.get("catalog"), schema=params.get("schema"))
+    return uc.create_table(
+        catalog=path.catalog,
+        schema=path.schema,
+        table=path.table,
+        columns=params.get("columns"),
+        comment=params.get("comment"),
+        if_not_exists=True
+    )
+
+
+def _update_permission(method_name: str) -> Callable[[UnityCatalogService, Dict], Dict]:
+    def handler(uc: UnityCatalogService, params: Dict) -> Dict:
+        path = _securable(params)
+        return getattr(uc, method_name)(
+            principal=params.get("principal"),
+            privilege=params.get("privilege"),
+            securable_type=_securable_type(params, path),
+            securable_name=path.full_name
+        )
+    return handler
+
+
+def _show_permissions(uc: UnityCatalogService, params: Dict) -> Dict:
+    path = _securable(params)
+    return uc.show_grants(_securable_type(params, path), path.full_name)
+
+
+def _set_owner(uc: UnityCatalogService, params: Dict) -> Dict:
+    path = _securable(params)
+    return uc.set_owner(
+        securable_type=_securable_type(params, path),
+        securable_name=path.full_name,
+        owner=params.get("owner")
+    )
+
+
+def _get_table_details(uc: UnityCatalogService, params: Dict) -> Dict:
+    try:
+        path = parse_object_path(params.get("table", ""))
+    except ValueError:
+        path = None
+    if path is None or path.depth != 3:
+        return {
+            "success": False,
+            "message": "Invalid table path. Use format: catalog.schema.table"
+        }
+    return uc.get_table(path.catalog, path.schema, path.table)
+
+
+def _job_result(result: Dict) -> Dict:
+    """A bulk result without its per-item list, which the job already stored as partial results"""
+    return {key: value for key, value in result.items() if key != 'results'}
+
+
+def _checkpointed(job: JobContext, run: Callable[[Checkpoint], Dict]) -> Dict:
+    """
+    Run a bulk job against a checkpoint kept under the job's id, so a
+    restarted or retried job skips the steps earlier attempts finished
+    """
+    checkpoint = Checkpoint(config.jobs.db_path, job.job_id, batch_size=config.jobs.checkpoint_batch)
+    try:
+        result = run(checkpoint)
+        if result.get('success'):
+            checkpoint.clear()
+        return _job_result(result)
+    finally:
+        checkpoint.close()
+
+
+def _run_batch_create(job: JobContext) -> Dict:
+    uc, _ = _init_services()
+    params = job.params
+    return _checkpointed(job, lambda checkpoint: uc.create_objects(
+        params.get('objects') or [],
+        grants=params.get('grants') or [],
+        if_not_exists=params.get('if_not_exists', True),
+        progress=job.progress,
+        checkpoint=checkpoint,
+        max_workers=config.jobs.bulk_workers
+    ))
+
+
+def _run_bulk_grant(job: JobContext) -> Dict:
+    uc, _ = _init_services()
+    params = job.params
+    return _checkpointed(job, lambda checkpoint: uc.grant_on_all(
+        principal=params.get('principal'),
+        privileges=params.get('privilege'),
+        catalog=params.get('catalog'),
+        schema=params.get('schema'),
+        securable_type=params.get('securable_type') or 'TABLE',
+        progress=job.progress,
+        checkpoint=checkpoint,
+        max_workers=config.jobs.bulk_workers
+    ))
+
+
+def _run_inventory_export(job: JobContext) -> Dict:
+    uc, _ = _init_services()
+    stats = export_inventory(
+        uc,
+        sqlite_path=config.inventory.sqlite_path,
+        parquet_dir=config.inventory.parquet_dir,
+        progress=lambda stats: job.progress(stats['api_calls'], message=(
+            f"{stats['tables']} tables, {stats['columns']} columns, {stats['grants']} grants so far"))
+    )
+    return {
+        'success': not stats['errors'],
+        'message': f"Exported {stats['tables']} tables and {stats['grants']} grants in {stats['seconds']}s"
+                   + (f" ({len(stats['errors'])} step(s) failed)" if stats['errors'] else ""),
+        **{key: stats[key] for key in ('catalogs', 'schemas', 'tables', 'columns', 'grants', 'api_calls')},
+        'errors': stats['errors'][:20],
+    }
+
+
+# Job kind -> handler(job context); must be safe to re-run after a restart
+JOB_HANDLERS: Dict[str, Callable[[JobContext], Dict]] = {
+    "batch_create": _run_batch_create,
+    "bulk_grant": _run_bulk_grant,
+    "inventory_export": _run_inventory_export,
+}
+
+job_manager = None
+_job_manager_lock = threading.Lock()
+
+
+def _job_manager() -> JobManager:
+    """Job manager, created on first use; resumes jobs an earlier process left unfinished"""
+    global job_manager
+    with _job_manager_lock:
+        if job_manager is None:
+            job_manager = JobManager.from_config(config.jobs, JOB_HANDLERS)
+            resumed = job_manager.recover()
+            if resumed:
+                print(f"Resumed {len(resumed)} unfinished job(s): {', '.join(resumed)}")
+    return job_manager
+
+
+def _start_job(kind: str, params: Dict, description: str) -> Dict:
+    """Chat result for a submitted job: answered right away, with a handle to poll"""
+    try:
+        job = _job_manager().submit(kind, params)
+    except JobQueueFull as e:
+        return {"success": False, "message": f"Too many background jobs are waiting ({e}); try again later."}
+    return {
+        "success": True,
+        "message": f"Started {description} as background job {job['id']}.",
+        "job": job
+    }
+
+
+def _bulk_grant(uc: UnityCatalogService, params: Dict) -> Dict:
+    catalog = params.get("catalog")
+    if not catalog or not params.get("principal") or not params.get("privilege"):
+        return {"success": False, "message": "A bulk grant needs a privilege, a catalog and a principal"}
+    # Accepts a full "catalog.schema" path in either parameter
+    path = qualify(params["schema"], catalog=catalog, depth=2) if params.get("schema") else None
+    if path is None and "." in catalog:
+        path = qualify(catalog, depth=2)
+    securable_type = (params.get("securable_type") or "TABLE").upper()
+    scope = path.full_name if path else catalog
+    return _start_job("bulk_grant", {
+        "principal": params["principal"],
+        "privilege": params["privilege"],
+        "catalog": path.catalog if path else catalog,
+        "schema": path.schema if path else None,
+        "securable_type": securable_type,
+    }, f"granting {params['privilege']} on every {securable_type.lower()} in {scope} to {params['principal']}")
+
+
+# Intent name -> handler(uc_service, params)
+INTENT_HANDLERS: Dict[str, Callable[[UnityCatalogService, Dict], Dict]] = {
+    "createCatalog": lambda uc, params: uc.create_catalog(
+        name=params.get("catalog"), comment=params.get("comment"), if_not_exists=True
+    ),
+    "createSchema": _create_schema,
+    "createTable": _create_table,
+    "grantPermission": _update_permission("grant_permission"),
+    "revokePermission": _update_permission("revoke_permission"),
+    "listCatalogs": lambda uc, params: uc.list_catalogs(),
+    "listSchemas": lambda uc, params: uc.list_schemas(params.get("catalog")),
+    "listTables": lambda uc, params: uc.list_tables(params.get("catalog"), params.get("schema")),
+    "showPermissions": _show_permissions,
+    "setOwner": _set_owner,
+    "getTableDetails": _get_table_details,
+    "inventoryQuery": lambda uc, params: inventory_store.report(params.get("report") or "summary", params),
+    "analyticsQuery": lambda uc, params: inventory_store.query(params.get("sql")),
+    "findColumns": lambda uc, params: uc.find_columns(
+        column=params.get("column"),
+        data_type=params.get("data_type"),
+        catalog=params.get("catalog"),
+        schema=params.get("schema")
+    ),
+    "bulkGrant": _bulk_grant,
+    "exportInventory": lambda uc, params: _start_job("inventory_export", {}, "the inventory export"),
+    "help": lambda uc, params: {"success": True, "message": HELP_MESSAGE, "sql": None},
+}
+
+
+@tracer.traced("execute_intent")
+def execute_intent(intent_data: Dict) -> Dict:
+    """Execute the parsed intent using Unity Catalog service"""
+    uc, _ = _init_services()  # Lazy init
+    intent = intent_data.get("intent")
+    params = intent_data.get("params", {})
     
+    span = current_span()
+    if span is not None:
+        span.set_attribute("uc.intent", intent)
+        span.set_attribute("uc.securable", params.get("object") or params.get("table") or params.get("catalog"))
+    
+    handler = INTENT_HANDLERS.get(intent)
+    if handler is None:
+        return {
+            "success": False,
+            "message": f"Unknown intent: {intent}. Type 'help' for available commands."
+        }
+    
+    try:
+        return handler(uc, params)
     except Exception as e:
         return {
             "success": False,
@@ -318,23 +612,76 @@ Just describe what you want to do in natural language!""",
         }
 
 
+def _caller() -> Optional[str]:
+    """
+    Who is making the request. Identity headers are only believed behind a
+    trusted proxy (TRUSTED_PROXY_HOPS), which sets them; otherwise, and when
+    it sent none, the client address (the proxy's view of it via ProxyFix).
+    """
+    if config.security.trusted_proxy_hops:
+        user = request.headers.get('X-Forwarded-Email') or request.headers.get('X-Forwarded-User')
+        if user:
+            return user
+    return request.remote_addr
+
+
+def _audit(intent: str, params: Dict, result: Optional[Dict], started: float,
+           source: str = 'chat', outcome: str = None, **extra) -> None:
+    """Queue an audit record for one operation; only a dict and a queue put on the request path"""
+    if audit_log is None:
+        return
+    params = params or {}
+    result = result or {}
+    securable = params.get('object') or '.'.join(
+        str(params[key]) for key in ('catalog', 'schema', 'table') if params.get(key))
+    fields = dict(extra)
+    if params.get('principal'):
+        fields['grantee'] = params['principal']
+    if result.get('job'):
+        fields['job_id'] = result['job'].get('id')
+    audit_log.record(
+        principal=_caller(),
+        intent=intent,
+        securable=securable or None,
+        sql=result.get('sql'),
+        latency_ms=round((time.perf_counter() - started) * 1000, 2),
+        outcome=outcome or ('success' if result.get('success') else 'failed'),
+        source=source,
+        **fields
+    )
+
+
 @app.route('/', methods=['GET'])
 def index():
     """Serve the React UI"""
-    return _no_cache(send_from_directory('.', 'index.html'))
+    return _index_response()
+
+
+@app.route('/assets/<path:filename>', methods=['GET'])
+def serve_asset(filename):
+    """Serve fingerprinted bundles; their names change with their content, so cache them for good"""
+    response = send_from_directory(os.path.join(FRONTEND_DIST, 'assets'), filename,
+                                   max_age=IMMUTABLE_MAX_AGE)
+    response.headers["Cache-Control"] = f"public, max-age={IMMUTABLE_MAX_AGE}, immutable"
+    return response
 
 
 @app.route('/<path:path>', methods=['GET'])
 def serve_static(path):
-    """Serve static files"""
-    if path and os.path.exists(path):
+    """Serve the development page's files; other file paths 404 and client-side routes get the UI"""
+    if path in PUBLIC_FILES:
         return _no_cache(send_from_directory('.', path))
-    return _no_cache(send_from_directory('.', 'index.html'))
+    if '.' in os.path.basename(path):
+        return jsonify({'success': False, 'message': 'Not found'}), 404
+    return _index_response()
 
 
 @app.route('/api/chat', methods=['POST'])
+@request_profiler.wrap
 def chat():
     """Main chat endpoint"""
+    started = time.perf_counter()
+    intent_data = {}
     try:
         data = request.json
         user_message = data.get('message', '')
@@ -344,25 +691,72 @@ def chat():
                 'error': 'No message provided'
             }), 400
         
+        # Resolved objects from earlier turns let follow-ups parse in one call
+        session_id = data.get('session_id') or conversations.new_session_id()
+        state = conversations.get(session_id) if config.conversation.enabled else None
+        
+        # Likely reads run while Claude parses; only one matching the parsed intent is used
+        speculation = _speculate(user_message)
+        
         # Parse intent with Claude
-        intent_data = parse_with_claude(user_message)
+        priority = data.get('priority') if data.get('priority') in PRIORITIES else 'interactive'
+        try:
+            intent_data = parse_with_claude(user_message, conversations.context(state) if state else None,
+                                            priority=priority, user=_caller())
+        except LLMOverloaded as e:
+            if speculation is not None:
+                speculation.discard()
+            _audit(None, {}, None, started, outcome='rejected')
+            return _overloaded_response(e, session_id)
+        if state is not None:
+            state.fill_missing(intent_data)
+        
+        # Fix misspelled object names locally instead of failing in the SDK
+        resolution = _resolve_entities(intent_data)
         
         # Execute the operation
-        result = execute_intent(intent_data)
+        if resolution is not None and resolution.ambiguous:
+            result = resolution.clarification()
+        else:
+            result = speculation.take(intent_data) if speculation is not None else None
+            if result is None:
+                result = execute_intent(intent_data)
+            if resolution is not None and resolution.corrections:
+                result['corrections'] = resolution.corrections
+        if speculation is not None:
+            speculation.discard()
+        if state is not None:
+            conversations.record(session_id, intent_data, result)
         
         # Add explanation to response
         result['explanation'] = intent_data.get('explanation', '')
         result['intent'] = intent_data.get('intent')
+        result['session_id'] = session_id
         
+        _audit(intent_data.get('intent'), intent_data.get('params'), result, started)
         return jsonify(result)
     
     except Exception as e:
+        _audit(intent_data.get('intent'), intent_data.get('params'), None, started, outcome='error')
         return jsonify({
             'success': False,
             'message': f'Server error: {str(e)}'
         }), 500
 
 
+def _overloaded_response(error: LLMOverloaded, session_id: str = None):
+    """503 telling the client when to retry instead of a misleading help answer"""
+    response = jsonify({
+        'success': False,
+        'message': f"{error} - please try again in a few seconds.",
+        'retry_after': error.retry_after,
+        'session_id': session_id
+    })
+    response.status_code = 503
+    response.headers['Retry-After'] = str(max(int(round(error.retry_after)), 1))
+    return response
+
+
 @app.route('/api/health', methods=['GET'])
 def health():
     """Health check endpoint"""
@@ -372,12 +766,115 @@ def health():
     })
 
 
+@app.route('/api/admin/profiles', methods=['GET'])
+@_admin_only
+def list_profiles():
+    """List recently captured request profiles"""
+    if not request_profiler.enabled:
+        return jsonify({'success': False, 'message': 'Profiling is disabled'}), 404
+    return jsonify({'success': True, 'profiles': request_profiler.store.summaries()})
+
+
+@app.route('/api/admin/profiles/<request_id>', methods=['GET'])
+@_admin_only
+def get_profile(request_id):
+    """Get one profile; ?format=collapsed returns flame-graph-ready stacks"""
+    profile = request_profiler.store.get(request_id) if request_profiler.enabled else None
+    if profile is None:
+        return jsonify({'success': False, 'message': f'No profile for request {request_id}'}), 404
+    if request.args.get('format') == 'collapsed':
+        return profile['collapsed'], 200, {'Content-Type': 'text/plain; charset=utf-8'}
+    return jsonify({'success': True, 'profile': profile})
+
+
+@app.route('/api/admin/llm', methods=['GET'])
+@_admin_only
+def llm_scheduler_stats():
+    """LLM call load, queue-wait percentiles and rate-limit counters"""
+    if llm_scheduler is None:
+        return jsonify({'success': False, 'message': 'LLM scheduling is disabled'}), 404
+    return jsonify({'success': True, 'scheduler': llm_scheduler.snapshot()})
+
+
+@app.route('/api/admin/audit', methods=['GET'])
+@_admin_only
+def audit_stats():
+    """Audit queue depth and recorded/written/dropped counters"""
+    if audit_log is None:
+        return jsonify({'success': False, 'message': 'Audit logging is disabled'}), 404
+    return jsonify({'success': True, 'audit': audit_log.snapshot()})
+
+
+@app.route('/api/jobs', methods=['POST'])
+def submit_job():
+    """Start a background job: {"kind": ..., "params": {...}}; answers 202 with the job to poll"""
+    started = time.perf_counter()
+    data = request.json or {}
+    intent = f"job.{data.get('kind')}"
+    try:
+        job = _job_manager().submit(data.get('kind'), data.get('params') or {})
+    except ValueError as e:
+        _audit(intent, data.get('params'), None, started, source='api')
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except JobQueueFull as e:
+        _audit(intent, data.get('params'), None, started, source='api', outcome='rejected')
+        return jsonify({'success': False, 'message': f"Too many jobs are waiting: {e}"}), 429, {'Retry-After': '30'}
+    _audit(intent, data.get('params'), {'success': True, 'job': job}, started, source='api')
+    return jsonify({'success': True, 'job': job}), 202
+
+
+@app.route('/api/jobs', methods=['GET'])
+def list_jobs():
+    """Recent jobs, newest first (?status= and ?limit= filter)"""
+    limit = min(request.args.get('limit', 50, type=int), 500)
+    return jsonify({'success': True, 'jobs': _job_manager().store.list(limit, request.args.get('status'))})
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Job state and progress; ?offset=N also returns the partial results from item N on"""
+    job = _job_manager().get(job_id, request.args.get('offset', type=int))
+    if job is None:
+        return jsonify({'success': False, 'message': f'No job {job_id}'}), 404
+    return jsonify({'success': True, 'job': job})
+
+
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """Cancel a queued job, or stop a running one at its next progress update"""
+    job = _job_manager().cancel(job_id)
+    if job is None:
+        return jsonify({'success': False, 'message': f'No job {job_id}'}), 404
+    return jsonify({'success': True, 'job': job})
+
+
+@app.route('/api/jobs/<job_id>/retry', methods=['POST'])
+def retry_job(job_id):
+    """Run a failed or cancelled job again; bulk jobs only redo the items that did not succeed"""
+    try:
+        job = _job_manager().retry(job_id)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 409
+    except JobQueueFull as e:
+        return jsonify({'success': False, 'message': f"Too many jobs are waiting: {e}"}), 429, {'Retry-After': '30'}
+    if job is None:
+        return jsonify({'success': False, 'message': f'No job {job_id}'}), 404
+    return jsonify({'success': True, 'job': job}), 202
+
+
+def _listing_response(uc: UnityCatalogService, result: Dict, field: str):
+    """Listing with an ETag (304 when unchanged) and negotiated compression"""
+    # Cached listings share their item list across calls, so its body and hash are reused
+    identity = result.get(field) if uc.cache.enabled else None
+    return response_cache.respond(result, identity)
+
+
 @app.route('/api/catalogs', methods=['GET'])
 def get_catalogs():
     """Get all catalogs"""
     uc, _ = _init_services()
     result = uc.list_catalogs()
-    return jsonify(result)
+    return _listing_response(uc, result, 'catalogs')
 
 
 @app.route('/api/schemas/<catalog>', methods=['GET'])
@@ -385,7 +882,7 @@ def get_schemas(catalog):
     """Get schemas in a catalog"""
     uc, _ = _init_services()
     result = uc.list_schemas(catalog)
-    return jsonify(result)
+    return _listing_response(uc, result, 'schemas')
 
 
 @app.route('/api/tables/<catalog>/<schema>', methods=['GET'])
@@ -393,12 +890,14 @@ def get_tables(catalog, schema):
     """Get tables in a schema"""
     uc, _ = _init_services()
     result = uc.list_tables(catalog, schema)
-    return jsonify(result)
+    return _listing_response(uc, result, 'tables')
 
 
 @app.route('/api/execute', methods=['POST'])
 def execute_sql():
     """Execute a SQL statement"""
+    started = time.perf_counter()
+    sql = None
     try:
         data = request.json
         sql = data.get('sql', '')
@@ -406,8 +905,67 @@ def execute_sql():
         
         uc, _ = _init_services()
         result = uc.execute_sql(sql, warehouse_id)
+        _audit('executeSql', {}, {'sql': sql, **result}, started, source='api')
         return jsonify(result)
     
+    except Exception as e:
+        _audit('executeSql', {}, {'sql': sql}, started, source='api', outcome='error')
+        return jsonify({
+            'success': False,
+            'message': f'Error: {str(e)}'
+        }), 500
+
+
+@app.route('/api/batch/create', methods=['POST'])
+def batch_create():
+    """
+    Create a list of catalogs/schemas/tables and apply grants.
+    
+    With "mode": "sql" the batch is compiled into one script and run on the SQL
+    warehouse as a single statement ("dry_run": true only returns the script).
+    With "async": true it runs as a background job instead (202 with the job).
+    """
+    started = time.perf_counter()
+    try:
+        data = request.json or {}
+        objects = data.get('objects') or []
+        grants = data.get('grants') or []
+        if not isinstance(objects, list) or not isinstance(grants, list):
+            return jsonify({
+                'success': False,
+                'message': 'objects and grants must be lists'
+            }), 400
+        
+        if_not_exists = data.get('if_not_exists', True)
+        if data.get('mode') == 'sql':
+            script = compile_batch(objects, grants, if_not_exists=if_not_exists)
+            if data.get('dry_run'):
+                return jsonify({
+                    'success': not script.errors,
+                    'message': f"Compiled {len(script)} statement(s)",
+                    'errors': script.errors,
+                    'sql': script.render()
+                })
+            uc, _ = _init_services()
+            result = uc.execute_script(script, warehouse_id=data.get('warehouse_id'))
+            _audit('batchCreate', {}, result, started, source='api', objects=len(objects), grants=len(grants))
+            return jsonify(result)
+        
+        if data.get('async'):
+            job = _job_manager().submit('batch_create', {
+                'objects': objects, 'grants': grants, 'if_not_exists': if_not_exists
+            })
+            _audit('batchCreate', {}, {'success': True, 'job': job}, started, source='api',
+                   objects=len(objects), grants=len(grants))
+            return jsonify({'success': True, 'job': job}), 202
+        
+        uc, _ = _init_services()
+        result = uc.create_objects(objects, if_not_exists=if_not_exists, grants=grants)
+        _audit('batchCreate', {}, result, started, source='api', objects=len(objects), grants=len(grants))
+        return jsonify(result)
+    
+    except JobQueueFull as e:
+        return jsonify({'success': False, 'message': f"Too many jobs are waiting: {e}"}), 429, {'Retry-After': '30'}
     except Exception as e:
         return jsonify({
             'success': False,
@@ -452,6 +1010,8 @@ def validate_connection():
 
 
 if __name__ == '__main__':
+    configure_logging(config.logging)
+    
     # Get port from environment variable (HF Spaces uses 7860)
     port = int(os.getenv('PORT', 7860))
     host = os.getenv('HOST', '0.0.0.0')
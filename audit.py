@@ -0,0 +1,262 @@
+"""
+Audit Logging
+Structured audit records (principal, intent, securable, SQL, latency, outcome) handed to a
+bounded in-memory queue and written in batches by a background thread to rotating JSON-lines
+files or SQLite, so auditing never blocks or slows the request path
+"""
+
+import atexit
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+from json_provider import dumps
+
+logger = logging.getLogger(__name__)
+
+# Record fields with their own SQLite columns; anything else goes to `extra`
+FIELDS = ("ts", "principal", "intent", "securable", "sql", "latency_ms", "outcome", "source")
+
+
+# ==================== SINKS ====================
+
+class JsonlAuditSink:
+    """
+    Appends records to a JSON-lines file, rotating it once it would pass
+    `max_bytes` (audit.jsonl -> audit.jsonl.1 -> ... -> audit.jsonl.N).
+
+    Each gunicorn worker needs its own file, since rotation is not
+    coordinated between processes; a "{pid}" in `path` (as in the default)
+    is replaced with the worker's process id.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 50 * 1024 * 1024, backups: int = 5):
+        self.path_template = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+
+    @property
+    def path(self) -> str:
+        # Resolved per write: the sink is built before gunicorn forks its workers
+        return self.path_template.replace("{pid}", str(os.getpid()))
+
+    def write(self, records: List[Dict]) -> None:
+        data = b"".join(dumps(record) + b"\n" for record in records)
+        path = self.path
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            size = 0
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+        if size and self.max_bytes and size + len(data) > self.max_bytes:
+            self._rotate(path)
+        with open(path, "ab") as fh:
+            fh.write(data)
+
+    def _rotate(self, path: str) -> None:
+        if self.backups <= 0:
+            os.remove(path)
+            return
+        for index in range(self.backups - 1, 0, -1):
+            source = f"{path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{path}.{index + 1}")
+        try:
+            os.replace(path, f"{path}.1")
+        except FileNotFoundError:
+            # Rotated by another process sharing the path; appending starts a new file
+            pass
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteAuditSink:
+    """
+    Inserts records into an `audit_log` table, one transaction per batch.
+
+    All workers can write to the same database file, but each process opens
+    its own connection on first write: the sink is built before gunicorn
+    forks, and a SQLite connection must not be used across fork().
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._pid = None
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._pid != os.getpid():
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS audit_log ("
+                "ts REAL NOT NULL, principal TEXT, intent TEXT, securable TEXT, sql TEXT, "
+                "latency_ms REAL, outcome TEXT, source TEXT, extra TEXT)"
+            )
+            self._pid = os.getpid()
+        return self._conn
+
+    def write(self, records: List[Dict]) -> None:
+        rows = []
+        for record in records:
+            extra = {key: value for key, value in record.items() if key not in FIELDS}
+            rows.append((*(record.get(key) for key in FIELDS), dumps(extra).decode() if extra else None))
+        conn = self._connection()
+        conn.execute("BEGIN")
+        try:
+            conn.executemany(
+                f"INSERT INTO audit_log ({', '.join(FIELDS)}, extra) VALUES ({', '.join('?' * (len(FIELDS) + 1))})",
+                rows,
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def close(self) -> None:
+        if self._conn is not None and self._pid == os.getpid():
+            self._conn.close()
+            self._pid = self._conn = None
+
+
+# ==================== WRITER ====================
+
+class _Flush:
+    __slots__ = ("done", "ok")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.ok = False
+
+
+class AuditLog:
+    """
+    Non-blocking audit trail.
+
+    `record()` only builds a dict and puts it on a bounded queue; a daemon
+    thread drains the queue and writes up to `batch_size` records per sink
+    call, waiting at most `flush_interval` seconds for a batch to fill.
+    When the queue is full (the sink is slow or down) new records are
+    dropped and counted instead of blocking the caller, and the writer
+    logs an `audit.dropped` record with the count once it catches up.
+    A failed batch is kept and retried until `max_queue` records are pending.
+    """
+
+    def __init__(self, sink, max_queue: int = 10000, batch_size: int = 500, flush_interval: float = 1.0):
+        self.sink = sink
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.stats = {'recorded': 0, 'written': 0, 'dropped': 0, 'batches': 0, 'write_errors': 0}
+        self._unreported_drops = 0
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue: Optional[queue.Queue] = None
+
+    @classmethod
+    def from_config(cls, audit_config) -> Optional["AuditLog"]:
+        if not audit_config.enabled:
+            return None
+        if audit_config.sink == "sqlite":
+            sink = SQLiteAuditSink(audit_config.path)
+        else:
+            sink = JsonlAuditSink(audit_config.path, audit_config.max_bytes, audit_config.backups)
+        return cls(sink, audit_config.max_queue, audit_config.batch_size, audit_config.flush_interval)
+
+    def record(self, **fields) -> bool:
+        """Queue one record; False when it was dropped because the queue is full"""
+        fields.setdefault("ts", time.time())
+        try:
+            self._writer_queue().put_nowait(fields)
+        except queue.Full:
+            with self._lock:
+                self.stats['dropped'] += 1
+                self._unreported_drops += 1
+            return False
+        with self._lock:
+            self.stats['recorded'] += 1
+        return True
+
+    def _writer_queue(self) -> queue.Queue:
+        # Started lazily per process: a thread started before gunicorn forks does not survive the fork
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._queue = queue.Queue(maxsize=self.max_queue)
+                    threading.Thread(target=self._run, args=(self._queue,), name="audit-writer",
+                                     daemon=True).start()
+                    if self._pid is None:
+                        atexit.register(self.flush, 2.0)
+                    self._pid = os.getpid()
+        return self._queue
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until everything recorded so far is written; False on timeout or a failing sink"""
+        if self._pid != os.getpid():
+            return True
+        marker = _Flush()
+        try:
+            self._queue.put(marker, timeout=timeout)
+        except queue.Full:
+            return False
+        return marker.done.wait(timeout) and marker.ok
+
+    def _run(self, records: queue.Queue) -> None:
+        pending: List[Dict] = []
+        while True:
+            markers = []
+            try:
+                item = records.get(timeout=self.flush_interval if pending else None)
+                deadline = time.monotonic() + self.flush_interval
+                while True:
+                    if isinstance(item, _Flush):
+                        markers.append(item)
+                        break
+                    pending.append(item)
+                    if len(pending) >= self.batch_size:
+                        break
+                    item = records.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                pass
+            pending = self._write(pending)
+            for marker in markers:
+                marker.ok = not pending
+                marker.done.set()
+
+    def _write(self, pending: List[Dict]) -> List[Dict]:
+        """Records still pending after one attempt to write them"""
+        with self._lock:
+            drops, self._unreported_drops = self._unreported_drops, 0
+        if drops:
+            pending.append({"ts": time.time(), "intent": "audit.dropped", "outcome": "dropped", "count": drops})
+        if not pending:
+            return pending
+        written = 0
+        try:
+            for start in range(0, len(pending), self.batch_size):
+                batch = pending[start:start + self.batch_size]
+                self.sink.write(batch)
+                written += len(batch)
+                self.stats['batches'] += 1
+        except Exception as e:
+            self.stats['write_errors'] += 1
+            logger.warning(f"Audit write failed, {len(pending) - written} record(s) kept for retry: {e}")
+        self.stats['written'] += written
+        pending = pending[written:]
+        if len(pending) > self.max_queue:
+            with self._lock:
+                self.stats['dropped'] += len(pending) - self.max_queue
+            pending = pending[-self.max_queue:]
+        return pending
+
+    def snapshot(self) -> Dict:
+        queued = self._queue.qsize() if self._pid == os.getpid() else 0
+        return {'queued': queued, 'max_queue': self.max_queue, **self.stats}
@@ -0,0 +1,567 @@
+"""
+Benchmark Suite for Unity Catalog Chatbot
+Drives the real app against local fake Databricks and Anthropic servers at increasing
+concurrency and stores the results so runs can be compared across commits
+
+Usage:
+    python benchmark.py --concurrency 1,4,16,64 --requests 200
+    python benchmark.py --compare benchmark_results/<baseline>.json --max-regression 0.2
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+from fake_backends import FakeAnthropicServer, FakeDatabricksServer, FakeWorkspace, FaultProfile
+from load_test import free_port, percentile, run_load, start_server, stop_server, wait_for_health
+from replay import Cassette, replay
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(ROOT, "benchmark_results")
+
+
+# ==================== MEASUREMENT HELPERS ====================
+
+def git_commit() -> str:
+    """Short hash of the checked-out commit, or 'unknown' outside git"""
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _children(pid: int) -> List[int]:
+    children = []
+    task_dir = f"/proc/{pid}/task"
+    for tid in os.listdir(task_dir) if os.path.isdir(task_dir) else []:
+        try:
+            with open(f"{task_dir}/{tid}/children") as fh:
+                children.extend(int(c) for c in fh.read().split())
+        except OSError:
+            pass
+    return children
+
+
+def process_tree_rss_mb(pid: int) -> Optional[float]:
+    """Resident memory of a process and all its descendants (Linux only)"""
+    if not os.path.isdir(f"/proc/{pid}"):
+        return None
+    total_kb, pending = 0, [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f"/proc/{current}/status") as fh:
+                for line in fh:
+                    if line.startswith("VmRSS:"):
+                        total_kb += int(line.split()[1])
+                        break
+        except OSError:
+            continue
+        pending.extend(_children(current))
+    return round(total_kb / 1024, 1)
+
+
+def load_all_sample_queries() -> List[str]:
+    """Every query in sample_queries.json: samples, quick actions and the demo workflow"""
+    with open(os.path.join(ROOT, "sample_queries.json")) as fh:
+        samples = json.load(fh)
+    return ([sample["query"] for sample in samples["sample_queries"]] + samples["quick_actions"]
+            + samples["demo_workflow"]["steps"])
+
+
+# Rewordings of sample queries, as users type them
+PARAPHRASES = [
+    "Show me the catalogs",
+    "What catalogs exist?",
+    "Please create a catalog called sales_data",
+    "Create a catalog named sales_data",
+    "List schemas in the sales_data catalog",
+    "Show the grants on sales_data.bronze.raw_orders",
+    "What are the permissions on sales_data.bronze.raw_orders?",
+    "Grant SELECT on sales_data.silver to data_scientists",
+    "Grant MODIFY on sales_data.bronze.raw_orders to data_analysts",
+    "Which tables in sales_data have a column called order_id?",
+    "Show tables in sales_data.bronze",
+    "Describe the table sales_data.bronze.raw_orders",
+]
+
+
+def load_sample_messages() -> List[Dict]:
+    """Chat payloads built from sample_queries.json"""
+    with open(os.path.join(ROOT, "sample_queries.json")) as fh:
+        samples = json.load(fh)["sample_queries"]
+    return [{"message": sample["query"]} for sample in samples]
+
+
+# ==================== SUITES ====================
+
+def http_scenarios(batch_size: int = 20) -> Dict[str, Dict]:
+    """Endpoint scenarios driven by the HTTP suite"""
+    grants = [{'principal': f"batch_user_{i}", 'privilege': 'SELECT', 'object': "sales_data.bronze.raw_orders"}
+              for i in range(batch_size)]
+    return {
+        "chat": {"path": "/api/chat", "payloads": load_sample_messages()},
+        "catalogs": {"path": "/api/catalogs"},
+        "tables": {"path": "/api/tables/sales_data/bronze"},
+        # Compiled into one SQL script and run on the fake warehouse
+        "batch_sql": {"path": "/api/batch/create", "payloads": [{"mode": "sql", "grants": grants}]},
+    }
+
+
+def run_http_suite(args) -> List[Dict]:
+    """Drive every HTTP scenario at each concurrency level through a gunicorn server"""
+    workspace = FakeWorkspace(catalogs=args.catalogs, schemas=args.schemas, tables=args.tables)
+    sdk_faults = FaultProfile(latency=args.sdk_latency, jitter=args.sdk_latency / 4,
+                              error_rate=args.error_rate)
+    llm_faults = FaultProfile(latency=args.llm_latency, jitter=args.llm_latency / 4,
+                              error_rate=args.error_rate, error_status=429)
+    scenarios = http_scenarios(args.batch_size)
+    selected = args.scenarios.split(",") if args.scenarios else list(scenarios)
+    results = []
+
+    with FakeDatabricksServer(workspace, sdk_faults, statement_latency=args.statement_latency) as databricks, \
+            FakeAnthropicServer(llm_faults) as anthropic_api:
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        env = {
+            "DATABRICKS_HOST": databricks.url,
+            "DATABRICKS_TOKEN": "dapi-benchmark-token",
+            "DATABRICKS_WAREHOUSE_ID": "benchmark-warehouse",
+            "ANTHROPIC_BASE_URL": anthropic_api.url,
+            "ANTHROPIC_API_KEY": "sk-ant-benchmark",
+        }
+        process = start_server(port, args.worker_class, args.workers, args.threads,
+                               env=env, app_uri="app:app")
+        try:
+            wait_for_health(base_url)
+            for name in selected:
+                scenario = scenarios[name]
+                for concurrency in args.concurrency:
+                    summary = run_load(
+                        base_url + scenario["path"],
+                        payloads=scenario.get("payloads"),
+                        concurrency=concurrency,
+                        total=max(args.requests, concurrency),
+                    )
+                    summary.update({
+                        "suite": "http",
+                        "scenario": name,
+                        "rss_mb": process_tree_rss_mb(process.pid),
+                    })
+                    results.append(summary)
+                    print(f"  {name:<10} c={concurrency:<4} rps={summary['rps']:<8} "
+                          f"p50={summary['p50_ms']}ms p95={summary['p95_ms']}ms "
+                          f"p99={summary['p99_ms']}ms errors={summary['errors']} "
+                          f"rss={summary['rss_mb']}MB")
+        finally:
+            stop_server(process)
+
+    return results
+
+
+def run_replay_suite(args) -> List[Dict]:
+    """
+    Replay a recorded cassette through the in-process chat path.
+
+    Uses production-shaped metadata without network access, so execute_intent
+    hot paths can be profiled and cache effects measured as SDK calls saved.
+    """
+    if not args.cassette:
+        raise SystemExit("--cassette is required for the replay suite")
+
+    import app as app_module
+    from unity_catalog_service import UnityCatalogService
+
+    cassette = Cassette.load(args.cassette)
+    messages = [
+        json.loads(interaction["key"])[1]
+        for interaction in cassette.interactions
+        if interaction["client"] == "anthropic"
+    ]
+
+    service = UnityCatalogService(workspace_url="https://replay.invalid", token="replay-token")
+    service.client = replay(cassette, "databricks", args.timing)
+    app_module.uc_service = service
+    app_module.claude_client = replay(cassette, "anthropic", args.timing)
+
+    latencies: Dict[str, List[float]] = {}
+    started = time.perf_counter()
+    with app_module.app.test_client() as client:
+        for _ in range(args.rounds):
+            for message in messages:
+                start = time.perf_counter()
+                response = client.post("/api/chat", json={"message": message})
+                elapsed = time.perf_counter() - start
+                intent = (response.get_json() or {}).get("intent") or "error"
+                latencies.setdefault(intent, []).append(elapsed)
+    duration = time.perf_counter() - started
+
+    results = []
+    for intent, samples in sorted(latencies.items()):
+        results.append({
+            "suite": "replay",
+            "scenario": intent,
+            "concurrency": 1,
+            "requests": len(samples),
+            "p50_ms": round(percentile(samples, 50) * 1000, 2),
+            "p95_ms": round(percentile(samples, 95) * 1000, 2),
+            "p99_ms": round(percentile(samples, 99) * 1000, 2),
+        })
+        print(f"  {intent:<18} n={len(samples):<5} p50={results[-1]['p50_ms']}ms "
+              f"p95={results[-1]['p95_ms']}ms")
+
+    total = sum(len(samples) for samples in latencies.values())
+    sdk_calls = service.client.replayed_calls
+    results.append({
+        "suite": "replay",
+        "scenario": "all",
+        "concurrency": 1,
+        "requests": total,
+        "rps": round(total / duration, 2) if duration else 0.0,
+        "sdk_calls_per_request": round(sdk_calls / total, 3) if total else 0.0,
+    })
+    print(f"  {total} chats, {sdk_calls} SDK calls replayed "
+          f"({results[-1]['sdk_calls_per_request']} per request)")
+    return results
+
+
+def _time_import_app() -> float:
+    code = "import time; t = time.perf_counter(); import app; print(time.perf_counter() - t)"
+    output = subprocess.check_output([sys.executable, "-c", code], cwd=ROOT, stderr=subprocess.DEVNULL)
+    return float(output.decode().strip().splitlines()[-1])
+
+
+def run_startup_suite(args) -> List[Dict]:
+    """
+    Track time-to-first-response after a restart.
+
+    Measures `import app` in a fresh interpreter, then boots gunicorn with and
+    without worker warm-up and times health, the first catalog listing and a
+    second one for comparison.
+    """
+    samples: Dict[str, List[float]] = {"import_app": [_time_import_app() for _ in range(args.rounds)]}
+
+    with FakeDatabricksServer(FakeWorkspace(), FaultProfile(latency=args.sdk_latency)) as databricks, \
+            FakeAnthropicServer(FaultProfile(latency=args.llm_latency)) as anthropic_api:
+        for warm in (False, True):
+            mode = "warm" if warm else "cold"
+            env = {
+                "DATABRICKS_HOST": databricks.url,
+                "DATABRICKS_TOKEN": "dapi-benchmark-token",
+                "ANTHROPIC_BASE_URL": anthropic_api.url,
+                "ANTHROPIC_API_KEY": "sk-ant-benchmark",
+                "STARTUP_WARM_UP": "true" if warm else "false",
+            }
+            for _ in range(args.rounds):
+                port = free_port()
+                base_url = f"http://127.0.0.1:{port}"
+                started = time.perf_counter()
+                process = start_server(port, args.worker_class, 1, args.threads, env=env, app_uri="app:app")
+                try:
+                    wait_for_health(base_url)
+                    samples.setdefault(f"{mode}/boot_to_health", []).append(time.perf_counter() - started)
+                    for label in ("first_catalogs", "second_catalogs"):
+                        latency = run_load(f"{base_url}/api/catalogs", concurrency=1, total=1)["p50_ms"]
+                        samples.setdefault(f"{mode}/{label}", []).append(latency / 1000)
+                finally:
+                    stop_server(process)
+
+    results = []
+    for scenario, values in samples.items():
+        row = {
+            "suite": "startup",
+            "scenario": scenario,
+            "concurrency": 1,
+            "requests": len(values),
+            "p50_ms": round(percentile(values, 50) * 1000, 1),
+            "p95_ms": round(percentile(values, 95) * 1000, 1),
+        }
+        results.append(row)
+        print(f"  {scenario:<24} p50={row['p50_ms']}ms p95={row['p95_ms']}ms")
+    return results
+
+
+def run_batch_suite(args) -> List[Dict]:
+    """
+    Compare applying a batch of grants one REST call each with one SQL script submission.
+
+    Runs in-process against the fake Databricks server, with `--sdk-latency`
+    per REST call and `--statement-latency` per statement inside a script.
+    """
+    from databricks.sdk import WorkspaceClient
+    from sql_script import compile_batch
+    from unity_catalog_service import UnityCatalogService
+
+    workspace = FakeWorkspace(catalogs=1, schemas=1, tables=1)
+    table = next(iter(workspace.tables))
+    results = []
+    with FakeDatabricksServer(workspace, FaultProfile(latency=args.sdk_latency),
+                              statement_latency=args.statement_latency) as databricks:
+        service = UnityCatalogService(workspace_url=databricks.url, token="dapi-benchmark-token")
+        service.client = WorkspaceClient(host=databricks.url, token="dapi-benchmark-token")
+        service.warehouse_id = "benchmark-warehouse"
+        for mode in ("api", "sql_script"):
+            grants = [{'principal': f"{mode}_user_{i}", 'privilege': 'SELECT', 'object': table}
+                      for i in range(args.grants)]
+            before = databricks.request_count
+            started = time.perf_counter()
+            if mode == "api":
+                outcome = service.create_objects([], grants=grants)
+            else:
+                outcome = service.execute_script(compile_batch(grants=grants))
+            elapsed = time.perf_counter() - started
+            row = {
+                "suite": "batch",
+                "scenario": f"grants/{mode}",
+                "concurrency": 1,
+                "requests": databricks.request_count - before,
+                "statements": len(grants),
+                "success": outcome['success'],
+                "p50_ms": round(elapsed * 1000, 1),
+            }
+            results.append(row)
+            print(f"  {row['scenario']:<20} {len(grants)} grants in {row['p50_ms']}ms "
+                  f"({row['requests']} request(s))")
+    return results
+
+
+def run_serialization_suite(args) -> List[Dict]:
+    """
+    Cost of building and serializing a `list_tables` payload, per `--tables-per-listing` tables.
+
+    Compares the previous per-item dicts through Flask's default provider with
+    dataclass records through FastJSONProvider (orjson when installed, else stdlib).
+    """
+    import json_provider
+    from databricks.sdk.service.catalog import DataSourceFormat, TableInfo, TableType
+    from flask.json.provider import DefaultJSONProvider
+    from records import TableRecord
+
+    flask_default = DefaultJSONProvider.__new__(DefaultJSONProvider)
+    infos = [
+        TableInfo(name=f"table_{i}", full_name=f"sales.bronze.table_{i}", owner="data_engineering",
+                  table_type=TableType.MANAGED, data_source_format=DataSourceFormat.DELTA)
+        for i in range(args.tables_per_listing)
+    ]
+
+    def build_dicts():
+        return [{'name': t.name, 'full_name': t.full_name, 'owner': t.owner,
+                 'table_type': str(t.table_type), 'data_source_format': str(t.data_source_format)}
+                for t in infos]
+
+    def build_records():
+        return [TableRecord(t.name, t.full_name, t.owner, str(t.table_type), str(t.data_source_format))
+                for t in infos]
+
+    dicts, records = build_dicts(), build_records()
+    cases = {
+        "build/dicts": build_dicts,
+        "build/records": build_records,
+        "serialize/flask_default_dicts": lambda: flask_default.dumps({'tables': dicts}),
+        "serialize/fast_provider_records": lambda: json_provider.dumps({'tables': records}),
+    }
+    if json_provider.orjson is not None:
+        def stdlib_fallback():
+            saved, json_provider.orjson = json_provider.orjson, None
+            try:
+                return json_provider.dumps({'tables': records})
+            finally:
+                json_provider.orjson = saved
+        cases["serialize/stdlib_fallback_records"] = stdlib_fallback
+
+    results = []
+    for scenario, case in cases.items():
+        timings = []
+        for _ in range(args.rounds):
+            started = time.perf_counter()
+            case()
+            timings.append(time.perf_counter() - started)
+        row = {
+            "suite": "serialization",
+            "scenario": scenario,
+            "concurrency": 1,
+            "requests": args.rounds,
+            "tables": args.tables_per_listing,
+            "p50_ms": round(percentile(timings, 50) * 1000, 2),
+            "min_ms": round(min(timings) * 1000, 2),
+        }
+        results.append(row)
+        print(f"  {scenario:<36} p50={row['p50_ms']}ms min={row['min_ms']}ms")
+    return results
+
+
+def run_intent_cache_suite(args) -> List[Dict]:
+    """
+    Hit rate and accuracy of the semantic intent cache over sample_queries.json.
+
+    Each round replays every sample query and paraphrase with renamed
+    identifiers (round 0 as written). Misses are parsed by the stub parser and
+    stored; hits are compared with what the parser returns for the same message.
+    """
+    import re
+    from fake_backends import stub_parse
+    from semantic_cache import SemanticIntentCache, template
+
+    cache = SemanticIntentCache(threshold=args.intent_threshold)
+    messages = load_all_sample_queries() + PARAPHRASES
+    results = []
+    for round_number in range(args.rounds):
+        hits = mismatches = 0
+        started = time.perf_counter()
+        for message in messages:
+            if round_number:
+                for slot in set(template(message).slots):
+                    message = re.sub(rf"\b{re.escape(slot)}\b", f"{slot}_{round_number}", message)
+            cached = cache.lookup(message)
+            expected = stub_parse(message)
+            if cached is None:
+                cache.store(message, expected)
+                continue
+            hits += 1
+            if (cached["intent"], cached["params"]) != (expected["intent"], expected["params"]):
+                mismatches += 1
+                print(f"    mismatch: {message!r} -> {cached['intent']} {cached['params']}")
+        row = {
+            "suite": "intent_cache",
+            "scenario": f"round_{round_number}",
+            "concurrency": 1,
+            "requests": len(messages),
+            "hits": hits,
+            "hit_rate": round(hits / len(messages), 3),
+            "mismatches": mismatches,
+            "p50_ms": round((time.perf_counter() - started) * 1000 / len(messages), 3),
+        }
+        results.append(row)
+        print(f"  {row['scenario']:<10} hit rate {row['hit_rate']:.0%} ({hits}/{len(messages)}), "
+              f"{mismatches} mismatch(es), {row['p50_ms']}ms per message")
+    print(f"  overall hit rate {cache.hit_rate():.0%}, {len(cache)} template(s), "
+          f"{cache.stats['skipped']} parse(s) not cacheable")
+    return results
+
+
+SUITES: Dict[str, Callable] = {
+    "batch": run_batch_suite,
+    "http": run_http_suite,
+    "intent_cache": run_intent_cache_suite,
+    "replay": run_replay_suite,
+    "serialization": run_serialization_suite,
+    "startup": run_startup_suite,
+}
+
+
+# ==================== RESULT STORAGE ====================
+
+def save_results(results: List[Dict], args, directory: str = RESULTS_DIR) -> str:
+    """Write a benchmark run to a timestamped JSON file and return its path"""
+    os.makedirs(directory, exist_ok=True)
+    commit = git_commit()
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    path = os.path.join(directory, f"{stamp}_{commit}.json")
+    document = {
+        "meta": {
+            "commit": commit,
+            "timestamp": stamp,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": {k: v for k, v in vars(args).items() if k != "compare"},
+        },
+        "results": results,
+    }
+    with open(path, "w") as fh:
+        json.dump(document, fh, indent=2)
+    return path
+
+
+def compare_results(baseline: List[Dict], current: List[Dict], max_regression: float) -> List[str]:
+    """
+    Compare two runs keyed by (suite, scenario, concurrency).
+
+    Returns human-readable regressions where throughput fell or p95 latency
+    rose by more than `max_regression` (a fraction, e.g. 0.2 for 20%).
+    """
+    def key(row):
+        return row.get("suite"), row.get("scenario"), row.get("concurrency")
+
+    previous = {key(row): row for row in baseline}
+    regressions = []
+
+    for row in current:
+        before = previous.get(key(row))
+        if not before:
+            continue
+        label = "/".join(str(part) for part in key(row))
+        if before.get("rps") and row.get("rps") is not None:
+            change = (row["rps"] - before["rps"]) / before["rps"]
+            print(f"  {label:<28} rps {before['rps']:>9} -> {row['rps']:<9} ({change:+.1%})")
+            if change < -max_regression:
+                regressions.append(f"{label}: rps fell {change:.1%}")
+        if before.get("p95_ms") and row.get("p95_ms") is not None:
+            change = (row["p95_ms"] - before["p95_ms"]) / before["p95_ms"]
+            if change > max_regression:
+                regressions.append(f"{label}: p95 rose {change:.1%}")
+
+    return regressions
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the chatbot against local fake backends")
+    parser.add_argument("--suite", default="http", choices=sorted(SUITES))
+    parser.add_argument("--scenarios", default="", help="Comma-separated subset of scenarios")
+    parser.add_argument("--concurrency", default="1,4,16,64",
+                        type=lambda v: [int(c) for c in v.split(",")])
+    parser.add_argument("--requests", type=int, default=200, help="Requests per concurrency step")
+    parser.add_argument("--worker-class", default="auto")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--sdk-latency", type=float, default=0.03, help="Fake Databricks latency (s)")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="Fake Anthropic latency (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Injected failure fraction")
+    parser.add_argument("--catalogs", type=int, default=3)
+    parser.add_argument("--schemas", type=int, default=4)
+    parser.add_argument("--tables", type=int, default=25)
+    parser.add_argument("--cassette", help="Recorded cassette for the replay suite")
+    parser.add_argument("--timing", type=float, default=0.0,
+                        help="Replay timing scale: 1.0 original, 0.1 compressed, 0 instant")
+    parser.add_argument("--rounds", type=int, default=5,
+                        help="Replay passes over the cassette, or restarts for the startup suite")
+    parser.add_argument("--grants", type=int, default=500, help="Grants per run for the batch suite")
+    parser.add_argument("--statement-latency", type=float, default=0.001,
+                        help="Fake warehouse time per script statement (s)")
+    parser.add_argument("--batch-size", type=int, default=20,
+                        help="Grants per /api/batch/create request in the HTTP suite")
+    parser.add_argument("--tables-per-listing", type=int, default=10000,
+                        help="Tables in the serialization suite's listing")
+    parser.add_argument("--intent-threshold", type=float, default=0.8,
+                        help="Similarity threshold for the intent_cache suite")
+    parser.add_argument("--output-dir", default=RESULTS_DIR)
+    parser.add_argument("--compare", help="Baseline results file to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    print(f"Running '{args.suite}' benchmark suite")
+    started = time.perf_counter()
+    results = SUITES[args.suite](args)
+    path = save_results(results, args, args.output_dir)
+    print(f"Finished in {time.perf_counter() - started:.1f}s, results written to {path}")
+
+    if args.compare:
+        with open(args.compare) as fh:
+            baseline = json.load(fh)["results"]
+        regressions = compare_results(baseline, results, args.max_regression)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+"""
+Checkpointed Bulk Runs
+Bulk operations over UnityCatalogService as keyed steps whose outcomes are recorded durably in
+batched SQLite writes, so a run that dies halfway resumes by skipping the steps it finished and
+retrying only the pending or failed ones
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+# One step of a bulk operation: a key unique within the run and a call returning an item dict
+# whose 'outcome' is 'failed' when the step did not succeed
+Step = Tuple[str, Callable[[], Dict]]
+
+DONE, FAILED = 1, 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    run_id TEXT NOT NULL,
+    key TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 1,
+    PRIMARY KEY (run_id, key)
+) WITHOUT ROWID;
+"""
+
+
+class Checkpoint:
+    """
+    Step outcomes of one run, keyed by `run_id`.
+
+    Outcomes are buffered and written `batch_size` at a time (or at least
+    every `flush_interval` seconds) in a single transaction; a crash loses
+    at most the unwritten tail, which the next attempt simply redoes. Rows
+    hold only the key, a status code and an attempt count.
+    """
+
+    def __init__(self, path: str, run_id: str, batch_size: int = 200, flush_interval: float = 2.0):
+        self.path = path
+        self.run_id = run_id
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._pending: Dict[str, int] = {}
+        self._flushed_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _keys(self, status: int) -> Set[str]:
+        with self._lock:
+            keys = {key for (key,) in self._conn.execute(
+                "SELECT key FROM checkpoints WHERE run_id = ? AND status = ?", (self.run_id, status))}
+            for key, pending in self._pending.items():
+                if pending == status:
+                    keys.add(key)
+                else:
+                    keys.discard(key)
+        return keys
+
+    def finished(self) -> Set[str]:
+        """Keys of the steps that succeeded in this or an earlier attempt"""
+        return self._keys(DONE)
+
+    def failed(self) -> Set[str]:
+        return self._keys(FAILED)
+
+    def record(self, key: str, ok: bool) -> None:
+        with self._lock:
+            self._pending[key] = DONE if ok else FAILED
+            due = (len(self._pending) >= self.batch_size
+                   or time.monotonic() - self._flushed_at >= self.flush_interval)
+        if due:
+            self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._flushed_at = time.monotonic()
+            if not pending:
+                return
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO checkpoints (run_id, key, status) VALUES (?, ?, ?) "
+                    "ON CONFLICT (run_id, key) DO UPDATE SET status = excluded.status, attempts = attempts + 1",
+                    [(self.run_id, key, status) for key, status in pending.items()],
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                self._pending = {**pending, **self._pending}
+                raise
+
+    def counts(self) -> Dict[str, int]:
+        self.flush()
+        with self._lock:
+            rows = dict(self._conn.execute(
+                "SELECT status, COUNT(*) FROM checkpoints WHERE run_id = ? GROUP BY status", (self.run_id,)))
+        return {'done': rows.get(DONE, 0), 'failed': rows.get(FAILED, 0)}
+
+    def clear(self) -> None:
+        """Forget the run, e.g. once it finished without failures"""
+        with self._lock:
+            self._pending = {}
+            self._conn.execute("DELETE FROM checkpoints WHERE run_id = ?", (self.run_id,))
+
+    def close(self) -> None:
+        self.flush()
+        self._conn.close()
+
+
+class BulkRun:
+    """
+    Runs the steps of one bulk operation, up to `max_workers` at a time.
+
+    Steps the checkpoint already marks done are skipped; every other step
+    (never tried, or failed before) runs and has its outcome checkpointed.
+    Outcomes are recorded and `progress(done, total, item)` is called from
+    the calling thread, so progress may raise to stop the run; steps already
+    running finish, queued ones are dropped, and the checkpoint is flushed.
+    Skipped steps count as done.
+    """
+
+    def __init__(self, checkpoint: Optional[Checkpoint] = None, max_workers: int = 1,
+                 progress: Callable = None, total: int = None):
+        self.checkpoint = checkpoint
+        self.max_workers = max_workers
+        self.progress = progress
+        self.total = total
+        self.done = 0
+        self.resumed = 0
+
+    def run(self, steps: Iterable[Step], max_workers: int = None) -> List[Dict]:
+        """Items of the steps that ran, in completion order"""
+        finished = self.checkpoint.finished() if self.checkpoint is not None else set()
+        todo = []
+        for key, call in steps:
+            if key in finished:
+                self.resumed += 1
+                self.done += 1
+            else:
+                todo.append((key, call))
+        if self.done and self.progress is not None:
+            self.progress(self.done, self.total, None)
+
+        items: List[Dict] = []
+        workers = max_workers or self.max_workers
+        try:
+            if workers <= 1:
+                for key, call in todo:
+                    self._record(key, _attempt(key, call), items)
+            else:
+                self._run_parallel(todo, workers, items)
+        finally:
+            if self.checkpoint is not None:
+                self.checkpoint.flush()
+        return items
+
+    def _run_parallel(self, todo: List[Step], workers: int, items: List[Dict]) -> None:
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bulk")
+        in_flight = {}
+        todo = iter(todo)
+        try:
+            while True:
+                # A bounded window keeps cancellation prompt and memory flat for huge runs
+                while len(in_flight) < workers * 2:
+                    step = next(todo, None)
+                    if step is None:
+                        break
+                    in_flight[pool.submit(_attempt, *step)] = step[0]
+                if not in_flight:
+                    return
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self._record(in_flight.pop(future), future.result(), items)
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def _record(self, key: str, item: Dict, items: List[Dict]) -> None:
+        if self.checkpoint is not None:
+            self.checkpoint.record(key, item.get('outcome') != 'failed')
+        self.done += 1
+        items.append(item)
+        if self.progress is not None:
+            self.progress(self.done, self.total, item)
+
+
+def _attempt(key: str, call: Callable[[], Dict]) -> Dict:
+    try:
+        return call()
+    except Exception as e:
+        return {'name': key, 'outcome': 'failed', 'message': str(e)}
@@ -0,0 +1,175 @@
+"""
+Column Index
+Bulk loading of column definitions for whole schemas or catalogs, kept in a columnar
+in-memory index so column questions are answered without per-table API calls
+"""
+
+import fnmatch
+import threading
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# (name, type_name, type_text, comment) for one column
+ColumnDef = Tuple[str, str, str, Optional[str]]
+
+
+def _type_name(value) -> str:
+    return str(getattr(value, "value", value) or "").upper()
+
+
+def _column_defs(columns: Iterable) -> List[ColumnDef]:
+    return [
+        (col.name, _type_name(col.type_name), (col.type_text or "").lower(), col.comment)
+        for col in columns or []
+    ]
+
+
+class ColumnIndex:
+    """
+    Columnar index over the columns of loaded tables.
+
+    Rows are stored as parallel arrays (table id, name, type, ...), with
+    postings from table, lower-cased column name and type to row ids. Loads
+    build a new snapshot and swap it in, so readers never see a partial one.
+    """
+
+    def __init__(self):
+        self._tables: Dict[str, List[ColumnDef]] = {}
+        self._scopes: Dict[Tuple[str, Optional[str]], float] = {}
+        self._lock = threading.Lock()
+        self._snapshot = self._build({})
+
+    # ---------- loading ----------
+
+    def replace_scope(self, catalog: str, schema: Optional[str], tables: Dict[str, List[ColumnDef]]) -> None:
+        """Swap in every table of a schema (or of a whole catalog when schema is None)"""
+        prefix = f"{catalog}.{schema}." if schema else f"{catalog}."
+        with self._lock:
+            self._tables = {name: cols for name, cols in self._tables.items() if not name.startswith(prefix)}
+            self._tables.update(tables)
+            self._scopes[(catalog, schema)] = time.monotonic()
+            self._snapshot = self._build(self._tables)
+
+    def is_loaded(self, catalog: str, schema: Optional[str] = None, max_age: float = 300) -> bool:
+        """Whether a load newer than `max_age` seconds covers this schema (or the whole catalog)"""
+        now = time.monotonic()
+        with self._lock:
+            for scope in ((catalog, schema), (catalog, None)):
+                loaded_at = self._scopes.get(scope)
+                if loaded_at is not None and now - loaded_at < max_age:
+                    return True
+        return False
+
+    def invalidate(self, catalog: str, schema: Optional[str] = None) -> None:
+        """Mark a schema (and its catalog-wide load) as needing a reload"""
+        with self._lock:
+            self._scopes.pop((catalog, schema), None)
+            self._scopes.pop((catalog, None), None)
+
+    @staticmethod
+    def _build(tables: Dict[str, List[ColumnDef]]) -> Dict:
+        names, types, type_texts, comments = [], [], [], []
+        table_ids = array("I")
+        table_names = sorted(tables)
+        by_table, by_name, by_type = {}, {}, {}
+        for table_id, table in enumerate(table_names):
+            start = len(names)
+            for name, type_name, type_text, comment in tables[table]:
+                row = len(names)
+                table_ids.append(table_id)
+                names.append(name)
+                types.append(type_name)
+                type_texts.append(type_text)
+                comments.append(comment)
+                by_name.setdefault(name.lower(), []).append(row)
+                by_type.setdefault(type_name.lower(), []).append(row)
+                base_type = type_text.split("(", 1)[0]
+                if base_type and base_type != type_name.lower():
+                    by_type.setdefault(base_type, []).append(row)
+            by_table[table] = range(start, len(names))
+        return {
+            'tables': table_names, 'table_ids': table_ids, 'names': names, 'types': types,
+            'type_texts': type_texts, 'comments': comments,
+            'by_table': by_table, 'by_name': by_name, 'by_type': by_type,
+        }
+
+    # ---------- queries ----------
+
+    def find(self, column: str = None, data_type: str = None, catalog: str = None,
+             schema: str = None) -> List[Dict]:
+        """
+        Columns matching a name (exact or glob such as '*_id') and/or a type,
+        optionally limited to a catalog or schema.
+        """
+        snap = self._snapshot
+        rows = None
+        if column:
+            pattern = column.lower()
+            if any(char in pattern for char in "*?["):
+                rows = [row for name, ids in snap['by_name'].items()
+                        if fnmatch.fnmatchcase(name, pattern) for row in ids]
+            else:
+                rows = list(snap['by_name'].get(pattern, []))
+        if data_type:
+            typed = snap['by_type'].get(data_type.lower(), [])
+            rows = typed if rows is None else sorted(set(rows) & set(typed))
+        if rows is None:
+            rows = range(len(snap['names']))
+
+        matches = []
+        for row in sorted(rows):
+            table = snap['tables'][snap['table_ids'][row]]
+            if catalog or schema:
+                table_catalog, table_schema, _ = table.split(".", 2)
+                if (catalog and table_catalog != catalog) or (schema and table_schema != schema):
+                    continue
+            matches.append(self._row(snap, row, table))
+        return matches
+
+    def columns_of(self, full_name: str) -> Optional[List[Dict]]:
+        snap = self._snapshot
+        rows = snap['by_table'].get(full_name)
+        return None if rows is None else [self._row(snap, row, full_name) for row in rows]
+
+    def stats(self) -> Dict:
+        snap = self._snapshot
+        return {'tables': len(snap['tables']), 'columns': len(snap['names'])}
+
+    @staticmethod
+    def _row(snap: Dict, row: int, table: str) -> Dict:
+        return {
+            'table': table,
+            'column': snap['names'][row],
+            'type': snap['type_texts'][row] or snap['types'][row].lower(),
+            'comment': snap['comments'][row],
+        }
+
+
+def load_column_definitions(client, catalog: str, schemas: List[str],
+                            max_workers: int = 8) -> Dict[str, List[ColumnDef]]:
+    """
+    Column definitions for every table in `schemas`, one listing per schema in parallel.
+
+    Listings include columns; tables that come back without them (views or
+    older workspaces) fall back to parallel per-table gets.
+    """
+    def list_schema(schema: str):
+        return list(client.tables.list(catalog_name=catalog, schema_name=schema, omit_columns=False))
+
+    tables: Dict[str, List[ColumnDef]] = {}
+    missing: List[str] = []
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="column-loader") as pool:
+        for schema, listing in zip(schemas, pool.map(list_schema, schemas)):
+            for info in listing:
+                full_name = info.full_name or f"{catalog}.{schema}.{info.name}"
+                if info.columns:
+                    tables[full_name] = _column_defs(info.columns)
+                else:
+                    missing.append(full_name)
+
+        for full_name, info in zip(missing, pool.map(client.tables.get, missing)):
+            tables[full_name] = _column_defs(info.columns)
+
+    return tables
@@ -62,6 +62,14 @@ class ServerConfig:
     debug: bool = False
     workers: int = 4
     timeout: int = 120
+    worker_class: str = "auto"
+    threads: int = 8
+    keepalive: int = 5
+    graceful_timeout: int = 30
+    preload: bool = True
+    max_requests: int = 0
+    compression_min_bytes: int = 1024
+    compression_level: int = 6
     
     def validate(self) -> bool:
         """Validate server configuration"""
@@ -71,6 +79,19 @@ class ServerConfig:
         if self.workers < 1 or self.workers > 32:
             raise ValueError("Invalid number of workers")
         
+        valid_worker_classes = ["auto", "sync", "gthread", "gevent", "eventlet"]
+        if self.worker_class not in valid_worker_classes:
+            raise ValueError(f"Invalid worker class. Must be one of {valid_worker_classes}")
+        
+        if self.threads < 1 or self.threads > 256:
+            raise ValueError("Invalid number of threads")
+        
+        if self.timeout < 1 or self.keepalive < 0 or self.graceful_timeout < 0:
+            raise ValueError("Invalid server timeout values")
+        
+        if self.compression_min_bytes < 0 or not 1 <= self.compression_level <= 11:
+            raise ValueError("Invalid response compression settings")
+        
         return True
 
 
@@ -82,6 +103,9 @@ class SecurityConfig:
     rate_limit_per_minute: int = 60
     enable_cors: bool = True
     allowed_origins: list = None
+    admin_token: Optional[str] = None
+    admin_header: str = "X-Admin-Token"
+    trusted_proxy_hops: int = 0
     
     def __post_init__(self):
         if self.allowed_origins is None:
@@ -92,6 +116,9 @@ class SecurityConfig:
         if self.rate_limit_per_minute < 1 or self.rate_limit_per_minute > 1000:
             raise ValueError("Invalid rate limit")
         
+        if self.trusted_proxy_hops < 0:
+            raise ValueError("Trusted proxy hops cannot be negative")
+        
         return True
 
 
@@ -112,6 +139,227 @@ class LoggingConfig:
         return True
 
 
+@dataclass
+class StartupConfig:
+    """Worker boot and warm-up configuration"""
+    warm_up: bool = True
+    preopen_connections: bool = True
+    prime_cache: bool = False
+    
+    def validate(self) -> bool:
+        """Validate startup configuration"""
+        return True
+
+
+@dataclass
+class InventoryConfig:
+    """Local metadata inventory export configuration"""
+    sqlite_path: str = "data/inventory.db"
+    parquet_dir: Optional[str] = None
+    max_workers: int = 8
+    batch_size: int = 500
+    max_rows: int = 200
+    query_timeout: float = 2.0
+    
+    def validate(self) -> bool:
+        """Validate inventory configuration"""
+        if self.max_workers < 1 or self.batch_size < 1 or self.max_rows < 1 or self.query_timeout <= 0:
+            raise ValueError("Invalid inventory export or query limits")
+        
+        return True
+
+
+@dataclass
+class PrefetchConfig:
+    """Background metadata prefetch configuration"""
+    enabled: bool = True
+    max_workers: int = 2
+    max_per_trigger: int = 3
+    calls_per_minute: int = 120
+    
+    def validate(self) -> bool:
+        """Validate prefetch configuration"""
+        if self.max_workers < 1 or self.max_per_trigger < 0 or self.calls_per_minute < 0:
+            raise ValueError("Invalid prefetch concurrency or budget")
+        
+        return True
+
+
+@dataclass
+class SpeculationConfig:
+    """Speculative reads started while the LLM parses a chat message"""
+    enabled: bool = True
+    max_workers: int = 4
+    max_calls: int = 2
+    wait_timeout: float = 30.0
+    
+    def validate(self) -> bool:
+        """Validate speculation configuration"""
+        if self.max_workers < 1 or self.max_calls < 0 or self.wait_timeout <= 0:
+            raise ValueError("Invalid speculation concurrency or timeout")
+        
+        return True
+
+
+@dataclass
+class IntentCacheConfig:
+    """Semantic cache of parsed intents in front of the LLM"""
+    enabled: bool = True
+    threshold: float = 0.8
+    max_entries: int = 2000
+    
+    def validate(self) -> bool:
+        """Validate intent cache configuration"""
+        if not 0 < self.threshold <= 1:
+            raise ValueError("Intent cache threshold must be in (0, 1]")
+        
+        if self.max_entries < 1:
+            raise ValueError("Intent cache must hold at least one entry")
+        
+        return True
+
+
+@dataclass
+class LLMSchedulerConfig:
+    """Admission control for outbound LLM calls"""
+    enabled: bool = True
+    max_in_flight: int = 8
+    max_queue: int = 64
+    queue_timeout: float = 10.0
+    max_retries: int = 3
+    lock_dir: Optional[str] = None
+    
+    def validate(self) -> bool:
+        """Validate LLM scheduler configuration"""
+        if self.max_in_flight < 1 or self.max_queue < 0:
+            raise ValueError("LLM scheduler needs at least one in-flight call")
+        
+        if self.queue_timeout <= 0 or self.max_retries < 0:
+            raise ValueError("Invalid LLM scheduler timeout or retries")
+        
+        return True
+
+
+@dataclass
+class JobsConfig:
+    """Background job queue for long-running bulk operations"""
+    db_path: str = "data/jobs.db"
+    max_workers: int = 2
+    max_queued: int = 100
+    bulk_workers: int = 4
+    checkpoint_batch: int = 200
+    
+    def validate(self) -> bool:
+        """Validate job queue configuration"""
+        if self.max_workers < 1 or self.max_queued < 1:
+            raise ValueError("Job queue needs at least one worker and one queued job")
+        
+        if self.bulk_workers < 1 or self.checkpoint_batch < 1:
+            raise ValueError("Bulk operations need at least one worker and a checkpoint batch of one")
+        
+        return True
+
+
+@dataclass
+class AuditConfig:
+    """Asynchronous audit trail of chat and API operations"""
+    enabled: bool = True
+    sink: str = "jsonl"
+    path: str = "logs/audit-{pid}.jsonl"
+    max_queue: int = 10000
+    batch_size: int = 500
+    flush_interval: float = 1.0
+    max_bytes: int = 50 * 1024 * 1024
+    backups: int = 5
+    
+    def validate(self, workers: int = 1) -> bool:
+        """Validate audit configuration for a server running `workers` processes"""
+        valid_sinks = ["jsonl", "sqlite"]
+        if self.sink not in valid_sinks:
+            raise ValueError(f"Invalid audit sink. Must be one of {valid_sinks}")
+        
+        if self.enabled and self.sink == "jsonl" and workers > 1 and "{pid}" not in self.path:
+            raise ValueError("AUDIT_PATH needs a {pid} placeholder when several workers write JSON lines "
+                             "(or use AUDIT_SINK=sqlite)")
+        
+        if self.max_queue < 1 or self.batch_size < 1 or self.flush_interval <= 0:
+            raise ValueError("Audit queue and batch sizes must be positive")
+        
+        if self.max_bytes < 0 or self.backups < 0:
+            raise ValueError("Audit rotation limits cannot be negative")
+        
+        return True
+
+
+@dataclass
+class ConversationConfig:
+    """Per-session conversation memory configuration"""
+    enabled: bool = True
+    max_sessions: int = 1000
+    ttl_seconds: int = 3600
+    max_recent: int = 5
+    max_context_chars: int = 600
+    store_path: Optional[str] = "data/conversations.db"
+    
+    def validate(self, workers: int = 1) -> bool:
+        """Validate conversation configuration"""
+        if self.max_sessions < 1 or self.ttl_seconds < 1:
+            raise ValueError("Invalid conversation session limits")
+        
+        if self.max_recent < 0 or self.max_context_chars < 100:
+            raise ValueError("Conversation context must allow at least 100 characters")
+        
+        if self.enabled and workers > 1 and not self.store_path:
+            # In-memory sessions are per process; follow-ups would land on workers without them
+            raise ValueError("CONVERSATION_STORE_PATH is required when running more than one worker")
+        
+        return True
+
+
+@dataclass
+class ProfilingConfig:
+    """Per-request profiling configuration"""
+    enabled: bool = False
+    sample_rate: float = 0.0
+    header: str = "X-Profile"
+    mode: str = "sampling"
+    interval_ms: float = 5.0
+    max_profiles: int = 50
+    directory: Optional[str] = None
+    
+    def validate(self) -> bool:
+        """Validate profiling configuration"""
+        if self.sample_rate < 0 or self.sample_rate > 1:
+            raise ValueError("Profiling sample rate must be between 0 and 1")
+        
+        valid_modes = ["sampling", "deterministic"]
+        if self.mode not in valid_modes:
+            raise ValueError(f"Invalid profiling mode. Must be one of {valid_modes}")
+        
+        if self.interval_ms <= 0 or self.max_profiles < 1:
+            raise ValueError("Invalid profiling interval or store size")
+        
+        return True
+
+
+@dataclass
+class TracingConfig:
+    """Distributed tracing configuration"""
+    enabled: bool = False
+    service_name: str = "unity-catalog-chatbot"
+    exporter: str = "file"
+    file_path: str = "logs/traces.jsonl"
+    collector_url: str = "http://localhost:4318/v1/traces"
+    
+    def validate(self) -> bool:
+        """Validate tracing configuration"""
+        valid_exporters = ["file", "collector", "memory"]
+        if self.exporter not in valid_exporters:
+            raise ValueError(f"Invalid trace exporter. Must be one of {valid_exporters}")
+        
+        return True
+
+
 class Config:
     """Main configuration class"""
     
@@ -138,10 +386,18 @@ class Config:
         # Server configuration
         self.server = ServerConfig(
             host=os.getenv("SERVER_HOST", "0.0.0.0"),
-            port=int(os.getenv("SERVER_PORT", "5000")),
+            port=int(os.getenv("SERVER_PORT", os.getenv("PORT", "5000"))),
             debug=os.getenv("FLASK_ENV") == "development",
             workers=int(os.getenv("SERVER_WORKERS", "4")),
-            timeout=int(os.getenv("SERVER_TIMEOUT", "120"))
+            timeout=int(os.getenv("SERVER_TIMEOUT", "120")),
+            worker_class=os.getenv("SERVER_WORKER_CLASS", "auto").lower(),
+            threads=int(os.getenv("SERVER_THREADS", "8")),
+            keepalive=int(os.getenv("SERVER_KEEPALIVE", "5")),
+            graceful_timeout=int(os.getenv("SERVER_GRACEFUL_TIMEOUT", "30")),
+            preload=os.getenv("SERVER_PRELOAD", "true").lower() == "true",
+            max_requests=int(os.getenv("SERVER_MAX_REQUESTS", "0")),
+            compression_min_bytes=int(os.getenv("SERVER_COMPRESSION_MIN_BYTES", "1024")),
+            compression_level=int(os.getenv("SERVER_COMPRESSION_LEVEL", "6"))
         )
         
         # Security configuration
@@ -150,7 +406,10 @@ class Config:
             api_key_header=os.getenv("API_KEY_HEADER", "X-API-Key"),
             rate_limit_per_minute=int(os.getenv("RATE_LIMIT_PER_MINUTE", "60")),
             enable_cors=os.getenv("ENABLE_CORS", "true").lower() == "true",
-            allowed_origins=self._parse_list(os.getenv("ALLOWED_ORIGINS", "*"))
+            allowed_origins=self._parse_list(os.getenv("ALLOWED_ORIGINS", "*")),
+            admin_token=os.getenv("ADMIN_TOKEN") or None,
+            admin_header=os.getenv("ADMIN_TOKEN_HEADER", "X-Admin-Token"),
+            trusted_proxy_hops=int(os.getenv("TRUSTED_PROXY_HOPS", "0"))
         )
         
         # Logging configuration
@@ -160,12 +419,115 @@ class Config:
             log_file_path=os.getenv("LOG_FILE_PATH", "logs/chatbot.log")
         )
         
+        # Startup configuration
+        self.startup = StartupConfig(
+            warm_up=os.getenv("STARTUP_WARM_UP", "true").lower() == "true",
+            preopen_connections=os.getenv("STARTUP_PREOPEN_CONNECTIONS", "true").lower() == "true",
+            prime_cache=os.getenv("STARTUP_PRIME_CACHE", "false").lower() == "true"
+        )
+        
+        # Inventory export configuration
+        self.inventory = InventoryConfig(
+            sqlite_path=os.getenv("INVENTORY_DB_PATH", "data/inventory.db"),
+            parquet_dir=os.getenv("INVENTORY_PARQUET_DIR"),
+            max_workers=int(os.getenv("INVENTORY_MAX_WORKERS", "8")),
+            batch_size=int(os.getenv("INVENTORY_BATCH_SIZE", "500")),
+            max_rows=int(os.getenv("INVENTORY_MAX_ROWS", "200")),
+            query_timeout=float(os.getenv("INVENTORY_QUERY_TIMEOUT", "2.0"))
+        )
+        
+        # Prefetch configuration (takes effect when caching is enabled)
+        self.prefetch = PrefetchConfig(
+            enabled=os.getenv("ENABLE_PREFETCH", "true").lower() == "true",
+            max_workers=int(os.getenv("PREFETCH_MAX_WORKERS", "2")),
+            max_per_trigger=int(os.getenv("PREFETCH_MAX_PER_TRIGGER", "3")),
+            calls_per_minute=int(os.getenv("PREFETCH_CALLS_PER_MINUTE", "120"))
+        )
+        
+        # Speculative read configuration
+        self.speculation = SpeculationConfig(
+            enabled=os.getenv("ENABLE_SPECULATION", "true").lower() == "true",
+            max_workers=int(os.getenv("SPECULATION_MAX_WORKERS", "4")),
+            max_calls=int(os.getenv("SPECULATION_MAX_CALLS", "2")),
+            wait_timeout=float(os.getenv("SPECULATION_WAIT_TIMEOUT", "30"))
+        )
+        
+        # Semantic intent cache configuration
+        self.intent_cache = IntentCacheConfig(
+            enabled=os.getenv("ENABLE_INTENT_CACHE", "true").lower() == "true",
+            threshold=float(os.getenv("INTENT_CACHE_THRESHOLD", "0.8")),
+            max_entries=int(os.getenv("INTENT_CACHE_MAX_ENTRIES", "2000"))
+        )
+        
+        # LLM call scheduling (LLM_SCHEDULER_LOCK_DIR shares the limit across workers)
+        self.llm_scheduler = LLMSchedulerConfig(
+            enabled=os.getenv("ENABLE_LLM_SCHEDULER", "true").lower() == "true",
+            max_in_flight=int(os.getenv("LLM_MAX_IN_FLIGHT", "8")),
+            max_queue=int(os.getenv("LLM_MAX_QUEUE", "64")),
+            queue_timeout=float(os.getenv("LLM_QUEUE_TIMEOUT", "10")),
+            max_retries=int(os.getenv("LLM_MAX_RETRIES", "3")),
+            lock_dir=os.getenv("LLM_SCHEDULER_LOCK_DIR")
+        )
+        
+        # Background jobs (JOBS_DB_PATH should be shared by all workers)
+        self.jobs = JobsConfig(
+            db_path=os.getenv("JOBS_DB_PATH", "data/jobs.db"),
+            max_workers=int(os.getenv("JOBS_MAX_WORKERS", "2")),
+            max_queued=int(os.getenv("JOBS_MAX_QUEUED", "100")),
+            bulk_workers=int(os.getenv("JOBS_BULK_WORKERS", "4")),
+            checkpoint_batch=int(os.getenv("JOBS_CHECKPOINT_BATCH", "200"))
+        )
+        
+        # Audit trail (AUDIT_SINK=sqlite with a shared AUDIT_PATH for several workers)
+        audit_sink = os.getenv("AUDIT_SINK", "jsonl").lower()
+        self.audit = AuditConfig(
+            enabled=os.getenv("ENABLE_AUDIT_LOG", "true").lower() == "true",
+            sink=audit_sink,
+            path=os.getenv("AUDIT_PATH", "data/audit.db" if audit_sink == "sqlite" else "logs/audit-{pid}.jsonl"),
+            max_queue=int(os.getenv("AUDIT_MAX_QUEUE", "10000")),
+            batch_size=int(os.getenv("AUDIT_BATCH_SIZE", "500")),
+            flush_interval=float(os.getenv("AUDIT_FLUSH_INTERVAL", "1.0")),
+            max_bytes=int(os.getenv("AUDIT_MAX_BYTES", str(50 * 1024 * 1024))),
+            backups=int(os.getenv("AUDIT_BACKUPS", "5"))
+        )
+        
+        # Conversation memory configuration
+        self.conversation = ConversationConfig(
+            enabled=os.getenv("ENABLE_CONVERSATION_MEMORY", "true").lower() == "true",
+            max_sessions=int(os.getenv("CONVERSATION_MAX_SESSIONS", "1000")),
+            ttl_seconds=int(os.getenv("CONVERSATION_TTL_SECONDS", "3600")),
+            max_recent=int(os.getenv("CONVERSATION_MAX_RECENT", "5")),
+            max_context_chars=int(os.getenv("CONVERSATION_MAX_CONTEXT_CHARS", "600")),
+            store_path=os.getenv("CONVERSATION_STORE_PATH", "data/conversations.db") or None
+        )
+        
+        # Profiling configuration
+        self.profiling = ProfilingConfig(
+            enabled=os.getenv("ENABLE_PROFILING", "false").lower() == "true",
+            sample_rate=float(os.getenv("PROFILING_SAMPLE_RATE", "0")),
+            header=os.getenv("PROFILING_HEADER", "X-Profile"),
+            mode=os.getenv("PROFILING_MODE", "sampling").lower(),
+            interval_ms=float(os.getenv("PROFILING_INTERVAL_MS", "5")),
+            max_profiles=int(os.getenv("PROFILING_MAX_PROFILES", "50")),
+            directory=os.getenv("PROFILING_DIR")
+        )
+        
+        # Tracing configuration
+        self.tracing = TracingConfig(
+            enabled=os.getenv("ENABLE_TRACING", "false").lower() == "true",
+            service_name=os.getenv("TRACING_SERVICE_NAME", "unity-catalog-chatbot"),
+            exporter=os.getenv("TRACING_EXPORTER", "file").lower(),
+            file_path=os.getenv("TRACING_FILE_PATH", "logs/traces.jsonl"),
+            collector_url=os.getenv("TRACING_COLLECTOR_URL", "http://localhost:4318/v1/traces")
+        )
+        
         # Feature flags
         self.features = {
             'sql_execution': os.getenv("ENABLE_SQL_EXECUTION", "false").lower() == "true",
             'batch_operations': os.getenv("ENABLE_BATCH_OPS", "true").lower() == "true",
-            'audit_logging': os.getenv("ENABLE_AUDIT_LOG", "true").lower() == "true",
+            'audit_logging': self.audit.enabled,
             'caching': os.getenv("ENABLE_CACHING", "false").lower() == "true",
+            'entity_resolution': os.getenv("ENABLE_ENTITY_RESOLUTION", "true").lower() == "true",
         }
         
         # Cache configuration (if enabled)
@@ -206,6 +568,16 @@ class Config:
             self.server.validate()
             self.security.validate()
             self.logging.validate()
+            self.inventory.validate()
+            self.prefetch.validate()
+            self.speculation.validate()
+            self.intent_cache.validate()
+            self.llm_scheduler.validate()
+            self.jobs.validate()
+            self.audit.validate(self.server.workers)
+            self.conversation.validate(self.server.workers)
+            self.profiling.validate()
+            self.tracing.validate()
             return True
         except ValueError as e:
             raise ValueError(f"Configuration validation failed: {str(e)}")
@@ -230,12 +602,71 @@ class Config:
                 'port': self.server.port,
                 'debug': self.server.debug,
                 'workers': self.server.workers,
-                'timeout': self.server.timeout
+                'timeout': self.server.timeout,
+                'worker_class': self.server.worker_class,
+                'threads': self.server.threads,
+                'keepalive': self.server.keepalive,
+                'preload': self.server.preload,
+                'compression_min_bytes': self.server.compression_min_bytes
             },
             'security': {
                 'enable_auth': self.security.enable_auth,
                 'rate_limit_per_minute': self.security.rate_limit_per_minute,
-                'enable_cors': self.security.enable_cors
+                'enable_cors': self.security.enable_cors,
+                'admin_endpoints': bool(self.security.admin_token),
+                'trusted_proxy_hops': self.security.trusted_proxy_hops
+            },
+            'startup': {
+                'warm_up': self.startup.warm_up,
+                'preopen_connections': self.startup.preopen_connections,
+                'prime_cache': self.startup.prime_cache
+            },
+            'inventory': {
+                'sqlite_path': self.inventory.sqlite_path,
+                'parquet_dir': self.inventory.parquet_dir,
+                'query_timeout': self.inventory.query_timeout
+            },
+            'prefetch': {
+                'enabled': self.prefetch.enabled,
+                'max_workers': self.prefetch.max_workers,
+                'calls_per_minute': self.prefetch.calls_per_minute
+            },
+            'speculation': {
+                'enabled': self.speculation.enabled,
+                'max_calls': self.speculation.max_calls
+            },
+            'intent_cache': {
+                'enabled': self.intent_cache.enabled,
+                'threshold': self.intent_cache.threshold
+            },
+            'llm_scheduler': {
+                'enabled': self.llm_scheduler.enabled,
+                'max_in_flight': self.llm_scheduler.max_in_flight,
+                'shared': bool(self.llm_scheduler.lock_dir)
+            },
+            'jobs': {
+                'db_path': self.jobs.db_path,
+                'max_workers': self.jobs.max_workers,
+                'bulk_workers': self.jobs.bulk_workers
+            },
+            'audit': {
+                'enabled': self.audit.enabled,
+                'sink': self.audit.sink,
+                'path': self.audit.path
+            },
+            'conversation': {
+                'enabled': self.conversation.enabled,
+                'max_recent': self.conversation.max_recent,
+                'shared_store': bool(self.conversation.store_path)
+            },
+            'profiling': {
+                'enabled': self.profiling.enabled,
+                'sample_rate': self.profiling.sample_rate,
+                'mode': self.profiling.mode
+            },
+            'tracing': {
+                'enabled': self.tracing.enabled,
+                'exporter': self.tracing.exporter
             },
             'features': self.features
         }
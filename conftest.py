@@ -7,6 +7,8 @@ from unittest.mock import MagicMock
 import pytest
 
 import app as app_module
+from conversation import ConversationStore
+from semantic_cache import SemanticIntentCache
 import unity_catalog_service as uc_module
 
 
@@ -91,5 +93,29 @@ def patch_app_init(monkeypatch, uc_service, claude_client_mock):
         return uc_service, claude_client_mock
     
     monkeypatch.setattr(app_module, "_init_services", mock_init_services)
+    # Parses cached by one test must not answer another test's mocked LLM
+    monkeypatch.setattr(app_module, "intent_cache", SemanticIntentCache())
     yield
 
+
+
+@pytest.fixture(autouse=True)
+def isolated_jobs(monkeypatch, tmp_path):
+    """Background jobs use a per-test database instead of data/jobs.db."""
+    monkeypatch.setattr(app_module.config.jobs, "db_path", str(tmp_path / "jobs.db"))
+    monkeypatch.setattr(app_module, "job_manager", None)
+    yield
+
+
+@pytest.fixture(autouse=True)
+def isolated_conversations(monkeypatch, tmp_path):
+    """Chat sessions use a per-test database instead of data/conversations.db."""
+    monkeypatch.setattr(app_module, "conversations", ConversationStore(path=str(tmp_path / "conversations.db")))
+    yield
+
+
+@pytest.fixture(autouse=True)
+def no_audit(monkeypatch):
+    """Audit records are only written by tests that install their own AuditLog."""
+    monkeypatch.setattr(app_module, "audit_log", None)
+    yield
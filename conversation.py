@@ -0,0 +1,219 @@
+"""
+Conversation Memory
+Per-session state of recently resolved objects and intents, rendered as a short, size-bounded
+context block so follow-up requests ("now grant it to analysts too") parse in one LLM call
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+
+from securables import ObjectPath, parse_object_path, qualify
+
+# Intents whose target is the `object` parameter
+OBJECT_INTENTS = ("grantPermission", "revokePermission", "showPermissions", "setOwner")
+
+MAX_VALUE_CHARS = 128
+
+
+def _clip(value) -> Optional[str]:
+    if value is None or value == "":
+        return None
+    return str(value)[:MAX_VALUE_CHARS]
+
+
+@dataclass
+class ConversationState:
+    """What one session has been talking about, in resolved form"""
+    session_id: str
+    catalog: Optional[str] = None
+    schema: Optional[str] = None
+    object: Optional[str] = None
+    object_type: Optional[str] = None
+    principal: Optional[str] = None
+    privilege: Optional[str] = None
+    recent: List[List] = field(default_factory=list)
+    updated_at: float = field(default_factory=time.time)
+
+    def record(self, intent_data: Dict, result: Dict, max_recent: int = 5) -> None:
+        """Fold one executed intent into the state"""
+        intent = intent_data.get("intent")
+        params = intent_data.get("params") or {}
+        succeeded = bool(result.get("success"))
+
+        target = self._target(intent, params)
+        if succeeded and target is not None:
+            self.catalog = target.catalog
+            if target.schema:
+                self.schema = f"{target.catalog}.{target.schema}"
+            elif self.schema and not self.schema.startswith(f"{target.catalog}."):
+                self.schema = None
+            self.object = target.full_name
+            self.object_type = params.get("securable_type") or target.securable_type
+        if succeeded:
+            self.principal = _clip(params.get("principal") or params.get("owner")) or self.principal
+            self.privilege = _clip(params.get("privilege")) or self.privilege
+
+        if intent and intent != "help":
+            self.recent.append([intent, _clip(target.full_name) if target else None, succeeded])
+            del self.recent[:-max_recent]
+        self.updated_at = time.time()
+
+    def fill_missing(self, intent_data: Dict) -> Dict:
+        """Default an intent's missing target parameters from the session"""
+        intent = intent_data.get("intent")
+        params = intent_data.setdefault("params", {})
+        if intent in OBJECT_INTENTS and not params.get("object") and self.object:
+            params["object"] = self.object
+            if self.object_type and self.object_type not in ("CATALOG", "SCHEMA", "TABLE"):
+                params.setdefault("securable_type", self.object_type)
+        elif intent == "listSchemas" and not params.get("catalog") and self.catalog:
+            params["catalog"] = self.catalog
+        elif intent == "listTables" and not params.get("schema") and self.schema:
+            catalog, schema = self.schema.split(".", 1)
+            params.setdefault("catalog", catalog)
+            params["schema"] = schema
+        return intent_data
+
+    def render(self, max_chars: int = 600) -> str:
+        """Compact context block for the system prompt ('' for a fresh session)"""
+        lines = []
+        if self.object:
+            lines.append(f"- current object: {self.object} ({self.object_type})")
+        if self.catalog:
+            lines.append(f"- current catalog: {self.catalog}")
+        if self.schema:
+            lines.append(f"- current schema: {self.schema}")
+        if self.principal:
+            lines.append(f"- last principal: {self.principal}")
+        if self.privilege:
+            lines.append(f"- last privilege: {self.privilege}")
+        if self.recent:
+            steps = "; ".join(
+                f"{intent} {target or ''}".strip() + ("" if ok else " (failed)")
+                for intent, target, ok in self.recent
+            )
+            lines.append(f"- recent: {steps}")
+        if not lines:
+            return ""
+        text = ("Conversation context (resolve 'it', 'that', 'there' and omitted names "
+                "against these; put the resolved full names in params):\n" + "\n".join(lines))
+        return text[:max_chars]
+
+    @staticmethod
+    def _target(intent: str, params: Dict) -> Optional[ObjectPath]:
+        try:
+            if intent in OBJECT_INTENTS:
+                return parse_object_path(params.get("object"))
+            if intent == "createTable":
+                return qualify(params.get("table"), params.get("catalog"), params.get("schema"))
+            if intent == "getTableDetails":
+                return parse_object_path(params.get("table"))
+            if intent in ("createSchema", "listTables"):
+                return qualify(params.get("schema"), params.get("catalog"), depth=2)
+            if intent in ("createCatalog", "listSchemas"):
+                return qualify(params.get("catalog"), depth=1)
+        except ValueError:
+            pass
+        return None
+
+
+class ConversationStore:
+    """
+    Bounded map of session ID -> ConversationState with idle expiry.
+
+    With `path` set (the configured default), states live in a SQLite file so
+    every gunicorn worker on the host sees the same conversation; without it
+    they stay in this process's memory, which only suits a single worker.
+    """
+
+    def __init__(self, max_sessions: int = 1000, ttl: float = 3600, max_recent: int = 5,
+                 max_context_chars: int = 600, path: str = None):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.max_recent = max_recent
+        self.max_context_chars = max_context_chars
+        self.path = path
+        self._sessions: "OrderedDict[str, ConversationState]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @classmethod
+    def from_config(cls, conversation_config) -> "ConversationStore":
+        return cls(
+            max_sessions=conversation_config.max_sessions,
+            ttl=conversation_config.ttl_seconds,
+            max_recent=conversation_config.max_recent,
+            max_context_chars=conversation_config.max_context_chars,
+            path=conversation_config.store_path,
+        )
+
+    @staticmethod
+    def new_session_id() -> str:
+        return uuid.uuid4().hex
+
+    def get(self, session_id: str) -> ConversationState:
+        """State for `session_id`; a fresh one if unknown or expired"""
+        if self.path:
+            row = self._db().execute(
+                "SELECT state FROM sessions WHERE id = ? AND updated_at > ?",
+                (session_id, time.time() - self.ttl),
+            ).fetchone()
+            return ConversationState(**json.loads(row[0])) if row else ConversationState(session_id)
+
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is None or time.time() - state.updated_at > self.ttl:
+                return ConversationState(session_id)
+            self._sessions.move_to_end(session_id)
+            return state
+
+    def save(self, state: ConversationState) -> None:
+        if self.path:
+            db = self._db()
+            db.execute(
+                "INSERT OR REPLACE INTO sessions (id, state, updated_at) VALUES (?, ?, ?)",
+                (state.session_id, json.dumps(asdict(state)), state.updated_at),
+            )
+            db.execute(
+                "DELETE FROM sessions WHERE id NOT IN "
+                "(SELECT id FROM sessions ORDER BY updated_at DESC LIMIT ?) OR updated_at < ?",
+                (self.max_sessions, time.time() - self.ttl),
+            )
+            return
+
+        with self._lock:
+            self._sessions[state.session_id] = state
+            self._sessions.move_to_end(state.session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def record(self, session_id: str, intent_data: Dict, result: Dict) -> ConversationState:
+        state = self.get(session_id)
+        state.record(intent_data, result, self.max_recent)
+        self.save(state)
+        return state
+
+    def context(self, state: ConversationState) -> str:
+        return state.render(self.max_context_chars)
+
+    def _db(self) -> sqlite3.Connection:
+        # Opened on first use per thread and process: the store is built before gunicorn
+        # forks, and a SQLite connection must not be used across fork()
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, state TEXT, updated_at REAL)")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
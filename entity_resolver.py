@@ -0,0 +1,248 @@
+"""
+Entity Resolution
+Corrects misspelled or abbreviated catalog/schema/table references in parsed intents
+against the names already known from metadata listings, before any SDK call is made
+"""
+
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from securables import ObjectPath, parse_object_path, qualify
+
+# A correction is applied automatically above this score...
+ACCEPT_SCORE = 0.72
+# ...when the runner-up trails by at least this much; otherwise candidates are suggested
+ACCEPT_MARGIN = 0.1
+# A lower bar applies when no other name is even worth suggesting
+SOLE_MATCH_SCORE = 0.6
+SUGGEST_SCORE = 0.45
+MAX_SUGGESTIONS = 5
+
+# Intents whose last path part names an object that does not exist yet
+CREATE_INTENTS = ("createCatalog", "createSchema", "createTable")
+# Only reads are corrected silently; a write to a fuzzy match asks the user to confirm the name
+READ_INTENTS = ("listCatalogs", "listSchemas", "listTables", "getTableDetails", "showPermissions",
+                "findColumns")
+
+# Listing key and result field holding the names at each path depth
+LEVELS = {
+    1: (lambda path: ('catalogs',), 'catalogs'),
+    2: (lambda path: ('schemas', path[0]), 'schemas'),
+    3: (lambda path: ('tables', path[0], path[1]), 'tables'),
+}
+
+
+def _ngrams(text: str, n: int = 3) -> set:
+    padded = f"{'$' * (n - 1)}{text}$"
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+def _edit_distance(a: str, b: str) -> int:
+    """Optimal string alignment distance (Levenshtein plus adjacent transpositions)"""
+    previous2, previous = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            cost = ca != cb
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+def _is_abbreviation(query: str, name: str) -> bool:
+    if not query or query[0] != name[0]:
+        return False
+    remaining = iter(name)
+    return all(char in remaining for char in query)
+
+
+class NameIndex:
+    """Trigram inverted index over one level's names, ranked by n-gram overlap and edit distance"""
+
+    def __init__(self, names: Sequence[str]):
+        self.names = {name.lower(): name for name in names if name}
+        self._postings: Dict[str, set] = {}
+        for key in self.names:
+            for gram in _ngrams(key):
+                self._postings.setdefault(gram, set()).add(key)
+
+    def __contains__(self, name: str) -> bool:
+        return name.lower() in self.names
+
+    def exact(self, name: str) -> Optional[str]:
+        return self.names.get(name.lower())
+
+    def match(self, query: str, limit: int = MAX_SUGGESTIONS) -> List[Tuple[str, float]]:
+        """Best (name, score) candidates for `query`, highest score first"""
+        query = query.lower()
+        grams = _ngrams(query)
+        candidates = set()
+        for gram in grams:
+            candidates |= self._postings.get(gram, set())
+        # Very short or heavily abbreviated names can share no trigram at all
+        if not candidates and len(self.names) <= 200:
+            candidates = set(self.names)
+
+        scored = []
+        for key in candidates:
+            key_grams = _ngrams(key)
+            dice = 2 * len(grams & key_grams) / (len(grams) + len(key_grams))
+            edit = 1 - _edit_distance(query, key) / max(len(query), len(key))
+            # Abbreviations keep the first letter and the order of the rest ("slvr", "sls_data")
+            bonus = 1.0 if key.startswith(query) or _is_abbreviation(query, key) else 0.0
+            score = 0.75 * max(edit, dice) + 0.25 * bonus
+            scored.append((self.names[key], round(score, 3)))
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        return scored[:limit]
+
+
+@dataclass
+class Resolution:
+    """Outcome of resolving one intent's object references"""
+    intent_data: Dict
+    corrections: List[Dict] = field(default_factory=list)
+    suggestions: List[Dict] = field(default_factory=list)
+
+    @property
+    def ambiguous(self) -> bool:
+        return bool(self.suggestions)
+
+    def clarification(self) -> Dict:
+        """Chat result asking the user to pick one of the ranked suggestions"""
+        names = ", ".join(f"'{s['name']}'" for s in self.suggestions)
+        return {
+            'success': False,
+            'message': f"I couldn't find '{self.suggestions[0]['query']}'. Did you mean {names}?",
+            'suggestions': self.suggestions,
+            'sql': None,
+        }
+
+
+class EntityResolver:
+    """
+    Resolves object references in parsed params against cached listings.
+
+    Names come from the service's MetadataCache (fresh or not). When a level
+    has never been listed and `fetch_missing` is set, the listing is fetched
+    once through the service, which also caches it for later requests.
+    Misspelled names are corrected in place for read intents only; for
+    grants, revokes, ownership changes and creates every fuzzy match is
+    returned as a suggestion instead.
+    """
+
+    def __init__(self, uc_service, fetch_missing: bool = True):
+        self.uc_service = uc_service
+        self.fetch_missing = fetch_missing
+        self._indexes: Dict[tuple, Tuple[int, NameIndex]] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, intent_data: Dict) -> Resolution:
+        intent = intent_data.get("intent")
+        params = intent_data.get("params") or {}
+        path, write_back = self._reference(intent, params)
+        if path is None:
+            return Resolution(intent_data)
+
+        parts = [part for part in (path.catalog, path.schema, path.table) if part]
+        # Objects being created are new; only their parents must exist
+        checked = len(parts) - 1 if intent in CREATE_INTENTS else len(parts)
+        resolution = Resolution(intent_data)
+
+        for depth in range(1, checked + 1):
+            index, fetched = self._index(depth, parts)
+            if index is None:
+                break
+            query = parts[depth - 1]
+            exact = index.exact(query)
+            if exact is None and not fetched and self.fetch_missing and not self._is_fresh(depth, parts):
+                # A stale listing may predate the object; re-list before correcting it
+                index = self._index(depth, parts, refresh=True)[0] or index
+                exact = index.exact(query)
+            if exact is not None:
+                parts[depth - 1] = exact
+                continue
+
+            ranked = index.match(query)
+            if not ranked or ranked[0][1] < SUGGEST_SCORE:
+                break
+            runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+            best = ranked[0][1]
+            confident = (best >= ACCEPT_SCORE and best - runner_up >= ACCEPT_MARGIN) or \
+                (best >= SOLE_MATCH_SCORE and runner_up < SUGGEST_SCORE)
+            if confident and intent in READ_INTENTS:
+                parts[depth - 1] = ranked[0][0]
+                resolution.corrections.append({'from': query, 'to': ranked[0][0], 'score': best})
+                continue
+
+            prefix = ".".join(parts[:depth - 1])
+            resolution.suggestions = [
+                {
+                    'query': ".".join(filter(None, (prefix, query))),
+                    'name': ".".join(filter(None, (prefix, name))),
+                    'score': score,
+                }
+                for name, score in ranked if score >= SUGGEST_SCORE
+            ]
+            return resolution
+
+        if resolution.corrections:
+            write_back(ObjectPath(*parts))
+        return resolution
+
+    def _index(self, depth: int, parts: List[str], refresh: bool = False) -> Tuple[Optional[NameIndex], bool]:
+        """Name index for one level, and whether its listing was fetched just now"""
+        key_for, field_name = LEVELS[depth]
+        key = key_for(parts)
+        listing = None if refresh else self.uc_service.cache.peek(key)
+        fetched = False
+        if listing is None and self.fetch_missing:
+            fetch = {
+                1: lambda: self.uc_service.list_catalogs(),
+                2: lambda: self.uc_service.list_schemas(parts[0]),
+                3: lambda: self.uc_service.list_tables(parts[0], parts[1]),
+            }[depth]
+            result = fetch()
+            if result.get('success'):
+                # Index the cached object itself so later peeks reuse this index
+                listing, fetched = self.uc_service.cache.peek(key) or result, True
+        if listing is None:
+            return None, False
+
+        with self._lock:
+            cached = self._indexes.get(key)
+            if cached is None or cached[0] != id(listing):
+                index = NameIndex([item['name'] for item in listing.get(field_name, [])])
+                cached = self._indexes[key] = (id(listing), index)
+            return cached[1], fetched
+
+    def _is_fresh(self, depth: int, parts: List[str]) -> bool:
+        return self.uc_service.cache.get(LEVELS[depth][0](parts)) is not None
+
+    @staticmethod
+    def _reference(intent: str, params: Dict):
+        """The object path an intent refers to, and how to write a corrected one back"""
+        try:
+            if intent in ("grantPermission", "revokePermission", "showPermissions", "setOwner"):
+                if (params.get("securable_type") or "").upper() not in ("", "CATALOG", "SCHEMA", "TABLE"):
+                    return None, None
+                return parse_object_path(params.get("object")), \
+                    lambda path: params.__setitem__("object", path.full_name)
+            if intent == "getTableDetails":
+                return parse_object_path(params.get("table")), \
+                    lambda path: params.__setitem__("table", path.full_name)
+            if intent in ("createTable", "listTables", "createSchema", "listSchemas"):
+                depth = 3 if intent == "createTable" else 2 if intent in ("listTables", "createSchema") else 1
+                leaf = {3: "table", 2: "schema", 1: "catalog"}[depth]
+                path = qualify(params.get(leaf), params.get("catalog"), params.get("schema"), depth=depth)
+
+                return path, lambda path: params.update(path.as_dict())
+            if intent == "findColumns" and params.get("catalog"):
+                depth = 2 if params.get("schema") else 1
+                path = qualify(params.get("schema") or params["catalog"], params["catalog"], depth=depth)
+                return path, lambda path: params.update(path.as_dict())
+        except ValueError:
+            pass
+        return None, None
@@ -0,0 +1,341 @@
+"""
+Intent Parsing Evaluation
+Runs every sample in sample_queries.json, plus generated paraphrases, through the full parse
+pipeline (intent cache, LLM scheduler, model client, JSON extraction) against a local stubbed or
+replayed model, and reports per-category accuracy, latency percentiles, token counts and cache
+hit rates; exits non-zero when results fall below thresholds or regress from a baseline run
+
+Usage:
+    python evaluate_parser.py --paraphrases 4
+    python evaluate_parser.py --cassette cassettes/session.jsonl.gz --paraphrases 0
+    python evaluate_parser.py --compare benchmark_results/<baseline>.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from load_test import percentile
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+SAMPLES_PATH = os.path.join(ROOT, "sample_queries.json")
+
+# Parameters whose values are object or principal names (renamed in paraphrases)
+IDENTIFIER_PARAMS = ("catalog", "schema", "table", "object", "principal", "owner", "column", "name")
+
+# Rewordings applied to a sample query, as users type them
+STYLES: List[Callable[[str], str]] = [
+    lambda text: text,
+    lambda text: f"Please {text[0].lower()}{text[1:]}",
+    lambda text: f"{text}, thanks",
+    lambda text: text.lower(),
+    lambda text: f"Could you {text[0].lower()}{text[1:].rstrip('?')}?",
+]
+
+
+@dataclass
+class Case:
+    """One message to parse and the parse it should produce"""
+    category: str
+    message: str
+    expected: Dict
+    variant: str = "original"
+
+
+# ==================== CASES ====================
+
+def _identifiers(params: Any) -> List[str]:
+    """Names in identifier parameters, dotted paths split into their parts"""
+    names: List[str] = []
+    if isinstance(params, dict):
+        for key, value in params.items():
+            if key in IDENTIFIER_PARAMS and isinstance(value, str):
+                names.extend(part for part in value.split(".") if part)
+            else:
+                names.extend(_identifiers(value))
+    elif isinstance(params, list):
+        for item in params:
+            names.extend(_identifiers(item))
+    return names
+
+
+def _rename(value: Any, mapping: Dict[str, str]) -> Any:
+    if isinstance(value, dict):
+        return {key: _rename(item, mapping) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_rename(item, mapping) for item in value]
+    if isinstance(value, str) and mapping:
+        pattern = r"\b(" + "|".join(re.escape(name) for name in mapping) + r")\b"
+        return re.sub(pattern, lambda match: mapping[match.group(1)], value)
+    return value
+
+
+def paraphrase(message: str, expected: Dict, count: int) -> List[Tuple[str, Dict]]:
+    """
+    `count` rewordings of a message, each with its identifiers renamed
+    (sales_data -> sales_data_2) and the expected parse renamed to match
+    """
+    names = sorted(set(_identifiers(expected.get("params"))), key=len, reverse=True)
+    variants = []
+    for i in range(1, count + 1):
+        mapping = {name: f"{name}_{i}" for name in names}
+        style = STYLES[i % len(STYLES)]
+        variants.append((style(_rename(message, mapping)), _rename(expected, mapping)))
+    return variants
+
+
+def load_cases(paraphrases: int = 4, path: str = SAMPLES_PATH) -> List[Case]:
+    """Labelled sample queries followed by their paraphrases"""
+    with open(path) as fh:
+        samples = [sample for sample in json.load(fh)["sample_queries"] if sample.get("expected")]
+    cases = [Case(sample["category"], sample["query"], sample["expected"]) for sample in samples]
+    for sample in samples:
+        cases.extend(Case(sample["category"], message, expected, "paraphrase")
+                     for message, expected in paraphrase(sample["query"], sample["expected"], paraphrases))
+    return cases
+
+
+# ==================== SCORING ====================
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: _normalize(item) for key, item in value.items() if item not in (None, "", [])}
+    if isinstance(value, list):
+        return [_normalize(item) for item in value]
+    if isinstance(value, str):
+        return value.strip().strip("`").lower().replace(" ", "_")
+    return value
+
+
+def score(parsed: Dict, expected: Dict) -> Tuple[bool, bool]:
+    """Whether the intent is right, and whether every expected parameter is too"""
+    if parsed.get("intent") != expected["intent"]:
+        return False, False
+    params = _normalize(parsed.get("params") or {})
+    return True, all(params.get(key) == value for key, value in _normalize(expected.get("params", {})).items())
+
+
+class UsageMeter:
+    """Wraps a model client and counts calls, failures and tokens of messages.create"""
+
+    def __init__(self, client):
+        self.client = client
+        self.calls = 0
+        self.errors = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.messages = self
+        self._lock = threading.Lock()
+
+    def create(self, **kwargs):
+        try:
+            response = self.client.messages.create(**kwargs)
+        except Exception:
+            with self._lock:
+                self.calls += 1
+                self.errors += 1
+            raise
+        usage = getattr(response, "usage", None)
+        with self._lock:
+            self.calls += 1
+            self.input_tokens += getattr(usage, "input_tokens", 0) or 0
+            self.output_tokens += getattr(usage, "output_tokens", 0) or 0
+        return response
+
+    def snapshot(self) -> Tuple[int, int, int, int]:
+        with self._lock:
+            return self.calls, self.errors, self.input_tokens, self.output_tokens
+
+
+# ==================== EVALUATION ====================
+
+def evaluate(cases: List[Case], parse: Callable[[str], Dict], meter: UsageMeter = None,
+             intent_cache=None) -> Dict:
+    """
+    Parse every case in order and score it.
+
+    Returns {'results': rows per category, per variant and overall (in the
+    benchmark results format), 'failures': the cases parsed wrongly}.
+    """
+    outcomes = []
+    failures = []
+    for case in cases:
+        before = meter.snapshot() if meter is not None else (0, 0, 0, 0)
+        hits = intent_cache.stats['hits'] if intent_cache is not None else 0
+        started = time.perf_counter()
+        parsed = parse(case.message)
+        elapsed = time.perf_counter() - started
+        after = meter.snapshot() if meter is not None else (0, 0, 0, 0)
+        intent_ok, params_ok = score(parsed, case.expected)
+        outcomes.append({
+            "case": case,
+            "intent_ok": intent_ok,
+            "params_ok": params_ok,
+            "seconds": elapsed,
+            "usage": [b - a for a, b in zip(before, after)],
+            "cache_hit": intent_cache is not None and intent_cache.stats['hits'] > hits,
+        })
+        if not params_ok:
+            failures.append({"category": case.category, "variant": case.variant, "message": case.message,
+                             "expected": case.expected, "parsed": {key: parsed.get(key) for key in ("intent", "params")}})
+
+    groups: Dict[str, List[Dict]] = {}
+    for outcome in outcomes:
+        groups.setdefault(outcome["case"].category, []).append(outcome)
+    groups["variant:original"] = [o for o in outcomes if o["case"].variant == "original"]
+    groups["variant:paraphrase"] = [o for o in outcomes if o["case"].variant == "paraphrase"]
+    groups["all"] = outcomes
+    return {"results": [_row(name, group) for name, group in groups.items() if group], "failures": failures}
+
+
+def _row(scenario: str, outcomes: List[Dict]) -> Dict:
+    n = len(outcomes)
+    seconds = [o["seconds"] for o in outcomes]
+    calls, errors, input_tokens, output_tokens = (sum(o["usage"][i] for o in outcomes) for i in range(4))
+    return {
+        "suite": "parser",
+        "scenario": scenario,
+        "concurrency": 1,
+        "requests": n,
+        "intent_accuracy": round(sum(o["intent_ok"] for o in outcomes) / n, 3),
+        "params_accuracy": round(sum(o["params_ok"] for o in outcomes) / n, 3),
+        "p50_ms": round(percentile(seconds, 50) * 1000, 2),
+        "p95_ms": round(percentile(seconds, 95) * 1000, 2),
+        "p99_ms": round(percentile(seconds, 99) * 1000, 2),
+        "llm_calls": calls,
+        "llm_errors": errors,
+        "input_tokens_per_query": round(input_tokens / n, 1),
+        "output_tokens_per_query": round(output_tokens / n, 1),
+        "cache_hit_rate": round(sum(o["cache_hit"] for o in outcomes) / n, 3),
+    }
+
+
+def check_thresholds(results: List[Dict], min_intent_accuracy: float, min_params_accuracy: float,
+                     max_p95_ms: float = None) -> List[str]:
+    """Overall results that miss an absolute threshold"""
+    overall = next(row for row in results if row["scenario"] == "all")
+    problems = []
+    if overall["intent_accuracy"] < min_intent_accuracy:
+        problems.append(f"intent accuracy {overall['intent_accuracy']:.1%} < {min_intent_accuracy:.1%}")
+    if overall["params_accuracy"] < min_params_accuracy:
+        problems.append(f"parameter accuracy {overall['params_accuracy']:.1%} < {min_params_accuracy:.1%}")
+    if max_p95_ms is not None and overall["p95_ms"] > max_p95_ms:
+        problems.append(f"p95 latency {overall['p95_ms']}ms > {max_p95_ms}ms")
+    return problems
+
+
+def compare(baseline: List[Dict], current: List[Dict], max_accuracy_drop: float,
+            max_regression: float) -> List[str]:
+    """
+    Regressions against a baseline run, per scenario: an accuracy drop of
+    more than `max_accuracy_drop` (absolute), or p95 latency or tokens per
+    query rising by more than `max_regression` (a fraction)
+    """
+    previous = {row["scenario"]: row for row in baseline if row.get("suite") == "parser"}
+    regressions = []
+    for row in current:
+        before = previous.get(row["scenario"])
+        if not before:
+            continue
+        for metric in ("intent_accuracy", "params_accuracy"):
+            drop = before[metric] - row[metric]
+            if drop > max_accuracy_drop:
+                regressions.append(f"{row['scenario']}: {metric} fell {before[metric]:.1%} -> {row[metric]:.1%}")
+        for metric in ("p95_ms", "input_tokens_per_query", "output_tokens_per_query"):
+            if before.get(metric) and (row[metric] - before[metric]) / before[metric] > max_regression:
+                regressions.append(f"{row['scenario']}: {metric} rose {before[metric]} -> {row[metric]}")
+    return regressions
+
+
+# ==================== CLI ====================
+
+def _pipeline(client, cache_threshold: Optional[float]):
+    """Wire the app's parse path to `client`; returns (parse, intent cache or None)"""
+    import app as app_module
+    from semantic_cache import SemanticIntentCache
+    from unity_catalog_service import UnityCatalogService
+
+    if app_module.uc_service is None:
+        app_module.uc_service = UnityCatalogService(workspace_url="https://eval.invalid", token="eval-token")
+    app_module.claude_client = client
+    app_module.intent_cache = SemanticIntentCache(cache_threshold) if cache_threshold is not None else None
+
+    def parse(message: str) -> Dict:
+        return app_module.parse_with_claude(message, priority="batch", user="evaluation")
+    return parse, app_module.intent_cache
+
+
+def main(argv: List[str] = None) -> int:
+    from benchmark import RESULTS_DIR, save_results
+
+    parser = argparse.ArgumentParser(description="Evaluate intent parsing accuracy and latency")
+    parser.add_argument("--paraphrases", type=int, default=4, help="Generated rewordings per sample")
+    parser.add_argument("--cassette", help="Replay the model from a recorded cassette instead of the stub")
+    parser.add_argument("--timing", type=float, default=0.0, help="Cassette timing scale (0 instant)")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Stub model latency (s)")
+    parser.add_argument("--intent-threshold", type=float, default=0.8,
+                        help="Intent cache similarity threshold")
+    parser.add_argument("--no-cache", action="store_true", help="Evaluate without the intent cache")
+    parser.add_argument("--min-intent-accuracy", type=float, default=0.9)
+    parser.add_argument("--min-params-accuracy", type=float, default=0.8)
+    parser.add_argument("--max-p95-ms", type=float, help="Fail when overall p95 parse latency exceeds this")
+    parser.add_argument("--compare", help="Baseline results file to compare against")
+    parser.add_argument("--max-accuracy-drop", type=float, default=0.02)
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    parser.add_argument("--output-dir", default=RESULTS_DIR)
+    parser.add_argument("--show-failures", action="store_true")
+    args = parser.parse_args(argv)
+
+    # One line per model request would bury the report
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    cases = load_cases(args.paraphrases)
+    server = None
+    if args.cassette:
+        from replay import Cassette, replay
+        model = replay(Cassette.load(args.cassette), "anthropic", args.timing)
+    else:
+        import anthropic
+        from fake_backends import FakeAnthropicServer, FaultProfile
+        server = FakeAnthropicServer(FaultProfile(latency=args.llm_latency)).start()
+        model = anthropic.Anthropic(api_key="eval-key", base_url=server.url, max_retries=0)
+
+    meter = UsageMeter(model)
+    parse, intent_cache = _pipeline(meter, None if args.no_cache else args.intent_threshold)
+    print(f"Evaluating {len(cases)} case(s) against the {'replayed' if args.cassette else 'stub'} model")
+    try:
+        report = evaluate(cases, parse, meter, intent_cache)
+    finally:
+        if server is not None:
+            server.stop()
+
+    for row in report["results"]:
+        print(f"  {row['scenario']:<24} n={row['requests']:<4} intent {row['intent_accuracy']:>6.1%}  "
+              f"params {row['params_accuracy']:>6.1%}  p50 {row['p50_ms']:>7}ms  p95 {row['p95_ms']:>7}ms  "
+              f"tokens {row['input_tokens_per_query']:>6}/{row['output_tokens_per_query']:<5}  "
+              f"cache {row['cache_hit_rate']:.0%}")
+    if args.show_failures:
+        for failure in report["failures"]:
+            print(f"    wrong: {failure['message']!r} -> {failure['parsed']}")
+    path = save_results(report["results"], args, args.output_dir)
+    print(f"Results written to {path}")
+
+    problems = check_thresholds(report["results"], args.min_intent_accuracy, args.min_params_accuracy,
+                                args.max_p95_ms)
+    if args.compare:
+        with open(args.compare) as fh:
+            baseline = json.load(fh)["results"]
+        problems += compare(baseline, report["results"], args.max_accuracy_drop, args.max_regression)
+    for problem in problems:
+        print(f"REGRESSION {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,591 @@
+"""
+Local Fake Backends for Benchmarks
+HTTP stand-ins for the Databricks Unity Catalog REST API and the Anthropic Messages API
+with configurable latency and error injection
+"""
+
+import abc
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlparse
+
+UC_PREFIX = "/api/2.1/unity-catalog"
+SQL_STATEMENTS_PATH = "/api/2.0/sql/statements"
+
+
+@dataclass
+class FaultProfile:
+    """Latency and error injection applied to every fake backend request"""
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 500
+    retry_after: int = 1
+
+    def delay(self) -> float:
+        """Seconds to sleep before answering one request"""
+        return max(0.0, self.latency + random.uniform(-self.jitter, self.jitter))
+
+    def should_fail(self) -> bool:
+        """Whether the current request gets an injected error"""
+        return self.error_rate > 0 and random.random() < self.error_rate
+
+
+# ==================== FAKE METADATA ====================
+
+class FakeWorkspace:
+    """In-memory Unity Catalog metastore with generated catalogs, schemas and tables"""
+
+    COLUMN_TYPES = ["BIGINT", "STRING", "TIMESTAMP", "DECIMAL", "DOUBLE", "BOOLEAN", "DATE", "INT"]
+
+    def __init__(self, catalogs: int = 3, schemas: int = 4, tables: int = 25, columns: int = 8,
+                 seed: int = 7):
+        self.lock = threading.Lock()
+        self.catalogs: Dict[str, Dict] = {}
+        self.schemas: Dict[str, Dict] = {}
+        self.tables: Dict[str, Dict] = {}
+        self.grants: Dict[Tuple[str, str], Dict[str, set]] = {}
+        self._generate(catalogs, schemas, tables, columns, random.Random(seed))
+
+    def _generate(self, n_catalogs, n_schemas, n_tables, n_columns, rng):
+        owners = ["data_engineering", "analytics_team", "admin@company.com", "ml_platform"]
+        layers = ["bronze", "silver", "gold", "staging", "raw", "curated"]
+        for c in range(n_catalogs):
+            catalog = "sales_data" if c == 0 else f"catalog_{c}"
+            self.add_catalog(catalog, owner=rng.choice(owners))
+            for s in range(n_schemas):
+                schema = layers[s] if s < len(layers) else f"schema_{s}"
+                self.add_schema(catalog, schema, owner=rng.choice(owners))
+                for t in range(n_tables):
+                    table = "raw_orders" if t == 0 else f"table_{t}"
+                    columns = [
+                        {"name": "customer_id" if i == 0 else f"col_{i}",
+                         "type_name": rng.choice(self.COLUMN_TYPES),
+                         "position": i}
+                        for i in range(n_columns)
+                    ]
+                    self.add_table(catalog, schema, table, columns, owner=rng.choice(owners))
+
+    def add_catalog(self, name: str, owner: str = "admin", comment: str = None) -> Dict:
+        info = {"name": name, "owner": owner, "comment": comment,
+                "created_at": int(time.time() * 1000), "properties": {}}
+        self.catalogs[name] = info
+        return info
+
+    def add_schema(self, catalog: str, name: str, owner: str = "admin", comment: str = None) -> Dict:
+        info = {"name": name, "catalog_name": catalog, "full_name": f"{catalog}.{name}",
+                "owner": owner, "comment": comment}
+        self.schemas[info["full_name"]] = info
+        return info
+
+    def add_table(self, catalog: str, schema: str, name: str, columns: List[Dict],
+                  owner: str = "admin", comment: str = None) -> Dict:
+        info = {"name": name, "catalog_name": catalog, "schema_name": schema,
+                "full_name": f"{catalog}.{schema}.{name}", "owner": owner,
+                "table_type": "MANAGED", "data_source_format": "DELTA",
+                "columns": columns, "comment": comment}
+        self.tables[info["full_name"]] = info
+        return info
+
+
+# ==================== HTTP PLUMBING ====================
+
+class FakeServer(abc.ABC):
+    """Threaded local HTTP server running in a background thread; subclasses implement `handle`"""
+
+    def __init__(self, faults: FaultProfile = None, host: str = "127.0.0.1", port: int = 0):
+        self.faults = faults or FaultProfile()
+        self.request_count = 0
+        self._count_lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @abc.abstractmethod
+    def handle(self, method: str, path: str, query: Dict, body: Dict) -> Tuple[int, Dict, Dict]:
+        """Return (status, payload, extra headers) for one request"""
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # One write per response; split header/body writes stall on delayed ACKs
+            wbufsize = 1 << 16
+
+            def _dispatch(self, method):
+                with server._count_lock:
+                    server.request_count += 1
+
+                parsed = urlparse(self.path)
+                query = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                body = json.loads(raw) if raw else {}
+
+                time.sleep(server.faults.delay())
+                if server.faults.should_fail():
+                    status = server.faults.error_status
+                    payload = {"error_code": "INJECTED_FAULT", "message": "Injected failure",
+                               "type": "error", "error": {"type": "injected", "message": "Injected failure"}}
+                    headers = {"retry-after": str(server.faults.retry_after)} if status == 429 else {}
+                else:
+                    status, payload, headers = server.handle(method, unquote(parsed.path), query, body)
+
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._dispatch("GET")
+
+            def do_POST(self):
+                self._dispatch("POST")
+
+            def do_PATCH(self):
+                self._dispatch("PATCH")
+
+            def do_DELETE(self):
+                self._dispatch("DELETE")
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def _not_found(what: str) -> Tuple[int, Dict, Dict]:
+    return 404, {"error_code": "NOT_FOUND", "message": f"{what} does not exist."}, {}
+
+
+def _already_exists(what: str) -> Tuple[int, Dict, Dict]:
+    return 409, {"error_code": "RESOURCE_ALREADY_EXISTS", "message": f"{what} already exists."}, {}
+
+
+# ==================== FAKE SQL WAREHOUSE ====================
+
+_IDENT = r"(?:`(?:[^`]|``)*`|[\w-]+)"
+_NAME = rf"{_IDENT}(?:\.{_IDENT})*"
+_SQL_PATTERNS = [
+    ("create", re.compile(rf"^CREATE\s+(CATALOG|SCHEMA|TABLE)\s+(IF\s+NOT\s+EXISTS\s+)?({_NAME})(.*)$",
+                          re.IGNORECASE | re.DOTALL)),
+    ("grant", re.compile(rf"^(GRANT|REVOKE)\s+(.+?)\s+ON\s+([A-Z ]+?)\s+({_NAME})\s+(?:TO|FROM)\s+({_IDENT})$",
+                         re.IGNORECASE | re.DOTALL)),
+    ("owner", re.compile(rf"^ALTER\s+([A-Z ]+?)\s+({_NAME})\s+OWNER\s+TO\s+({_IDENT})$",
+                         re.IGNORECASE | re.DOTALL)),
+]
+
+
+def _unquote(name: str) -> str:
+    return ".".join(part.strip("`").replace("``", "`") for part in re.findall(_IDENT, name))
+
+
+def split_sql_script(script: str) -> List[str]:
+    """Statements of a ';'-separated script, unwrapping one BEGIN ... END block"""
+    body = script.strip().rstrip(";").strip()
+    compound = re.match(r"(?is)^BEGIN\b(.*)\bEND$", body)
+    if compound:
+        body = compound.group(1)
+    statements, current, quote = [], [], None
+    for char in body:
+        if quote:
+            quote = None if char == quote and (not current or current[-1] != "\\") else quote
+        elif char in "'`":
+            quote = char
+        elif char == ";":
+            statements.append("".join(current).strip())
+            current = []
+            continue
+        current.append(char)
+    statements.append("".join(current).strip())
+    return [statement for statement in statements if statement]
+
+
+class FakeSqlExecutor:
+    """
+    Applies CREATE / GRANT / REVOKE / ALTER ... OWNER statements to a FakeWorkspace.
+
+    Scripts stop at the first failing statement, like a SQL script without an
+    exception handler; `statement_latency` simulates per-statement warehouse time.
+    """
+
+    def __init__(self, workspace: FakeWorkspace, statement_latency: float = 0.0):
+        self.workspace = workspace
+        self.statement_latency = statement_latency
+        self.scripts: List[str] = []
+        self.statements_run = 0
+
+    def execute(self, script: str) -> Dict:
+        self.scripts.append(script)
+        statement_id = uuid.uuid4().hex
+        for number, statement in enumerate(split_sql_script(script), 1):
+            time.sleep(self.statement_latency)
+            error = self._apply(statement)
+            self.statements_run += 1
+            if error:
+                return {'success': False, 'statement_id': statement_id, 'state': "FAILED",
+                        'message': f"[statement {number}] {error}"}
+        return {'success': True, 'statement_id': statement_id, 'state': "SUCCEEDED",
+                'message': "Statement succeeded"}
+
+    def _apply(self, statement: str) -> Optional[str]:
+        ws = self.workspace
+        for kind, pattern in _SQL_PATTERNS:
+            match = pattern.match(statement)
+            if not match:
+                continue
+            with ws.lock:
+                if kind == "create":
+                    return self._create(match.group(1).upper(), bool(match.group(2)),
+                                        _unquote(match.group(3)).split("."), match.group(4))
+                if kind == "grant":
+                    securable = match.group(3).strip().lower().replace(" ", "_")
+                    full_name = _unquote(match.group(4))
+                    if not self._exists(securable, full_name):
+                        return f"{full_name} does not exist."
+                    grants = ws.grants.setdefault((securable, full_name), {})
+                    privileges = grants.setdefault(_unquote(match.group(5)), set())
+                    names = {p.strip().upper().replace(" ", "_") for p in match.group(2).split(",")}
+                    if match.group(1).upper() == "GRANT":
+                        privileges.update(names)
+                    else:
+                        privileges.difference_update(names)
+                    return None
+                securable = match.group(1).strip().lower()
+                store = {"catalog": ws.catalogs, "schema": ws.schemas, "table": ws.tables}.get(securable)
+                full_name = _unquote(match.group(2))
+                if store is None or full_name not in store:
+                    return f"{full_name} does not exist."
+                store[full_name]["owner"] = _unquote(match.group(3))
+                return None
+        return f"Unsupported statement: {statement[:60]}"
+
+    def _create(self, kind: str, if_not_exists: bool, parts: List[str], rest: str) -> Optional[str]:
+        ws = self.workspace
+        store = {"CATALOG": ws.catalogs, "SCHEMA": ws.schemas, "TABLE": ws.tables}[kind]
+        full_name = ".".join(parts)
+        if full_name in store:
+            return None if if_not_exists else f"{full_name} already exists."
+        parent = ".".join(parts[:-1])
+        if parent and parent not in (ws.catalogs if len(parts) == 2 else ws.schemas):
+            return f"{parent} does not exist."
+        if kind == "CATALOG":
+            ws.add_catalog(full_name)
+        elif kind == "SCHEMA":
+            ws.add_schema(*parts)
+        else:
+            inner = re.search(r"\((.*)\)\s*USING", rest, re.DOTALL)
+            columns = [
+                {"name": _unquote(name), "type_name": type_name.upper(), "position": i}
+                for i, (name, type_name) in enumerate(
+                    re.findall(rf"^\s*({_IDENT})\s+([A-Za-z]+)", inner.group(1) if inner else "", re.MULTILINE))
+            ]
+            ws.add_table(*parts, columns)
+        return None
+
+    def _exists(self, securable: str, full_name: str) -> bool:
+        ws = self.workspace
+        store = {"catalog": ws.catalogs, "schema": ws.schemas, "table": ws.tables}.get(securable)
+        return store is None or full_name in store
+
+
+# ==================== FAKE DATABRICKS ====================
+
+class FakeDatabricksServer(FakeServer):
+    """Serves the Unity Catalog REST endpoints used by UnityCatalogService"""
+
+    def __init__(self, workspace: FakeWorkspace = None, faults: FaultProfile = None,
+                 statement_latency: float = 0.0, **kwargs):
+        self.workspace = workspace or FakeWorkspace()
+        self.sql = FakeSqlExecutor(self.workspace, statement_latency)
+        self._statements: Dict[str, Dict] = {}
+        super().__init__(faults=faults, **kwargs)
+
+    def handle(self, method, path, query, body):
+        if not path.startswith(UC_PREFIX):
+            if path.startswith("/api/2.0/preview/scim/v2/Me"):
+                return 200, {"userName": "bench@company.com"}, {}
+            if path.startswith(SQL_STATEMENTS_PATH):
+                return self._statement(method, path[len(SQL_STATEMENTS_PATH):].strip("/"), body)
+            return _not_found(path)
+
+        ws = self.workspace
+        parts = path[len(UC_PREFIX):].strip("/").split("/")
+        kind, rest = parts[0], parts[1:]
+
+        with ws.lock:
+            if kind == "catalogs":
+                return self._objects(method, ws.catalogs, rest, body,
+                                     lambda b: ws.add_catalog(b["name"], comment=b.get("comment")),
+                                     "catalogs", lambda c: True)
+            if kind == "schemas":
+                catalog = query.get("catalog_name")
+                return self._objects(method, ws.schemas, rest, body,
+                                     lambda b: ws.add_schema(b["catalog_name"], b["name"], comment=b.get("comment")),
+                                     "schemas", lambda s: s["catalog_name"] == catalog,
+                                     key=lambda b: f"{b['catalog_name']}.{b['name']}")
+            if kind == "tables":
+                catalog, schema = query.get("catalog_name"), query.get("schema_name")
+                return self._objects(method, ws.tables, rest, body,
+                                     lambda b: ws.add_table(b["catalog_name"], b["schema_name"], b["name"],
+                                                            b.get("columns") or [], comment=b.get("comment")),
+                                     "tables",
+                                     lambda t: t["catalog_name"] == catalog and t["schema_name"] == schema,
+                                     key=lambda b: f"{b['catalog_name']}.{b['schema_name']}.{b['name']}",
+                                     omit_columns=query.get("omit_columns") == "true")
+            if kind == "permissions" and len(rest) >= 2:
+                return self._permissions(method, rest[0], "/".join(rest[1:]), body)
+
+        return _not_found(path)
+
+    def _objects(self, method, store, rest, body, create, collection, matches, key=None,
+                 omit_columns=False):
+        if method == "GET" and not rest:
+            items = [dict(v) for v in store.values() if matches(v)]
+            if omit_columns:
+                for item in items:
+                    item.pop("columns", None)
+            return 200, {collection: items}, {}
+
+        if method == "POST" and not rest:
+            full_name = key(body) if key else body["name"]
+            if full_name in store:
+                return _already_exists(full_name)
+            return 200, create(body), {}
+
+        full_name = rest[0]
+        if full_name not in store:
+            return _not_found(full_name)
+        if method == "GET":
+            return 200, store[full_name], {}
+        if method == "PATCH":
+            store[full_name].update({k: v for k, v in body.items() if k in ("owner", "comment")})
+            return 200, store[full_name], {}
+        if method == "DELETE":
+            del store[full_name]
+            return 200, {}, {}
+        return _not_found(full_name)
+
+    def _statement(self, method, statement_id, body):
+        if method == "POST" and not statement_id:
+            result = self.sql.execute(body.get("statement", ""))
+            status = {"state": result['state']}
+            if not result['success']:
+                status["error"] = {"error_code": "BAD_REQUEST", "message": result['message']}
+            self._statements[result['statement_id']] = {"statement_id": result['statement_id'], "status": status}
+            return 200, self._statements[result['statement_id']], {}
+        if method == "GET" and statement_id in self._statements:
+            return 200, self._statements[statement_id], {}
+        return _not_found(statement_id)
+
+    def _permissions(self, method, securable_type, full_name, body):
+        grants = self.workspace.grants.setdefault((securable_type, full_name), {})
+        if method == "PATCH":
+            for change in body.get("changes", []):
+                privileges = grants.setdefault(change["principal"], set())
+                privileges.update(change.get("add") or [])
+                privileges.difference_update(change.get("remove") or [])
+        assignments = [
+            {"principal": principal, "privileges": sorted(privileges)}
+            for principal, privileges in grants.items() if privileges
+        ]
+        return 200, {"privilege_assignments": assignments}, {}
+
+
+# ==================== FAKE ANTHROPIC ====================
+
+_PATH_RE = re.compile(r"\b[A-Za-z_][\w]*(?:\.[A-Za-z_][\w]*){1,2}\b")
+_PRIVILEGE_RE = re.compile(r"\b(ALL PRIVILEGES|ALL_PRIVILEGES|SELECT|MODIFY|USE_CATALOG|USE_SCHEMA|"
+                           r"CREATE_TABLE|CREATE_SCHEMA|READ_METADATA|USAGE)\b", re.IGNORECASE)
+
+
+def _word_after(text: str, *markers: str) -> Optional[str]:
+    for marker in markers:
+        match = re.search(rf"\b{marker}\s+([A-Za-z_][\w.]*)", text, re.IGNORECASE)
+        if match:
+            return match.group(1)
+    return None
+
+
+def stub_parse(message: str) -> Dict:
+    """
+    Deterministic keyword parser that answers like the Claude intent prompt.
+
+    Good enough to route the sample queries to the right intents so that
+    benchmarks exercise realistic execute paths without a real model.
+    """
+    # Politeness does not change the request
+    text = re.sub(r"^(?:please|could you|can you)\s+|,?\s*(?:please|thanks|thank you)?[\s?.!]*$", "",
+                  message.strip(), flags=re.IGNORECASE) or message.strip()
+    lower = text.lower()
+    path_match = _PATH_RE.search(text)
+    path = path_match.group(0) if path_match else None
+
+    if lower in ("help", "?") or lower.startswith("help"):
+        return {"intent": "help", "params": {}, "explanation": "Show help"}
+
+    if ", then" in lower or "medallion" in lower:
+        return {"intent": "complex", "params": {}, "explanation": "Multi-step operation requiring clarification"}
+
+    privilege = _PRIVILEGE_RE.search(text)
+    bulk = re.search(r"\b(?:all|every)\s+(tables?|schemas?)\s+in\s+(?:(?:the\s+)?(?:catalog|schema)\s+)?"
+                     r"([A-Za-z_][\w.]*)", text, re.IGNORECASE)
+    if lower.startswith("grant") and privilege and bulk:
+        principal = _word_after(text, "to")
+        catalog, _, schema = bulk.group(2).partition(".")
+        return {"intent": "bulkGrant",
+                "params": {"privilege": privilege.group(1).upper().replace(" ", "_"), "catalog": catalog,
+                           "schema": schema or None, "principal": principal,
+                           "securable_type": "SCHEMA" if bulk.group(1).lower().startswith("schema") else "TABLE"},
+                "explanation": f"Will grant {privilege.group(1).upper()} on every {bulk.group(1).lower().rstrip('s')} "
+                               f"in {bulk.group(2)} to {principal}"}
+    if lower.startswith("grant") and privilege:
+        principal = _word_after(text, "to")
+        return {"intent": "grantPermission",
+                "params": {"privilege": privilege.group(1).upper().replace(" ", "_"),
+                           "object": path or _word_after(text, "on"), "principal": principal},
+                "explanation": f"Will grant {privilege.group(1).upper()} to {principal}"}
+    if lower.startswith("revoke") and privilege:
+        principal = _word_after(text, "from")
+        return {"intent": "revokePermission",
+                "params": {"privilege": privilege.group(1).upper().replace(" ", "_"),
+                           "object": path or _word_after(text, "on"), "principal": principal},
+                "explanation": f"Will revoke {privilege.group(1).upper()} from {principal}"}
+    if "grants" in lower or "permissions" in lower:
+        return {"intent": "showPermissions", "params": {"object": path or _word_after(text, "on", "for")},
+                "explanation": "Will show permissions"}
+    if "each owner" in lower or "largest schemas" in lower:
+        group = "owner" if "owner" in lower else "catalog || '.' || schema"
+        catalog = _word_after(text, "in")
+        where = f" WHERE catalog = '{catalog.rstrip('?')}'" if catalog else ""
+        return {"intent": "analyticsQuery",
+                "params": {"sql": f"SELECT {group} AS name, COUNT(*) AS tables FROM tables{where} "
+                                  f"GROUP BY {group} ORDER BY tables DESC LIMIT 20"},
+                "explanation": "Will aggregate the inventory export"}
+    if "owner" in lower:
+        return {"intent": "setOwner",
+                "params": {"object": path or _word_after(text, "of"), "owner": _word_after(text, "to")},
+                "explanation": "Will change the owner"}
+    if lower.startswith("create") and "table" in lower:
+        params = {"table": path or _word_after(text, "table")}
+        columns = re.search(r"\bcolumns?\b:?(.*)$", text, re.IGNORECASE)
+        if columns:
+            params["columns"] = [{"name": name, "type_name": type_name.upper()}
+                                 for name, type_name in re.findall(r"(\w+)\s*\((\w+)\)", columns.group(1))]
+        return {"intent": "createTable", "params": params, "explanation": "Will create a table"}
+    if lower.startswith("create") and "schema" in lower:
+        return {"intent": "createSchema",
+                "params": {"schema": _word_after(text, "named", "schema"),
+                           "catalog": _word_after(text, "in the", "in")},
+                "explanation": "Will create a schema"}
+    if lower.startswith("create") and "catalog" in lower:
+        return {"intent": "createCatalog", "params": {"catalog": _word_after(text, "called", "named", "catalog")},
+                "explanation": "Will create a catalog"}
+    if lower.startswith(("export", "refresh")) and "inventory" in lower:
+        return {"intent": "exportInventory", "params": {}, "explanation": "Will refresh the inventory export"}
+    if "owned by" in lower:
+        return {"intent": "inventoryQuery",
+                "params": {"report": "tablesByOwner", "owner": _word_after(text, "by")},
+                "explanation": "Will query the inventory export"}
+    if "inventory" in lower or "how many tables" in lower or "no description" in lower:
+        report = "undocumentedTables" if "no description" in lower else "summary"
+        return {"intent": "inventoryQuery", "params": {"report": report},
+                "explanation": "Will query the inventory export"}
+    if "column" in lower and ("which" in lower or "find" in lower):
+        column = (re.search(r"\b(?:named|called)\s+([\w*?]+)", text, re.IGNORECASE)
+                  or re.search(r"\bcolumns?\s+([\w*?]+)", text, re.IGNORECASE))
+        params = {"column": column.group(1).rstrip("?") if column else None}
+        if path:
+            params.update(dict(zip(("catalog", "schema"), path.split(".")[:2])))
+        elif _word_after(text, "in"):
+            params["catalog"] = _word_after(text, "in")
+        return {"intent": "findColumns", "params": params, "explanation": "Will search column definitions"}
+    if "table" in lower and path and path.count(".") == 2:
+        return {"intent": "getTableDetails", "params": {"table": path}, "explanation": "Will describe the table"}
+    if "table" in lower:
+        catalog, _, schema = (path or "").partition(".")
+        return {"intent": "listTables", "params": {"catalog": catalog or None, "schema": schema or None},
+                "explanation": "Will list tables"}
+    if "schema" in lower:
+        return {"intent": "listSchemas",
+                "params": {"catalog": path or _word_after(text, "in the", "in")},
+                "explanation": "Will list schemas"}
+    if "catalog" in lower:
+        return {"intent": "listCatalogs", "params": {}, "explanation": "Will list all catalogs"}
+    return {"intent": "help", "params": {}, "explanation": "I couldn't understand that request."}
+
+
+class FakeAnthropicServer(FakeServer):
+    """Serves POST /v1/messages, answering with stub_parse output"""
+
+    def handle(self, method, path, query, body):
+        if method != "POST" or not path.endswith("/v1/messages"):
+            return _not_found(path)
+
+        messages = body.get("messages") or [{"content": ""}]
+        content = messages[-1]["content"]
+        if isinstance(content, list):
+            content = " ".join(block.get("text", "") for block in content)
+        text = json.dumps(stub_parse(content))
+
+        return 200, {
+            "id": f"msg_{uuid.uuid4().hex[:24]}",
+            "type": "message",
+            "role": "assistant",
+            "model": body.get("model", "claude-sonnet-4-20250514"),
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": {
+                "input_tokens": (len(body.get("system", "")) + len(content)) // 4,
+                "output_tokens": len(text) // 4,
+            },
+        }, {}
+
+
+# ==================== FAKE TRACE COLLECTOR ====================
+
+class FakeCollectorServer(FakeServer):
+    """Accepts span batches from tracing.CollectorExporter and keeps them in memory"""
+
+    def __init__(self, faults: FaultProfile = None, **kwargs):
+        self.spans: List[Dict] = []
+        super().__init__(faults=faults, **kwargs)
+
+    def handle(self, method, path, query, body):
+        if method != "POST":
+            return _not_found(path)
+        self.spans.extend(body.get("spans", []))
+        return 200, {"accepted": len(body.get("spans", []))}, {}
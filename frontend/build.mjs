@@ -0,0 +1,52 @@
+// Precompiles the UI into a minified, content-hashed bundle under dist/.
+//
+//   dist/assets/app-<hash>.js   immutable, served with a one-year max-age
+//   dist/index.html             index.html with the dev scripts swapped for the bundle
+//   dist/manifest.json          logical name -> hashed file
+import * as esbuild from 'esbuild';
+import { mkdir, readFile, rm, writeFile } from 'node:fs/promises';
+import path from 'node:path';
+import { fileURLToPath } from 'node:url';
+
+const root = path.resolve(path.dirname(fileURLToPath(import.meta.url)), '..');
+const dist = path.join(root, 'dist');
+const DEV_SCRIPTS = /<!-- dev-scripts:start -->[\s\S]*<!-- dev-scripts:end -->/;
+
+await rm(dist, { recursive: true, force: true });
+await mkdir(dist, { recursive: true });
+
+const result = await esbuild.build({
+  absWorkingDir: root,
+  entryPoints: { app: 'frontend/entry.jsx' },
+  bundle: true,
+  minify: true,
+  sourcemap: 'linked',
+  format: 'iife',
+  target: ['es2019'],
+  loader: { '.jsx': 'jsx' },
+  inject: ['frontend/react-shim.js'],
+  define: { 'process.env.NODE_ENV': '"production"' },
+  legalComments: 'none',
+  entryNames: '[name]-[hash]',
+  outdir: 'dist/assets',
+  metafile: true,
+});
+
+const manifest = {};
+for (const [file, output] of Object.entries(result.metafile.outputs)) {
+  if (output.entryPoint) {
+    manifest[`${path.basename(file).split('-')[0]}.js`] = path.basename(file);
+  }
+}
+
+const html = await readFile(path.join(root, 'index.html'), 'utf8');
+if (!DEV_SCRIPTS.test(html)) {
+  throw new Error('index.html is missing the dev-scripts markers');
+}
+const scripts = Object.values(manifest)
+  .map((file) => `<script defer src="/assets/${file}"></script>`)
+  .join('\n    ');
+await writeFile(path.join(dist, 'index.html'), html.replace(DEV_SCRIPTS, scripts));
+await writeFile(path.join(dist, 'manifest.json'), JSON.stringify(manifest, null, 2) + '\n');
+
+console.log(`Built ${Object.values(manifest).join(', ')}`);
@@ -0,0 +1,4 @@
+import { createRoot } from 'react-dom/client';
+import UnityCatalogChatbot from '../unity-catalog-chatbot.jsx';
+
+createRoot(document.getElementById('root')).render(<UnityCatalogChatbot />);
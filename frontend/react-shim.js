@@ -0,0 +1,5 @@
+// The component reads hooks from a global `React` (it also runs unbundled through
+// @babel/standalone); esbuild injects this import wherever that global is used.
+import * as React from 'react';
+
+export { React };
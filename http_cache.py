@@ -0,0 +1,141 @@
+"""
+HTTP Caching
+Content-hash ETags with If-None-Match handling and negotiated gzip/brotli compression
+for JSON API responses; listing bodies are hashed and encoded once per cached listing
+"""
+
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+from flask import Response, request
+
+from json_provider import dumps
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+# Preferred first when the client accepts several
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def _encode(body: bytes, encoding: str, level: int) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=min(level, 11))
+    return gzip.compress(body, compresslevel=min(level, 9), mtime=0)
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Best supported encoding the client accepts (q=0 excludes one), or None"""
+    accepted = {}
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.lower()] = quality
+    for encoding in ENCODINGS:
+        if accepted.get(encoding, accepted.get("*", 0)) > 0:
+            return encoding
+    return None
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against one ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    return any((tag.strip()[2:] if tag.strip().startswith("W/") else tag.strip()) == opaque
+               for tag in if_none_match.split(","))
+
+
+class ResponseCache:
+    """
+    Serialized body, ETag and encoded variants per listing object.
+
+    Keyed by the identity of the listing's item list, which the metadata cache
+    hands out unchanged until the listing is refetched, so an unchanged listing
+    is serialized, hashed and compressed once no matter how often it is polled.
+    """
+
+    def __init__(self, min_bytes: int = 1024, level: int = 6, max_entries: int = 256):
+        self.min_bytes = min_bytes
+        self.level = level
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, Tuple[object, str, Dict[str, bytes]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _entry(self, payload: Dict, identity: object) -> Tuple[str, Dict[str, bytes]]:
+        key = id(identity)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is identity:
+                self._entries.move_to_end(key)
+                return entry[1], entry[2]
+
+        body = dumps(payload)
+        etag = f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        variants = {"identity": body}
+        if identity is not None:
+            with self._lock:
+                # The stored reference keeps id(identity) from being reused while cached
+                self._entries[key] = (identity, etag, variants)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return etag, variants
+
+    def respond(self, payload: Dict, identity: object = None, status: int = 200) -> Response:
+        """
+        JSON response for `payload` with an ETag, a 304 when the client already
+        has it, and the body compressed when large enough and accepted.
+
+        `identity` is the object whose lifetime matches the payload's content
+        (a cached listing's item list); without one nothing is memoized.
+        """
+        etag, variants = self._entry(payload, identity)
+        if status == 200 and etag_matches(request.headers.get("If-None-Match"), etag):
+            response = Response(status=304)
+        else:
+            body, encoding = self._body(variants)
+            response = Response(body, status=status, mimetype="application/json")
+            if encoding:
+                response.headers["Content-Encoding"] = encoding
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "no-cache"
+        response.vary.add("Accept-Encoding")
+        return response
+
+    def _body(self, variants: Dict[str, bytes]) -> Tuple[bytes, Optional[str]]:
+        body = variants["identity"]
+        encoding = negotiate_encoding(request.headers.get("Accept-Encoding"))
+        if encoding is None or len(body) < self.min_bytes:
+            return body, None
+        encoded = variants.get(encoding)
+        if encoded is None:
+            encoded = variants[encoding] = _encode(body, encoding, self.level)
+        return encoded, encoding
+
+    def compress(self, response: Response, mimetypes: Iterable[str] = ("application/json",)) -> Response:
+        """after_request hook: compress other large JSON responses that are not encoded yet"""
+        if (response.direct_passthrough or response.status_code < 200 or response.status_code == 304
+                or "Content-Encoding" in response.headers or response.mimetype not in mimetypes):
+            return response
+        body = response.get_data()
+        encoding = negotiate_encoding(request.headers.get("Accept-Encoding"))
+        response.vary.add("Accept-Encoding")
+        if encoding is None or len(body) < self.min_bytes:
+            return response
+        response.set_data(_encode(body, encoding, self.level))
+        response.headers["Content-Encoding"] = encoding
+        return response
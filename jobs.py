@@ -0,0 +1,411 @@
+"""
+Background Jobs
+Long-running bulk operations (catalog-wide grants, batch creates, inventory exports) run on a
+bounded worker pool outside the request, with state, progress and partial results persisted
+in SQLite so any worker can report on them and unfinished jobs are picked up after a restart
+"""
+
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: recovery is not serialized between workers
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED = "queued", "running", "succeeded", "failed", "cancelled"
+FINISHED_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    done INTEGER NOT NULL DEFAULT 0,
+    total INTEGER,
+    message TEXT,
+    result TEXT,
+    owner TEXT,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    updated_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_by_status ON jobs (status, updated_at);
+CREATE TABLE IF NOT EXISTS job_items (
+    job_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    item TEXT NOT NULL,
+    PRIMARY KEY (job_id, seq)
+);
+"""
+
+
+class JobCancelled(Exception):
+    """Raised inside a job once cancellation was requested"""
+
+
+class JobQueueFull(Exception):
+    """Too many jobs are already waiting"""
+
+
+class JobStore:
+    """Job rows and their partial results in one SQLite file (WAL, one connection per thread)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db().executescript(_SCHEMA)
+
+    def _db(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def create(self, kind: str, params: Dict) -> str:
+        job_id = uuid.uuid4().hex[:12]
+        now = time.time()
+        self._db().execute(
+            "INSERT INTO jobs (id, kind, params, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (job_id, kind, json.dumps(params), QUEUED, now, now),
+        )
+        return job_id
+
+    def get(self, job_id: str, items_from: int = None) -> Optional[Dict]:
+        """Job as a dict; with `items_from`, also the partial results from that offset on"""
+        row = self._db().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = _job_dict(row)
+        if items_from is not None:
+            job['items'] = [json.loads(item) for (item,) in self._db().execute(
+                "SELECT item FROM job_items WHERE job_id = ? AND seq >= ? ORDER BY seq", (job_id, items_from))]
+            job['items_from'] = items_from
+        return job
+
+    def list(self, limit: int = 50, status: str = None) -> List[Dict]:
+        sql, args = "SELECT * FROM jobs", []
+        if status:
+            sql, args = sql + " WHERE status = ?", [status]
+        rows = self._db().execute(sql + " ORDER BY created_at DESC LIMIT ?", (*args, limit))
+        return [_job_dict(row) for row in rows]
+
+    def count(self, *statuses: str) -> int:
+        marks = ",".join("?" for _ in statuses)
+        return self._db().execute(f"SELECT COUNT(*) FROM jobs WHERE status IN ({marks})", statuses).fetchone()[0]
+
+    def claim(self, job_id: str, owner: str, seen: Optional[Tuple[Optional[str], float]] = None) -> bool:
+        """
+        Mark a queued job as running here; False if taken. With `seen`, the
+        (owner, updated_at) read from an abandoned running job, take that job
+        over only if nobody claimed or heartbeated it since.
+        """
+        now = time.time()
+        if seen is None:
+            where, args = "status = ?", (QUEUED,)
+        else:
+            where, args = "status = ? AND owner IS ? AND updated_at = ?", (RUNNING, *seen)
+        cursor = self._db().execute(
+            "UPDATE jobs SET status = ?, owner = ?, started_at = COALESCE(started_at, ?), updated_at = ? "
+            f"WHERE id = ? AND cancel_requested = 0 AND {where}",
+            (RUNNING, owner, now, now, job_id, *args),
+        )
+        return cursor.rowcount == 1
+
+    def requeue(self, job_id: str) -> bool:
+        """Queue a failed or cancelled job again under its id; False if it did not end that way"""
+        cursor = self._db().execute(
+            "UPDATE jobs SET status = ?, cancel_requested = 0, result = NULL, finished_at = NULL, updated_at = ? "
+            "WHERE id = ? AND status IN (?, ?)",
+            (QUEUED, time.time(), job_id, FAILED, CANCELLED),
+        )
+        return cursor.rowcount == 1
+
+    def unfinished(self) -> List[Dict]:
+        """Queued and running jobs, oldest first"""
+        rows = self._db().execute(
+            "SELECT * FROM jobs WHERE status IN (?, ?) ORDER BY created_at",
+            (QUEUED, RUNNING),
+        )
+        return [_job_dict(row) for row in rows]
+
+    def progress(self, job_id: str, done: int, total: Optional[int], message: Optional[str],
+                 items: List[Dict], first_seq: int) -> bool:
+        """Persist progress and a batch of partial results; returns whether cancel was requested"""
+        db = self._db()
+        db.execute("BEGIN")
+        try:
+            db.executemany("INSERT OR REPLACE INTO job_items (job_id, seq, item) VALUES (?, ?, ?)",
+                           [(job_id, first_seq + i, json.dumps(item)) for i, item in enumerate(items)])
+            db.execute("UPDATE jobs SET done = ?, total = ?, message = COALESCE(?, message), updated_at = ? "
+                       "WHERE id = ?", (done, total, message, time.time(), job_id))
+            cancelled = db.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return bool(cancelled and cancelled[0])
+
+    def heartbeat(self, job_ids: List[str]) -> None:
+        now = time.time()
+        self._db().executemany("UPDATE jobs SET updated_at = ? WHERE id = ? AND status = ?",
+                               [(now, job_id, RUNNING) for job_id in job_ids])
+
+    def finish(self, job_id: str, status: str, message: str, result: Dict = None) -> None:
+        now = time.time()
+        self._db().execute(
+            "UPDATE jobs SET status = ?, message = ?, result = ?, updated_at = ?, finished_at = ? WHERE id = ?",
+            (status, message, json.dumps(result) if result is not None else None, now, now, job_id),
+        )
+
+    def request_cancel(self, job_id: str) -> Optional[str]:
+        """Cancel a queued job outright, or flag a running one; returns the job's status afterwards"""
+        now = time.time()
+        db = self._db()
+        db.execute("UPDATE jobs SET status = ?, message = 'Cancelled before it started', "
+                   "updated_at = ?, finished_at = ? WHERE id = ? AND status = ?",
+                   (CANCELLED, now, now, job_id, QUEUED))
+        db.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = ?", (job_id, RUNNING))
+        row = db.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row[0] if row else None
+
+
+def _job_dict(row: sqlite3.Row) -> Dict:
+    job = dict(row)
+    job['params'] = json.loads(job['params'])
+    job['result'] = json.loads(job['result']) if job['result'] else None
+    job['cancel_requested'] = bool(job['cancel_requested'])
+    job['progress'] = round(job['done'] / job['total'], 3) if job['total'] else None
+    return job
+
+
+class JobContext:
+    """
+    Handed to a running job: reports progress and partial results, and tells
+    it when to stop. Writes are batched: at most one every `flush_interval`
+    seconds (or `flush_items` results), plus a final one when the job ends.
+    """
+
+    def __init__(self, store: JobStore, job: Dict, flush_interval: float = 0.5, flush_items: int = 200):
+        self.store = store
+        self.job_id = job['id']
+        self.params = job['params']
+        self.flush_interval = flush_interval
+        self.flush_items = flush_items
+        self.done = 0
+        self.total: Optional[int] = None
+        self.message: Optional[str] = None
+        self._seq = store._db().execute(
+            "SELECT COALESCE(MAX(seq) + 1, 0) FROM job_items WHERE job_id = ?", (self.job_id,)).fetchone()[0]
+        self._pending: List[Dict] = []
+        self._flushed_at = time.monotonic()
+        self._cancelled = False
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    def progress(self, done: int = None, total: int = None, item: Dict = None, message: str = None) -> None:
+        """Record progress; raises JobCancelled once a cancel request has been seen"""
+        if done is not None:
+            self.done = done
+        if total is not None:
+            self.total = total
+        if message is not None:
+            self.message = message
+        if item is not None:
+            self._pending.append(item)
+        if len(self._pending) >= self.flush_items or time.monotonic() - self._flushed_at >= self.flush_interval:
+            self.flush()
+        if self._cancelled:
+            raise JobCancelled()
+
+    def flush(self) -> None:
+        items, self._pending = self._pending, []
+        self._cancelled = self.store.progress(self.job_id, self.done, self.total, self.message, items, self._seq)
+        self._seq += len(items)
+        self._flushed_at = time.monotonic()
+
+
+class JobManager:
+    """
+    Runs jobs of registered kinds on a bounded thread pool.
+
+    `handlers` maps a kind to a callable taking a JobContext and returning a
+    result dict (with 'success' and 'message'). Any worker process can read or
+    cancel any job; each job runs in the process that claimed it, which
+    heartbeats it. Queued jobs, and running jobs whose owner stopped
+    heartbeating, are claimed again by `recover()`, and failed or cancelled
+    jobs by `retry()`; handlers must therefore be safe to re-run (checkpointed
+    ones resume where the last attempt stopped).
+    """
+
+    def __init__(self, store: JobStore, handlers: Dict[str, Callable[[JobContext], Dict]],
+                 max_workers: int = 2, max_queued: int = 100, heartbeat_interval: float = 10.0):
+        self.store = store
+        self.handlers = handlers
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.heartbeat_interval = heartbeat_interval
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._running: Dict[str, Optional[JobContext]] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, jobs_config, handlers: Dict[str, Callable[[JobContext], Dict]]) -> "JobManager":
+        return cls(
+            JobStore(jobs_config.db_path),
+            handlers,
+            max_workers=jobs_config.max_workers,
+            max_queued=jobs_config.max_queued,
+        )
+
+    def submit(self, kind: str, params: Dict = None) -> Dict:
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind: {kind}. Choose from {', '.join(sorted(self.handlers))}")
+        if self.store.count(QUEUED) >= self.max_queued:
+            raise JobQueueFull(f"{self.max_queued} jobs are already queued")
+        job_id = self.store.create(kind, params or {})
+        self._pool().submit(self._run, job_id)
+        return self.store.get(job_id)
+
+    def get(self, job_id: str, items_from: int = None) -> Optional[Dict]:
+        return self.store.get(job_id, items_from)
+
+    def cancel(self, job_id: str) -> Optional[Dict]:
+        if self.store.request_cancel(job_id) is None:
+            return None
+        return self.store.get(job_id)
+
+    def retry(self, job_id: str) -> Optional[Dict]:
+        """
+        Run a failed or cancelled job again; checkpointed handlers then skip
+        the work it already finished. None if there is no such job.
+        """
+        job = self.store.get(job_id)
+        if job is None:
+            return None
+        if self.store.count(QUEUED) >= self.max_queued:
+            raise JobQueueFull(f"{self.max_queued} jobs are already queued")
+        if not self.store.requeue(job_id):
+            raise ValueError(f"Job {job_id} is {job['status']}; only failed or cancelled jobs can be retried")
+        self._pool().submit(self._run, job_id)
+        return self.store.get(job_id)
+
+    def recover(self) -> List[str]:
+        """
+        Claim jobs left unfinished by a previous (or dead) process; returns
+        their ids. Only one worker recovers at a time (the others skip), and
+        each takeover is a compare-and-swap, so a job is never run twice.
+        """
+        lock = self._recovery_lock()
+        if lock is False:
+            return []
+        try:
+            job_ids = []
+            for job in self.store.unfinished():
+                abandoned = job['status'] == RUNNING and self._is_abandoned(job)
+                if abandoned and job['cancel_requested']:
+                    self.store.finish(job['id'], CANCELLED, "Cancelled; its worker stopped")
+                elif job['status'] == QUEUED or abandoned:
+                    seen = (job['owner'], job['updated_at']) if abandoned else None
+                    if self.store.claim(job['id'], self.owner, seen):
+                        with self._lock:
+                            # Heartbeated from now on, even while it waits for a pool thread
+                            self._running[job['id']] = None
+                        self._pool().submit(self._run_claimed, job['id'])
+                        job_ids.append(job['id'])
+            return job_ids
+        finally:
+            if lock is not None and lock is not False:
+                os.close(lock)
+
+    def _recovery_lock(self):
+        """Descriptor of the held cross-worker recovery lock, None without fcntl, False if another worker holds it"""
+        if fcntl is None:
+            return None
+        fd = os.open(f"{self.store.path}.recover.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        return fd
+
+    def _is_abandoned(self, job: Dict) -> bool:
+        """Its owner stopped heartbeating, or is a process on this host that no longer exists"""
+        with self._lock:
+            if job['id'] in self._running:
+                return False
+        if job['updated_at'] < time.time() - 3 * self.heartbeat_interval:
+            return True
+        host, _, pid = (job['owner'] or "").rpartition(":")
+        if host != socket.gethostname() or not pid.isdigit() or job['owner'] == self.owner:
+            return False
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            return True
+        except OSError:
+            pass
+        return False
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job")
+                threading.Thread(target=self._heartbeat, name="job-heartbeat", daemon=True).start()
+            return self._executor
+
+    def _heartbeat(self) -> None:
+        while True:
+            time.sleep(self.heartbeat_interval)
+            with self._lock:
+                running = list(self._running)
+            if running:
+                try:
+                    self.store.heartbeat(running)
+                except sqlite3.Error as e:
+                    logger.warning(f"Job heartbeat failed: {e}")
+
+    def _run(self, job_id: str) -> None:
+        if self.store.claim(job_id, self.owner):
+            self._run_claimed(job_id)
+
+    def _run_claimed(self, job_id: str) -> None:
+        job = self.store.get(job_id)
+        context = JobContext(self.store, job)
+        with self._lock:
+            self._running[job_id] = context
+        try:
+            result = self.handlers[job['kind']](context)
+            status = SUCCEEDED if result.get('success', True) else FAILED
+            message = result.get('message') or status
+        except JobCancelled:
+            result, status, message = None, CANCELLED, f"Cancelled after {context.done} item(s)"
+        except Exception as e:
+            result, status, message = None, FAILED, f"Job failed: {e}"
+        finally:
+            with self._lock:
+                self._running.pop(job_id, None)
+        context.flush()
+        self.store.finish(job_id, status, message, result)
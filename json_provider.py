@@ -0,0 +1,54 @@
+"""
+JSON Provider
+Flask JSON provider that serializes with orjson when it is installed (records and other
+dataclasses natively) and falls back to the standard library encoder otherwise
+"""
+
+import json
+from typing import Any
+
+from flask.json.provider import DefaultJSONProvider
+
+from records import Record
+
+try:
+    import orjson
+except ImportError:  # optional: stdlib json
+    orjson = None
+
+# Datetimes go through the Flask default hook so both paths format them the same way
+_ORJSON_OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME) if orjson else 0
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, Record):
+        return obj.to_dict()
+    return DefaultJSONProvider.default(obj)
+
+
+def dumps(obj: Any) -> bytes:
+    """Compact UTF-8 JSON for `obj`"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS)
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    `jsonify` and `app.json` backed by `dumps`.
+
+    Keys keep insertion order (no sort) on the fast path; calls with extra
+    json.dumps options, and all loads, use the default provider.
+    """
+    sort_keys = False
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if kwargs:
+            kwargs.setdefault("default", _default)
+            return super().dumps(obj, **kwargs)
+        return dumps(obj).decode()
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj), mimetype=self.mimetype)
+
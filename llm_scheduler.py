@@ -0,0 +1,285 @@
+"""
+LLM Call Scheduling
+Process-wide (optionally cross-worker) admission control for outbound LLM calls: a
+max-in-flight limit, priority classes, fair sharing between users, queue-time metrics and
+429-aware backoff, with callers turned away early instead of all failing under overload
+"""
+
+import os
+import random
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional, TypeVar
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-worker slots
+    fcntl = None
+
+T = TypeVar("T")
+
+# Lower rank is served first
+PRIORITIES = {"interactive": 0, "batch": 1, "background": 2}
+
+# 429 rate limited, 529 overloaded
+RETRYABLE_STATUSES = (429, 529)
+
+
+class LLMOverloaded(Exception):
+    """No capacity for an LLM call; retry after `retry_after` seconds"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def retry_delay(error: Exception) -> Optional[float]:
+    """
+    Seconds the provider asked us to wait for a rate-limit or overload error
+    (0 when it did not say), or None when the error is not one of those.
+    """
+    if getattr(error, "status_code", None) not in RETRYABLE_STATUSES:
+        return None
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    for header, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        try:
+            return max(float(headers.get(header)) * scale, 0.0)
+        except (TypeError, ValueError):
+            continue
+    return 0.0
+
+
+class _Waiter:
+    __slots__ = ("rank", "user", "seq", "enqueued")
+
+    def __init__(self, rank: int, user: str, seq: int, enqueued: float):
+        self.rank = rank
+        self.user = user
+        self.seq = seq
+        self.enqueued = enqueued
+
+
+class SharedSlots:
+    """
+    Cross-worker slots as flock()ed files in one directory, plus a shared
+    cooldown deadline. Locks are released by the kernel if a worker dies.
+    """
+
+    def __init__(self, directory: str, slots: int, poll_interval: float = 0.02):
+        if fcntl is None:
+            raise RuntimeError("Cross-worker LLM slots need fcntl (not available on this platform)")
+        os.makedirs(directory, exist_ok=True)
+        self.paths = [os.path.join(directory, f"slot-{i}.lock") for i in range(slots)]
+        self.cooldown_path = os.path.join(directory, "cooldown")
+        self.poll_interval = poll_interval
+
+    def acquire(self, deadline: float) -> Optional[int]:
+        """File descriptor of a held slot, or None if none freed up before `deadline` (monotonic)"""
+        while True:
+            for path in self.paths:
+                fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    return fd
+                except BlockingIOError:
+                    os.close(fd)
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(self.poll_interval)
+
+    @staticmethod
+    def release(fd: int) -> None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+    def cooldown_remaining(self) -> float:
+        try:
+            with open(self.cooldown_path) as fh:
+                return float(fh.read() or 0) - time.time()
+        except (OSError, ValueError):
+            return 0.0
+
+    def cool_down(self, seconds: float) -> None:
+        if seconds > self.cooldown_remaining():
+            tmp = f"{self.cooldown_path}.{os.getpid()}"
+            with open(tmp, "w") as fh:
+                fh.write(str(time.time() + seconds))
+            os.replace(tmp, self.cooldown_path)
+
+
+class LLMScheduler:
+    """
+    Admits at most `max_in_flight` LLM calls at a time.
+
+    Waiting calls are served by priority class, then by per-user virtual
+    time (each grant advances the user's clock, and a user arriving idle
+    starts at the current clock), so one user's burst cannot starve others.
+    A 429/529 puts every caller on hold for the provider's Retry-After (or
+    exponential backoff) and the call is retried. Calls that cannot start
+    within `queue_timeout`, or arrive to a full queue, raise LLMOverloaded.
+    """
+
+    def __init__(self, max_in_flight: int = 8, max_queue: int = 64, queue_timeout: float = 10.0,
+                 max_retries: int = 3, backoff_base: float = 0.5, backoff_max: float = 20.0,
+                 shared: Optional[SharedSlots] = None):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.shared = shared
+        self.stats: Counter = Counter()
+        self.queue_waits: deque = deque(maxlen=1000)
+        self._in_flight = 0
+        self._waiting = []
+        self._seq = 0
+        self._clock = 0
+        self._user_clock: Dict[str, int] = {}
+        self._user_active: Counter = Counter()
+        self._cooldown_until = 0.0
+        self._cond = threading.Condition()
+
+    @classmethod
+    def from_config(cls, scheduler_config) -> Optional["LLMScheduler"]:
+        if not scheduler_config.enabled:
+            return None
+        shared = None
+        if scheduler_config.lock_dir:
+            shared = SharedSlots(scheduler_config.lock_dir, scheduler_config.max_in_flight)
+        return cls(
+            max_in_flight=scheduler_config.max_in_flight,
+            max_queue=scheduler_config.max_queue,
+            queue_timeout=scheduler_config.queue_timeout,
+            max_retries=scheduler_config.max_retries,
+            shared=shared,
+        )
+
+    def call(self, fn: Callable[[], T], priority: str = "interactive", user: str = None) -> T:
+        """Run `fn` once admitted, retrying it after rate-limit/overload responses"""
+        for attempt in range(self.max_retries + 1):
+            with self.slot(priority, user):
+                try:
+                    return fn()
+                except Exception as e:
+                    delay = retry_delay(e)
+                    if delay is None:
+                        raise
+                    self.stats['rate_limited'] += 1
+                    backoff = min(self.backoff_base * 2 ** attempt, self.backoff_max)
+                    delay = max(delay, backoff * random.uniform(0.5, 1.0))
+                    self.cool_down(delay)
+                    if attempt == self.max_retries:
+                        raise LLMOverloaded("The language model is rate limiting requests", delay) from e
+            self.stats['retries'] += 1
+
+    @contextmanager
+    def slot(self, priority: str = "interactive", user: str = None):
+        """Hold one in-flight slot; yields the seconds spent queued"""
+        user = user or "anonymous"
+        waited = self._acquire(PRIORITIES.get(priority, PRIORITIES["interactive"]), user)
+        fd = None
+        if self.shared is not None:
+            fd = self.shared.acquire(time.monotonic() + max(self.queue_timeout - waited, 0))
+            if fd is None:
+                self._release(user)
+                self.stats['rejected'] += 1
+                raise LLMOverloaded("All workers' LLM slots are busy", self._retry_after())
+        try:
+            yield waited
+        finally:
+            if fd is not None:
+                self.shared.release(fd)
+            self._release(user)
+
+    def cool_down(self, seconds: float) -> None:
+        """Hold every caller (in all workers when shared) for `seconds`"""
+        with self._cond:
+            self._cooldown_until = max(self._cooldown_until, time.monotonic() + seconds)
+        if self.shared is not None:
+            self.shared.cool_down(seconds)
+
+    def _cooldown_remaining(self) -> float:
+        remaining = self._cooldown_until - time.monotonic()
+        if self.shared is not None:
+            remaining = max(remaining, self.shared.cooldown_remaining())
+        return remaining
+
+    def _retry_after(self) -> float:
+        return round(max(self._cooldown_remaining(), 1.0), 1)
+
+    def _next(self) -> Optional[_Waiter]:
+        return min(self._waiting, key=lambda w: (w.rank, self._user_clock[w.user], w.seq), default=None)
+
+    def _acquire(self, rank: int, user: str) -> float:
+        enqueued = time.monotonic()
+        deadline = enqueued + self.queue_timeout
+        with self._cond:
+            if len(self._waiting) >= self.max_queue:
+                self.stats['rejected'] += 1
+                raise LLMOverloaded("Too many requests are waiting for the language model",
+                                    self._retry_after())
+            self._seq += 1
+            waiter = _Waiter(rank, user, self._seq, enqueued)
+            self._user_clock[user] = max(self._user_clock.get(user, 0), self._clock)
+            self._user_active[user] += 1
+            self._waiting.append(waiter)
+            try:
+                while True:
+                    cooldown = self._cooldown_remaining()
+                    if cooldown <= 0 and self._in_flight < self.max_in_flight and self._next() is waiter:
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.stats['rejected'] += 1
+                        raise LLMOverloaded("Timed out waiting for the language model",
+                                            self._retry_after())
+                    self._cond.wait(min(remaining, cooldown) if cooldown > 0 else remaining)
+            except LLMOverloaded:
+                self._waiting.remove(waiter)
+                self._forget(user)
+                self._cond.notify_all()
+                raise
+
+            self._waiting.remove(waiter)
+            self._in_flight += 1
+            self._clock = self._user_clock[user]
+            self._user_clock[user] += 1
+            waited = time.monotonic() - enqueued
+            self.queue_waits.append(waited)
+            self.stats['admitted'] += 1
+            # Another slot may still be free for the next waiter in line
+            self._cond.notify_all()
+            return waited
+
+    def _release(self, user: str) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            self._forget(user)
+            self._cond.notify_all()
+
+    def _forget(self, user: str) -> None:
+        self._user_active[user] -= 1
+        if self._user_active[user] <= 0:
+            # An idle user restarts at the current clock when it comes back
+            del self._user_active[user]
+            self._user_clock.pop(user, None)
+
+    def snapshot(self) -> Dict:
+        """Current load, counters and queue-wait percentiles"""
+        with self._cond:
+            waits = sorted(self.queue_waits)
+            in_flight, queued = self._in_flight, len(self._waiting)
+
+        def percentile(p: float) -> float:
+            return round(waits[min(int(p * len(waits)), len(waits) - 1)] * 1000, 1) if waits else 0.0
+        return {
+            'in_flight': in_flight,
+            'queued': queued,
+            'max_in_flight': self.max_in_flight,
+            'cooldown_seconds': round(max(self._cooldown_remaining(), 0.0), 2),
+            'queue_wait_ms': {'p50': percentile(0.5), 'p95': percentile(0.95), 'max': percentile(1.0)},
+            **{key: self.stats[key] for key in ('admitted', 'rejected', 'rate_limited', 'retries')},
+        }
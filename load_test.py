@@ -0,0 +1,265 @@
+"""
+Load Test Harness for Unity Catalog Chatbot
+Compares gunicorn worker profiles under concurrent chat requests against stubbed backends
+
+Usage:
+    python load_test.py --profiles sync,gthread --concurrency 32 --requests 400
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import Dict, List
+
+# Stub backend latency, passed to the server subprocess through the environment
+LLM_LATENCY_ENV = "LOADTEST_LLM_LATENCY"
+SDK_LATENCY_ENV = "LOADTEST_SDK_LATENCY"
+
+# Every chat must reach the (stubbed) model, or repeated messages stop measuring the worker profile
+UNCACHED_ENV = {
+    "ENABLE_INTENT_CACHE": "false",
+    "ENABLE_SPECULATION": "false",
+    "ENABLE_CONVERSATION_MEMORY": "false",
+}
+
+
+# ==================== STUBBED BACKENDS ====================
+
+class _StubAPI:
+    """Databricks API group whose every call sleeps and returns canned objects"""
+
+    def __init__(self, latency: float, items: List):
+        self._latency = latency
+        self._items = items
+
+    def list(self, *args, **kwargs):
+        time.sleep(self._latency)
+        return list(self._items)
+
+    def get(self, *args, **kwargs):
+        time.sleep(self._latency)
+        return self._items[0]
+
+
+class StubWorkspaceClient:
+    """In-process stand-in for WorkspaceClient with fixed per-call latency"""
+
+    def __init__(self, latency: float = 0.05):
+        catalog = SimpleNamespace(name="main", owner="admin", comment="stub catalog")
+        self.catalogs = _StubAPI(latency, [catalog])
+        self.schemas = _StubAPI(latency, [])
+        self.tables = _StubAPI(latency, [])
+
+
+class StubClaudeClient:
+    """In-process stand-in for anthropic.Anthropic with fixed response latency"""
+
+    def __init__(self, latency: float = 0.5):
+        self.messages = SimpleNamespace(create=self._create)
+        self._latency = latency
+
+    def _create(self, **kwargs):
+        time.sleep(self._latency)
+        text = json.dumps({
+            "intent": "listCatalogs",
+            "params": {},
+            "explanation": "Will list all catalogs"
+        })
+        return SimpleNamespace(content=[SimpleNamespace(text=text, type="text")])
+
+
+def stub_app():
+    """WSGI entry point: the real Flask app wired to stubbed backends"""
+    import app as app_module
+    from unity_catalog_service import UnityCatalogService
+
+    service = UnityCatalogService(workspace_url="https://stub", token="stub")
+    service.client = StubWorkspaceClient(float(os.getenv(SDK_LATENCY_ENV, "0.05")))
+
+    app_module.uc_service = service
+    app_module.claude_client = StubClaudeClient(float(os.getenv(LLM_LATENCY_ENV, "0.5")))
+    app_module.intent_cache = None
+    return app_module.app
+
+
+# ==================== LOAD DRIVER ====================
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of samples"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def _send(url: str, payload: bytes = None, timeout: float = 60) -> float:
+    """Issue one request and return its latency; raises on failure"""
+    headers = {'Content-Type': 'application/json'} if payload is not None else {}
+    req = urllib.request.Request(url, data=payload, headers=headers)
+    start = time.perf_counter()
+    with urllib.request.urlopen(req, timeout=timeout) as response:
+        response.read()
+    return time.perf_counter() - start
+
+
+def run_load(url: str, payload: Dict = None, concurrency: int = 16, total: int = 200,
+             payloads: List[Dict] = None) -> Dict:
+    """
+    Drive `total` requests at `url` with `concurrency` clients and summarize.
+
+    A single `payload` is POSTed on every request; `payloads` are cycled
+    through in order. With neither, requests are plain GETs.
+    """
+    if payloads is None and payload is not None:
+        payloads = [payload]
+    bodies = [json.dumps(p).encode() for p in payloads] if payloads else [None]
+    latencies, errors = [], 0
+
+    def worker(i):
+        try:
+            return _send(url, bodies[i % len(bodies)])
+        except (urllib.error.URLError, OSError):
+            return None
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for latency in pool.map(worker, range(total)):
+            if latency is None:
+                errors += 1
+            else:
+                latencies.append(latency)
+    elapsed = time.perf_counter() - start
+
+    return {
+        'requests': total,
+        'errors': errors,
+        'concurrency': concurrency,
+        'duration_s': round(elapsed, 3),
+        'rps': round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 1),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 1),
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 1) if latencies else 0.0,
+    }
+
+
+# ==================== SERVER LIFECYCLE ====================
+
+def free_port() -> int:
+    """Ask the OS for an unused local port"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_health(base_url: str, timeout: float = 30) -> None:
+    """Block until the server answers /api/health"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            _send(f"{base_url}/api/health", timeout=1)
+            return
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not become healthy")
+
+
+def start_server(port: int, worker_class: str, workers: int, threads: int,
+                 env: Dict = None, app_uri: str = "load_test:stub_app()") -> subprocess.Popen:
+    """Launch server.py in a subprocess with the given worker profile; `env` may re-enable caching"""
+    child_env = dict(os.environ, **UNCACHED_ENV, **(env or {}))
+    child_env.update({
+        'SERVER_HOST': '127.0.0.1',
+        'SERVER_PORT': str(port),
+        'SERVER_WORKER_CLASS': worker_class,
+        'SERVER_WORKERS': str(workers),
+        'SERVER_THREADS': str(threads),
+        'LOG_LEVEL': 'WARNING',
+    })
+    code = f"import server; server.main(app_uri={app_uri!r})"
+    return subprocess.Popen(
+        [sys.executable, "-c", code],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=child_env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def stop_server(process: subprocess.Popen) -> None:
+    """Terminate a server subprocess and reap it"""
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def compare_profiles(profiles: List[str], workers: int, threads: int,
+                     concurrency: int, total: int, llm_latency: float,
+                     sdk_latency: float) -> List[Dict]:
+    """Run the same chat load against each worker profile in turn"""
+    results = []
+    env = {LLM_LATENCY_ENV: str(llm_latency), SDK_LATENCY_ENV: str(sdk_latency)}
+
+    for worker_class in profiles:
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        process = start_server(port, worker_class, workers, threads, env=env)
+        try:
+            wait_for_health(base_url)
+            summary = run_load(
+                f"{base_url}/api/chat",
+                payload={'message': 'List all catalogs'},
+                concurrency=concurrency,
+                total=total,
+            )
+        finally:
+            stop_server(process)
+
+        summary.update({'worker_class': worker_class, 'workers': workers, 'threads': threads})
+        results.append(summary)
+
+    return results
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Chat endpoint load test against stubbed backends")
+    parser.add_argument("--profiles", default="sync,gthread", help="Comma-separated worker classes")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Seconds per stubbed Claude call")
+    parser.add_argument("--sdk-latency", type=float, default=0.05, help="Seconds per stubbed SDK call")
+    args = parser.parse_args(argv)
+
+    results = compare_profiles(
+        profiles=[p.strip() for p in args.profiles.split(',') if p.strip()],
+        workers=args.workers,
+        threads=args.threads,
+        concurrency=args.concurrency,
+        total=args.requests,
+        llm_latency=args.llm_latency,
+        sdk_latency=args.sdk_latency,
+    )
+
+    print(f"{'profile':<10} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for r in results:
+        print(f"{r['worker_class']:<10} {r['rps']:>8} {r['p50_ms']:>9} {r['p95_ms']:>9} "
+              f"{r['p99_ms']:>9} {r['errors']:>7}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Metadata Cache
+In-memory TTL cache for Unity Catalog listings, shared by the service, warm-up and prefetching,
+and the set of objects known to exist that idempotent creates consult
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class MetadataCache:
+    """
+    Bounded LRU cache of listing results with a freshness TTL.
+
+    A TTL of 0 disables serving from the cache; entries are still recorded
+    so callers can inspect what is known about the workspace.
+    """
+
+    def __init__(self, ttl: float = 0, max_entries: int = 5000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Fresh value for `key`, or None on a miss or while disabled"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or not self.enabled or time.monotonic() - entry[0] > self.ttl:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """Last recorded value for `key` regardless of freshness"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[1] if entry else None
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *keys: Hashable) -> None:
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def items(self):
+        """Snapshot of (key, value) pairs, oldest first"""
+        with self._lock:
+            return [(key, entry[1]) for key, entry in self._entries.items()]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+class KnownObjects:
+    """
+    Full names of catalogs, schemas and tables known to exist, with a freshness TTL.
+
+    Filled from listings and successful creates so idempotent creates can skip
+    the API call; names are compared case-insensitively, like Unity Catalog does.
+    """
+
+    def __init__(self, ttl: float = 300, max_entries: int = 100000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._seen: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, *full_names: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            for name in full_names:
+                key = name.lower()
+                self._seen[key] = now
+                self._seen.move_to_end(key)
+            while len(self._seen) > self.max_entries:
+                self._seen.popitem(last=False)
+
+    def __contains__(self, full_name: str) -> bool:
+        with self._lock:
+            seen_at = self._seen.get(full_name.lower())
+            return seen_at is not None and time.monotonic() - seen_at <= self.ttl
+
+    def discard(self, full_name: str) -> None:
+        """Forget an object and everything under it"""
+        key = full_name.lower()
+        with self._lock:
+            for name in [name for name in self._seen if name == key or name.startswith(f"{key}.")]:
+                del self._seen[name]
+
+    def __len__(self) -> int:
+        return len(self._seen)
@@ -0,0 +1,501 @@
+"""
+Metadata Export
+Streams the Unity Catalog inventory (catalogs, schemas, tables, columns, grants) into a local
+SQLite database or Parquet files with bounded parallel fetching and batched writes, and answers
+inventory questions from the exported store
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import shutil
+import sqlite3
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from column_index import _type_name
+
+logger = logging.getLogger(__name__)
+
+# Column layout of every exported record type
+RECORD_FIELDS = {
+    'catalogs': ('name', 'owner', 'comment'),
+    'schemas': ('catalog', 'name', 'full_name', 'owner', 'comment'),
+    'tables': ('catalog', 'schema', 'name', 'full_name', 'owner', 'table_type',
+               'data_source_format', 'comment', 'created_at', 'updated_at'),
+    'columns': ('table_full_name', 'name', 'type', 'position', 'nullable', 'comment'),
+    'grants': ('securable_type', 'full_name', 'principal', 'privilege'),
+}
+
+SQLITE_SCHEMA = """
+CREATE TABLE catalogs (name TEXT PRIMARY KEY, owner TEXT, comment TEXT);
+CREATE TABLE schemas (catalog TEXT, name TEXT, full_name TEXT PRIMARY KEY, owner TEXT, comment TEXT);
+CREATE TABLE tables (catalog TEXT, schema TEXT, name TEXT, full_name TEXT PRIMARY KEY, owner TEXT,
+                     table_type TEXT, data_source_format TEXT, comment TEXT,
+                     created_at INTEGER, updated_at INTEGER);
+CREATE TABLE columns (table_full_name TEXT, name TEXT, type TEXT, position INTEGER,
+                      nullable INTEGER, comment TEXT);
+CREATE TABLE grants (securable_type TEXT, full_name TEXT, principal TEXT, privilege TEXT);
+CREATE TABLE export_runs (started_at REAL, finished_at REAL, stats TEXT);
+CREATE INDEX idx_tables_owner ON tables (owner);
+CREATE INDEX idx_columns_table ON columns (table_full_name);
+CREATE INDEX idx_columns_name ON columns (name);
+CREATE INDEX idx_grants_principal ON grants (principal);
+CREATE INDEX idx_grants_object ON grants (full_name);
+"""
+
+
+# ==================== SINKS ====================
+
+class SQLiteSink:
+    """Writes records into a fresh SQLite file and swaps it into place on close"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._tmp_path = f"{path}.tmp"
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+        self._conn = sqlite3.connect(self._tmp_path)
+        self._conn.executescript("PRAGMA journal_mode=OFF; PRAGMA synchronous=OFF;" + SQLITE_SCHEMA)
+
+    def write(self, kind: str, rows: List[Tuple]) -> None:
+        placeholders = ", ".join("?" * len(RECORD_FIELDS[kind]))
+        self._conn.executemany(f"INSERT OR REPLACE INTO {kind} VALUES ({placeholders})", rows)
+        self._conn.commit()
+
+    def close(self, stats: Dict) -> None:
+        self._conn.execute("INSERT INTO export_runs VALUES (?, ?, ?)",
+                           (stats['started_at'], stats['finished_at'], json.dumps(stats)))
+        self._conn.commit()
+        self._conn.close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self) -> None:
+        self._conn.close()
+        os.remove(self._tmp_path)
+
+
+class ParquetSink:
+    """Writes one Parquet file per record type, one row group per batch (requires pyarrow)"""
+
+    def __init__(self, directory: str):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)")
+        self._pa, self._pq = pyarrow, pyarrow.parquet
+        self.directory = directory
+        self._tmp_dir = f"{directory.rstrip(os.sep)}.tmp"
+        shutil.rmtree(self._tmp_dir, ignore_errors=True)
+        os.makedirs(self._tmp_dir)
+        self._writers: Dict[str, object] = {}
+
+    def write(self, kind: str, rows: List[Tuple]) -> None:
+        fields = RECORD_FIELDS[kind]
+        batch = self._pa.table({name: [row[i] for row in rows] for i, name in enumerate(fields)})
+        writer = self._writers.get(kind)
+        if writer is None:
+            writer = self._writers[kind] = self._pq.ParquetWriter(
+                os.path.join(self._tmp_dir, f"{kind}.parquet"), batch.schema)
+        writer.write_table(batch.cast(writer.schema))
+
+    def close(self, stats: Dict) -> None:
+        for writer in self._writers.values():
+            writer.close()
+        with open(os.path.join(self._tmp_dir, "export_run.json"), "w") as fh:
+            json.dump(stats, fh)
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.replace(self._tmp_dir, self.directory)
+
+    def abort(self) -> None:
+        for writer in self._writers.values():
+            writer.close()
+        shutil.rmtree(self._tmp_dir, ignore_errors=True)
+
+
+# ==================== EXPORT PIPELINE ====================
+
+class StepResult(NamedTuple):
+    """Rows produced by one fetch step, the items it fans out to, and API calls spent"""
+    records: Dict[str, List[Tuple]]
+    follow_up: List
+    api_calls: int = 1
+
+
+class MetadataExporter:
+    """
+    Walks catalogs -> schemas -> tables (with columns) -> grants into a sink.
+
+    Fetches run on a bounded thread pool with a bounded number of requests
+    in flight; rows are buffered per record type and written in batches
+    from the calling thread, so the sink never needs to be thread-safe.
+    """
+
+    def __init__(self, uc_service, sink, max_workers: int = 8, batch_size: int = 500,
+                 include_grants: bool = True, catalogs: List[str] = None,
+                 progress: Callable[[Dict], None] = None):
+        self.uc_service = uc_service
+        self.sink = sink
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self.include_grants = include_grants
+        self.catalogs = catalogs
+        self.progress = progress
+        self.stats: Dict = {kind: 0 for kind in RECORD_FIELDS}
+        self.stats.update({'api_calls': 0, 'errors': []})
+        self._buffers: Dict[str, List[Tuple]] = {kind: [] for kind in RECORD_FIELDS}
+
+    def run(self) -> Dict:
+        self.stats['started_at'] = time.time()
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="export") as pool:
+                catalogs = self._catalogs()
+                schema_jobs = [(self._list_schemas, (name,)) for name in catalogs]
+                schemas = [s for batch in self._fan_out(pool, schema_jobs) for s in batch]
+
+                table_jobs = [(self._list_tables, schema) for schema in schemas]
+                tables = [t for batch in self._fan_out(pool, table_jobs) for t in batch]
+
+                if self.include_grants:
+                    securables = [('CATALOG', name) for name in catalogs]
+                    securables += [('SCHEMA', f"{c}.{s}") for c, s in schemas]
+                    securables += [('TABLE', name) for name in tables]
+                    list(self._fan_out(pool, [(self._grants, s) for s in securables]))
+            self._flush_all()
+        except BaseException:
+            self.sink.abort()
+            raise
+        self.stats['finished_at'] = time.time()
+        self.stats['seconds'] = round(self.stats['finished_at'] - self.stats['started_at'], 3)
+        self.sink.close(self.stats)
+        return self.stats
+
+    # ---------- fetch stages (worker threads) ----------
+
+    def _catalogs(self) -> List[str]:
+        result = self.uc_service.list_catalogs()
+        self.stats['api_calls'] += 1
+        if not result['success']:
+            raise RuntimeError(result['message'])
+        rows = [(c['name'], c['owner'], c['comment']) for c in result['catalogs']
+                if self.catalogs is None or c['name'] in self.catalogs]
+        self._emit('catalogs', rows)
+        return [row[0] for row in rows]
+
+    def _list_schemas(self, catalog: str) -> StepResult:
+        schemas = list(self.uc_service.client.schemas.list(catalog_name=catalog))
+        rows = [(catalog, s.name, s.full_name or f"{catalog}.{s.name}", s.owner, s.comment) for s in schemas]
+        return StepResult({'schemas': rows}, [(catalog, s.name) for s in schemas if s.name != 'information_schema'])
+
+    def _list_tables(self, catalog: str, schema: str) -> StepResult:
+        # Listings carry full table details including columns, so get_table is only a fallback
+        infos = list(self.uc_service.client.tables.list(
+            catalog_name=catalog, schema_name=schema, omit_columns=False))
+        missing = [i.full_name or f"{catalog}.{schema}.{i.name}" for i in infos if not i.columns]
+        details = {name: self.uc_service.client.tables.get(name) for name in missing}
+
+        table_rows, column_rows = [], []
+        for info in infos:
+            full_name = info.full_name or f"{catalog}.{schema}.{info.name}"
+            info = details.get(full_name, info)
+            table_rows.append((catalog, schema, info.name, full_name, info.owner,
+                               _enum_value(info.table_type), _enum_value(info.data_source_format),
+                               info.comment, info.created_at, info.updated_at))
+            for position, col in enumerate(info.columns or []):
+                column_rows.append((full_name, col.name, (col.type_text or _type_name(col.type_name)).lower(),
+                                    col.position if col.position is not None else position,
+                                    None if col.nullable is None else int(col.nullable), col.comment))
+        return StepResult({'tables': table_rows, 'columns': column_rows},
+                          [row[3] for row in table_rows], 1 + len(missing))
+
+    def _grants(self, securable_type: str, full_name: str) -> StepResult:
+        result = self.uc_service.show_grants(securable_type, full_name)
+        if not result['success']:
+            raise RuntimeError(result['message'])
+        rows = [(securable_type, full_name, p['principal'], privilege)
+                for p in result['permissions'] for privilege in p['privileges']]
+        return StepResult({'grants': rows}, [])
+
+    # ---------- orchestration (calling thread) ----------
+
+    def _fan_out(self, pool: ThreadPoolExecutor, jobs: List[Tuple[Callable, tuple]]) -> Iterator[List]:
+        """Run jobs with at most 2x max_workers in flight; yields each job's follow-up items"""
+        pending = {}
+        jobs = iter(jobs)
+        window = self.max_workers * 2
+        while True:
+            while len(pending) < window:
+                job = next(jobs, None)
+                if job is None:
+                    break
+                func, args = job
+                pending[pool.submit(func, *args)] = (func.__name__, args)
+            if not pending:
+                return
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, args = pending.pop(future)
+                try:
+                    step = future.result()
+                except Exception as e:
+                    self.stats['errors'].append(f"{name}{args}: {e}")
+                    logger.warning(f"Export step {name}{args} failed: {e}")
+                    continue
+                self.stats['api_calls'] += step.api_calls
+                for kind, rows in step.records.items():
+                    self._emit(kind, rows)
+                if self.progress is not None:
+                    # Calling thread, so a raised exception (e.g. cancellation) aborts the export
+                    self.progress(self.stats)
+                yield step.follow_up
+
+    def _emit(self, kind: str, rows: Iterable[Tuple]) -> None:
+        buffer = self._buffers[kind]
+        buffer.extend(rows)
+        if len(buffer) >= self.batch_size:
+            self._flush(kind)
+
+    def _flush(self, kind: str) -> None:
+        rows, self._buffers[kind] = self._buffers[kind], []
+        if rows:
+            self.sink.write(kind, rows)
+            self.stats[kind] += len(rows)
+
+    def _flush_all(self) -> None:
+        for kind in RECORD_FIELDS:
+            self._flush(kind)
+
+
+def _enum_value(value) -> Optional[str]:
+    return None if value is None else str(getattr(value, "value", value))
+
+
+def export_inventory(uc_service, sqlite_path: str = None, parquet_dir: str = None, **options) -> Dict:
+    """Export the inventory to a SQLite file and/or a Parquet directory"""
+    if not sqlite_path and not parquet_dir:
+        raise ValueError("Choose a SQLite path and/or a Parquet directory")
+    sinks = []
+    if sqlite_path:
+        sinks.append(SQLiteSink(sqlite_path))
+    if parquet_dir:
+        sinks.append(ParquetSink(parquet_dir))
+    sink = sinks[0] if len(sinks) == 1 else _TeeSink(sinks)
+    return MetadataExporter(uc_service, sink, **options).run()
+
+
+class _TeeSink:
+    def __init__(self, sinks):
+        self.sinks = sinks
+
+    def write(self, kind, rows):
+        for sink in self.sinks:
+            sink.write(kind, rows)
+
+    def close(self, stats):
+        for sink in self.sinks:
+            sink.close(stats)
+
+    def abort(self):
+        for sink in self.sinks:
+            sink.abort()
+
+
+# ==================== INVENTORY QUERIES ====================
+
+# Canned reports answered from the exported SQLite store; {filters} is replaced per call
+INVENTORY_REPORTS = {
+    'summary': (
+        "Object counts per catalog",
+        "SELECT c.name AS catalog, "
+        "(SELECT COUNT(*) FROM schemas s WHERE s.catalog = c.name) AS schemas, "
+        "(SELECT COUNT(*) FROM tables t WHERE t.catalog = c.name) AS tables, "
+        "(SELECT COUNT(*) FROM columns col JOIN tables t ON t.full_name = col.table_full_name "
+        " WHERE t.catalog = c.name) AS columns "
+        "FROM catalogs c WHERE 1=1 {catalog:c.name} ORDER BY tables DESC",
+    ),
+    'tablesByOwner': (
+        "Tables owned by a principal",
+        "SELECT full_name, table_type, data_source_format FROM tables "
+        "WHERE 1=1 {owner:owner} {catalog:catalog} ORDER BY full_name",
+    ),
+    'owners': (
+        "Table counts per owner",
+        "SELECT owner, COUNT(*) AS tables FROM tables WHERE 1=1 {catalog:catalog} "
+        "GROUP BY owner ORDER BY tables DESC",
+    ),
+    'undocumentedTables': (
+        "Tables without a comment",
+        "SELECT full_name, owner FROM tables WHERE (comment IS NULL OR comment = '') "
+        "{catalog:catalog} ORDER BY full_name",
+    ),
+    'grantsForPrincipal': (
+        "Privileges held by a principal",
+        "SELECT securable_type, full_name, privilege FROM grants WHERE 1=1 {principal:principal} "
+        "{catalog:substr(full_name, 1, instr(full_name || '.', '.') - 1)} ORDER BY full_name, privilege",
+    ),
+    'principalsWithPrivilege': (
+        "Principals holding a privilege",
+        "SELECT principal, securable_type, full_name FROM grants WHERE 1=1 {privilege:privilege} "
+        "{catalog:substr(full_name, 1, instr(full_name || '.', '.') - 1)} ORDER BY principal",
+    ),
+    'formats': (
+        "Tables per type and storage format",
+        "SELECT table_type, data_source_format, COUNT(*) AS tables FROM tables WHERE 1=1 "
+        "{catalog:catalog} GROUP BY table_type, data_source_format ORDER BY tables DESC",
+    ),
+    'largestSchemas': (
+        "Schemas with the most tables",
+        "SELECT catalog || '.' || schema AS schema, COUNT(*) AS tables FROM tables WHERE 1=1 "
+        "{catalog:catalog} GROUP BY catalog, schema ORDER BY tables DESC LIMIT 20",
+    ),
+}
+
+
+# sqlite3 authorizer actions an ad-hoc analytics query may perform
+_READ_ACTIONS = {sqlite3.SQLITE_SELECT, sqlite3.SQLITE_READ, sqlite3.SQLITE_FUNCTION, sqlite3.SQLITE_RECURSIVE}
+
+
+def inventory_schema() -> str:
+    """Compact description of the exported tables, for the SQL-writing prompt"""
+    return "\n".join(f"{kind}({', '.join(fields)})" for kind, fields in RECORD_FIELDS.items())
+
+
+class InventoryStore:
+    """Read-only access to an exported SQLite inventory"""
+
+    def __init__(self, path: str, max_rows: int = 200, query_timeout: float = 2.0):
+        self.path = path
+        self.max_rows = max_rows
+        self.query_timeout = query_timeout
+
+    @property
+    def available(self) -> bool:
+        return bool(self.path) and os.path.exists(self.path)
+
+    def connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+
+    def exported_at(self) -> Optional[float]:
+        with self.connect() as conn:
+            row = conn.execute("SELECT MAX(finished_at) FROM export_runs").fetchone()
+        return row[0] if row else None
+
+    def report(self, name: str, filters: Dict[str, str] = None) -> Dict:
+        """Run one canned report with optional catalog/owner/principal/privilege filters"""
+        if name not in INVENTORY_REPORTS:
+            return {
+                'success': False,
+                'message': f"Unknown inventory report '{name}'. Available: {', '.join(INVENTORY_REPORTS)}"
+            }
+
+        title, template = INVENTORY_REPORTS[name]
+        sql, args = _apply_filters(template, filters or {})
+        return self._run(title, sql, args)
+
+    def query(self, sql: str, title: str = "Inventory query") -> Dict:
+        """
+        Run one ad-hoc SELECT (e.g. written by the LLM from a question).
+
+        Besides the read-only connection, an authorizer rejects anything but
+        reads, and a progress handler aborts queries running past `query_timeout`.
+        """
+        sql = (sql or "").strip().rstrip(";").strip()
+        if not re.match(r"(?is)^(select|with)\b", sql):
+            return {'success': False, 'message': "Only a single SELECT query can run against the inventory",
+                    'sql': sql or None}
+        return self._run(title, sql, [], ad_hoc=True)
+
+    def _run(self, title: str, sql: str, args: List, ad_hoc: bool = False) -> Dict:
+        if not self.available:
+            return {
+                'success': False,
+                'message': "No inventory export found. Run `python metadata_export.py` first."
+            }
+
+        conn = self.connect()
+        try:
+            if ad_hoc:
+                conn.set_authorizer(
+                    lambda action, *_: sqlite3.SQLITE_OK if action in _READ_ACTIONS else sqlite3.SQLITE_DENY)
+                deadline = time.monotonic() + self.query_timeout
+                conn.set_progress_handler(lambda: time.monotonic() > deadline, 10000)
+            cursor = conn.execute(sql, args)
+            columns = [d[0] for d in cursor.description]
+            rows = [dict(zip(columns, row)) for row in cursor.fetchmany(self.max_rows + 1)]
+        except (sqlite3.DatabaseError, sqlite3.Warning) as e:
+            message = "took too long" if "interrupted" in str(e) else str(e)
+            return {'success': False, 'message': f"Inventory query failed: {message}", 'sql': sql}
+        finally:
+            conn.close()
+
+        truncated = len(rows) > self.max_rows
+        exported_at = self.exported_at()
+        return {
+            'success': True,
+            'message': f"{title}: {min(len(rows), self.max_rows)} row(s)"
+                       + (" (truncated)" if truncated else "")
+                       + (f", from export at {time.strftime('%Y-%m-%d %H:%M', time.localtime(exported_at))}"
+                          if exported_at else ""),
+            'rows': rows[:self.max_rows],
+            'columns': columns,
+            'sql': sql,
+        }
+
+
+def _apply_filters(template: str, filters: Dict[str, str]) -> Tuple[str, List]:
+    """Replace {name:expr} slots with `AND expr = ?` for provided filters, else drop them"""
+    args = []
+
+    def slot(match):
+        name, expr = match.group(1), match.group(2)
+        value = filters.get(name)
+        if not value:
+            return ""
+        args.append(value)
+        return f"AND {expr} = ?"
+
+    return re.sub(r"\{(\w+):([^}]+)\}", slot, template), args
+
+
+# ==================== CLI ====================
+
+def main(argv: List[str] = None) -> int:
+    from config import Config
+    from unity_catalog_service import UnityCatalogService
+
+    inventory = Config().inventory
+    parser = argparse.ArgumentParser(description="Export the Unity Catalog inventory")
+    parser.add_argument("--sqlite", default=inventory.sqlite_path,
+                        help="SQLite database to write, replaced atomically (default: INVENTORY_DB_PATH)")
+    parser.add_argument("--parquet", default=inventory.parquet_dir,
+                        help="Directory of Parquet files to write (requires pyarrow)")
+    parser.add_argument("--catalog", action="append", help="Limit to a catalog (repeatable)")
+    parser.add_argument("--workers", type=int, default=inventory.max_workers, help="Parallel API requests")
+    parser.add_argument("--batch-size", type=int, default=inventory.batch_size, help="Rows per write batch")
+    parser.add_argument("--no-grants", action="store_true", help="Skip per-object grant lookups")
+    args = parser.parse_args(argv)
+
+    stats = export_inventory(
+        UnityCatalogService(),
+        sqlite_path=args.sqlite,
+        parquet_dir=args.parquet,
+        max_workers=args.workers,
+        batch_size=args.batch_size,
+        include_grants=not args.no_grants,
+        catalogs=args.catalog,
+    )
+    print(json.dumps({k: v for k, v in stats.items() if k != 'errors'}, indent=2))
+    for error in stats['errors'][:20]:
+        print(f"  error: {error}")
+    return 0 if not stats['errors'] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,154 @@
+"""
+Metadata Prefetching
+Background warming of the metadata cache along the usual navigation path
+(schemas -> tables -> table details), ranked by access counts and bounded by an API budget
+"""
+
+import contextvars
+import logging
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+# Set while a prefetch runs so its own listings neither count as accesses nor chain further
+_prefetching: contextvars.ContextVar = contextvars.ContextVar("prefetching", default=False)
+
+
+class CallBudget:
+    """Token bucket limiting prefetch API calls per minute"""
+
+    def __init__(self, calls_per_minute: int):
+        self.capacity = max(calls_per_minute, 0)
+        self.tokens = float(self.capacity)
+        self.rate = self.capacity / 60.0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+class PrefetchScheduler:
+    """
+    Warms the cache for the objects a user is likely to open next.
+
+    The service reports listings and reads; after `list_schemas` the hottest
+    schemas' tables are listed, and after `list_tables` the hottest tables'
+    details are fetched. Work runs on a small thread pool, skips anything
+    already fresh or in flight, and stops when the call budget is spent.
+    """
+
+    def __init__(self, uc_service, max_workers: int = 2, max_per_trigger: int = 3,
+                 calls_per_minute: int = 120):
+        self.uc_service = uc_service
+        self.max_per_trigger = max_per_trigger
+        self.budget = CallBudget(calls_per_minute)
+        self.schema_hits: Counter = Counter()
+        self.table_hits: Counter = Counter()
+        self.stats: Counter = Counter()
+        self._in_flight = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+
+    @classmethod
+    def from_config(cls, uc_service, prefetch_config) -> "PrefetchScheduler":
+        return cls(
+            uc_service,
+            max_workers=prefetch_config.max_workers,
+            max_per_trigger=prefetch_config.max_per_trigger,
+            calls_per_minute=prefetch_config.calls_per_minute,
+        )
+
+    # ---------- events reported by UnityCatalogService ----------
+
+    def on_schemas_listed(self, catalog: str, schemas: List[Dict]) -> None:
+        if _prefetching.get():
+            return
+        names = [f"{catalog}.{schema['name']}" for schema in schemas]
+        for full_name in self._hottest(names, self.schema_hits):
+            schema = full_name.split('.', 1)[1]
+            self._submit(('tables', catalog, schema), self.uc_service.list_tables, catalog, schema)
+
+    def on_tables_listed(self, catalog: str, schema: str, tables: List[Dict]) -> None:
+        if _prefetching.get():
+            return
+        with self._lock:
+            self.schema_hits[f"{catalog}.{schema}"] += 1
+        names = [f"{catalog}.{schema}.{table['name']}" for table in tables]
+        for full_name in self._hottest(names, self.table_hits):
+            table = full_name.rsplit('.', 1)[1]
+            self._submit(('table', catalog, schema, table), self.uc_service.get_table, catalog, schema, table)
+
+    def on_table_read(self, catalog: str, schema: str, table: str) -> None:
+        if _prefetching.get():
+            return
+        with self._lock:
+            self.table_hits[f"{catalog}.{schema}.{table}"] += 1
+
+    # ---------- scheduling ----------
+
+    def _hottest(self, names: List[str], hits: Counter) -> List[str]:
+        """Up to max_per_trigger names, most accessed first (listing order breaks ties)"""
+        with self._lock:
+            ranked = sorted(range(len(names)), key=lambda i: (-hits[names[i]], i))
+        return [names[i] for i in ranked[:self.max_per_trigger]]
+
+    def _submit(self, key: tuple, fetch, *args) -> None:
+        fresh = self.uc_service.cache.get(key) is not None
+        with self._lock:
+            if fresh:
+                self.stats['skipped_cached'] += 1
+                return
+            if key in self._in_flight:
+                self.stats['skipped_in_flight'] += 1
+                return
+            if not self.budget.try_acquire():
+                self.stats['skipped_budget'] += 1
+                return
+            self._in_flight.add(key)
+            self.stats['submitted'] += 1
+        self._executor.submit(self._run, key, fetch, args)
+
+    def _run(self, key: tuple, fetch, args) -> None:
+        token = _prefetching.set(True)
+        outcome = 'failed'
+        try:
+            if fetch(*args).get('success'):
+                outcome = 'completed'
+        except Exception as e:
+            logger.debug(f"Prefetch of {key} failed: {e}")
+        finally:
+            _prefetching.reset(token)
+            with self._lock:
+                self.stats[outcome] += 1
+                self._in_flight.discard(key)
+
+    def drain(self, timeout: float = 5.0) -> bool:
+        """Wait for in-flight prefetches (tests and benchmarks)"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self._lock:
+                if not self._in_flight:
+                    return True
+            time.sleep(0.005)
+        return False
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                'stats': dict(self.stats),
+                'in_flight': len(self._in_flight),
+                'hot_schemas': self.schema_hits.most_common(5),
+                'hot_tables': self.table_hits.most_common(5),
+            }
@@ -0,0 +1,215 @@
+"""
+Per-Request Profiling
+Opt-in profiling of slow requests, triggered by a header or sampled at a configured rate,
+with results kept in a bounded store keyed by request ID
+"""
+
+import cProfile
+import functools
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from typing import Callable, Dict, List, Optional
+
+from flask import after_this_request, request
+
+logger = logging.getLogger(__name__)
+
+# Client request IDs are kept as a label only when they look like one
+_LABEL_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class StackSampler:
+    """
+    Background sampler that records the call stack of one thread.
+
+    Stacks are kept in collapsed form ("outer;inner;leaf" -> count), which
+    flamegraph.pl, speedscope and inferno consume directly.
+    """
+
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        """Collapsed stack lines, heaviest first"""
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+
+class ProfileStore:
+    """Bounded, thread-safe store of recent profiles, optionally mirrored to disk"""
+
+    def __init__(self, max_profiles: int = 50, directory: str = None):
+        self.max_profiles = max_profiles
+        self.directory = directory
+        self._profiles: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, profile: Dict) -> None:
+        with self._lock:
+            self._profiles[profile['request_id']] = profile
+            self._profiles.move_to_end(profile['request_id'])
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+
+        if self.directory:
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                base = os.path.join(self.directory, profile['request_id'])
+                with open(f"{base}.json", "w") as fh:
+                    json.dump(profile, fh)
+                with open(f"{base}.collapsed", "w") as fh:
+                    fh.write(profile['collapsed'])
+            except OSError as e:
+                logger.warning(f"Could not persist profile {profile['request_id']}: {e}")
+
+    def get(self, request_id: str) -> Optional[Dict]:
+        with self._lock:
+            return self._profiles.get(request_id)
+
+    def summaries(self) -> List[Dict]:
+        """Newest-first list of profiles without their stack payloads"""
+        with self._lock:
+            profiles = list(self._profiles.values())
+        return [
+            {key: value for key, value in profile.items() if key not in ('collapsed', 'top_functions')}
+            for profile in reversed(profiles)
+        ]
+
+
+class RequestProfiler:
+    """
+    Decides which requests to profile and runs the profilers around them.
+
+    The opt-in header is honored only when `authorize()` accepts the request
+    (without it, only sampling selects requests). Profiles are stored under
+    a server-generated id, returned in `X-Profile-Id`.
+    """
+
+    def __init__(self, enabled: bool = False, sample_rate: float = 0.0, header: str = "X-Profile",
+                 mode: str = "sampling", interval_ms: float = 5.0, max_profiles: int = 50,
+                 directory: str = None, authorize: Callable[[], bool] = None):
+        self.enabled = enabled
+        self.authorize = authorize
+        self.sample_rate = sample_rate
+        self.header = header
+        self.mode = mode
+        self.interval = interval_ms / 1000.0
+        self.store = ProfileStore(max_profiles=max_profiles, directory=directory)
+
+    @classmethod
+    def from_config(cls, profiling_config, authorize: Callable[[], bool] = None) -> "RequestProfiler":
+        return cls(
+            enabled=profiling_config.enabled,
+            sample_rate=profiling_config.sample_rate,
+            header=profiling_config.header,
+            mode=profiling_config.mode,
+            interval_ms=profiling_config.interval_ms,
+            max_profiles=profiling_config.max_profiles,
+            directory=profiling_config.directory,
+            authorize=authorize,
+        )
+
+    def should_profile(self) -> bool:
+        """Authorized header opt-in or random sampling; a cheap no-op when disabled"""
+        if not self.enabled:
+            return False
+        if request.headers.get(self.header, "").lower() in ("1", "true", "yes") and \
+                self.authorize is not None and self.authorize():
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def wrap(self, view: Callable) -> Callable:
+        """Decorate a Flask view so selected requests are profiled"""
+        @functools.wraps(view)
+        def profiled_view(*args, **kwargs):
+            if not self.should_profile():
+                return view(*args, **kwargs)
+            return self._run_profiled(view, args, kwargs)
+        return profiled_view
+
+    def _run_profiled(self, view, args, kwargs):
+        # Also the file name under the profile directory, so never taken from the client
+        request_id = uuid.uuid4().hex
+        label = request.headers.get("X-Request-ID", "")
+
+        @after_this_request
+        def tag_response(response):
+            response.headers["X-Profile-Id"] = request_id
+            return response
+
+        sampler = StackSampler(threading.get_ident(), self.interval).start()
+        deterministic = cProfile.Profile() if self.mode == "deterministic" else None
+
+        started = time.perf_counter()
+        if deterministic:
+            deterministic.enable()
+        try:
+            response = view(*args, **kwargs)
+        finally:
+            if deterministic:
+                deterministic.disable()
+            elapsed = time.perf_counter() - started
+            sampler.stop()
+            self.store.add({
+                'request_id': request_id,
+                'label': label if _LABEL_RE.match(label) else None,
+                'path': request.path,
+                'method': request.method,
+                'started_at': time.time() - elapsed,
+                'duration_ms': round(elapsed * 1000, 2),
+                'mode': self.mode,
+                'samples': sampler.samples,
+                'collapsed': sampler.collapsed(),
+                'top_functions': _top_functions(deterministic) if deterministic else [],
+            })
+        return response
+
+
+def _top_functions(profile: cProfile.Profile, limit: int = 30) -> List[Dict]:
+    """Heaviest functions by cumulative time from a deterministic profile"""
+    stats = pstats.Stats(profile, stream=io.StringIO())
+    rows = []
+    for (filename, lineno, name), (_, calls, total, cumulative, _) in stats.stats.items():
+        rows.append({
+            'function': f"{name} ({os.path.basename(filename)}:{lineno})",
+            'calls': calls,
+            'total_ms': round(total * 1000, 3),
+            'cumulative_ms': round(cumulative * 1000, 3),
+        })
+    rows.sort(key=lambda row: row['cumulative_ms'], reverse=True)
+    return rows[:limit]
@@ -0,0 +1,315 @@
+"""
+Record/Replay for the SDK and LLM Layers
+Captures WorkspaceClient and anthropic.Anthropic calls into a compact cassette file once,
+then replays them deterministically offline with original or compressed timing
+
+Usage:
+    CASSETTE_MODE=record CASSETTE_PATH=cassettes/prod.jsonl.gz python app.py
+    CASSETTE_MODE=replay CASSETTE_PATH=cassettes/prod.jsonl.gz CASSETTE_TIMING=0.1 python app.py
+
+Under gunicorn every worker records its own traffic; a "{pid}" in CASSETTE_PATH gives each
+worker its own file, and loading the same path merges all of them.
+"""
+
+import atexit
+import enum
+import glob
+import gzip
+import importlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from types import GeneratorType, SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+CASSETTE_VERSION = 1
+
+
+class CassetteMiss(KeyError):
+    """Raised when a replayed call has no recorded interaction"""
+
+
+class ReplayedError(RuntimeError):
+    """Stand-in for a recorded exception whose type cannot be rebuilt"""
+
+
+# ==================== ENCODING ====================
+
+def _type_path(obj_type: type) -> str:
+    return f"{obj_type.__module__}:{obj_type.__qualname__}"
+
+
+def _load_type(path: str) -> Optional[type]:
+    module_name, _, qualname = path.partition(":")
+    try:
+        target = importlib.import_module(module_name)
+        for part in qualname.split("."):
+            target = getattr(target, part)
+        return target
+    except (ImportError, AttributeError):
+        return None
+
+
+def encode(value: Any) -> Any:
+    """Turn SDK dataclasses, pydantic models and enums into JSON-safe data"""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, enum.Enum):
+        return {"__enum__": _type_path(type(value)), "value": value.value}
+    if isinstance(value, dict):
+        return {str(k): encode(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return [encode(v) for v in value]
+    if hasattr(value, "as_dict"):
+        # databricks-sdk dataclasses
+        return {"__type__": _type_path(type(value)), "data": value.as_dict()}
+    if hasattr(value, "model_dump"):
+        # anthropic pydantic models
+        return {"__type__": _type_path(type(value)), "data": value.model_dump(mode="json")}
+    if hasattr(value, "__dict__"):
+        return {"__ns__": {k: encode(v) for k, v in vars(value).items() if not k.startswith("_")}}
+    return repr(value)
+
+
+def decode(value: Any) -> Any:
+    """Rebuild objects produced by encode(), falling back to SimpleNamespace"""
+    if isinstance(value, list):
+        return [decode(v) for v in value]
+    if not isinstance(value, dict):
+        return value
+    if "__enum__" in value:
+        enum_type = _load_type(value["__enum__"])
+        return enum_type(value["value"]) if enum_type else value["value"]
+    if "__type__" in value:
+        obj_type = _load_type(value["__type__"])
+        data = value["data"]
+        if obj_type is not None and hasattr(obj_type, "from_dict"):
+            return obj_type.from_dict(data)
+        if obj_type is not None and hasattr(obj_type, "model_validate"):
+            return obj_type.model_validate(data)
+        return _namespace(data)
+    if "__ns__" in value:
+        return SimpleNamespace(**{k: decode(v) for k, v in value["__ns__"].items()})
+    return {k: decode(v) for k, v in value.items()}
+
+
+def _namespace(data: Any) -> Any:
+    if isinstance(data, dict):
+        return SimpleNamespace(**{k: _namespace(v) for k, v in data.items()})
+    if isinstance(data, list):
+        return [_namespace(v) for v in data]
+    return data
+
+
+def call_key(path: str, args: tuple, kwargs: Dict) -> str:
+    """
+    Canonical match key for one call.
+
+    LLM calls are matched on the final user message only, so prompt edits
+    do not invalidate a cassette recorded against an older system prompt.
+    """
+    if "messages" in kwargs:
+        messages = kwargs["messages"] or [{}]
+        return json.dumps([path, encode(messages[-1].get("content"))], sort_keys=True)
+    return json.dumps([path, encode(list(args)), encode(kwargs)], sort_keys=True)
+
+
+# ==================== CASSETTE ====================
+
+class Cassette:
+    """Ordered list of recorded interactions stored as gzip-compressed JSON lines"""
+
+    def __init__(self, path: str = None):
+        self.path = path
+        self.interactions: List[Dict] = []
+        self._lock = threading.Lock()
+
+    def add(self, interaction: Dict) -> None:
+        with self._lock:
+            self.interactions.append(interaction)
+
+    def save(self, path: str = None) -> str:
+        path = path or self.path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock, gzip.open(path, "wt", encoding="utf-8") as fh:
+            fh.write(json.dumps({"version": CASSETTE_VERSION}) + "\n")
+            for interaction in self.interactions:
+                fh.write(json.dumps(interaction, separators=(",", ":")) + "\n")
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> "Cassette":
+        """Read a cassette; a path with "{pid}" merges the files every recording worker wrote"""
+        cassette = cls(path)
+        paths = sorted(glob.glob(glob.escape(path).replace("{pid}", "*"))) if "{pid}" in path else [path]
+        if not paths:
+            raise FileNotFoundError(f"No cassette files match {path}")
+        for file_path in paths:
+            with gzip.open(file_path, "rt", encoding="utf-8") as fh:
+                header = json.loads(fh.readline() or "{}")
+                if header.get("version") != CASSETTE_VERSION:
+                    raise ValueError(f"Unsupported cassette version in {file_path}: {header.get('version')}")
+                cassette.interactions.extend(json.loads(line) for line in fh if line.strip())
+        return cassette
+
+
+# ==================== PROXIES ====================
+
+class RecordingProxy:
+    """Wraps a client and records every method call made through it"""
+
+    def __init__(self, target: Any, cassette: Cassette, client: str, path: str = ""):
+        object.__setattr__(self, "_target", target)
+        object.__setattr__(self, "_cassette", cassette)
+        object.__setattr__(self, "_client", client)
+        object.__setattr__(self, "_path", path)
+
+    def __getattr__(self, name):
+        value = getattr(self._target, name)
+        if isinstance(value, (str, int, float, bool, type(None))):
+            return value
+        path = f"{self._path}.{name}" if self._path else name
+        return RecordingProxy(value, self._cassette, self._client, path)
+
+    def __setattr__(self, name, value):
+        setattr(self._target, name, value)
+
+    def __call__(self, *args, **kwargs):
+        interaction = {"client": self._client, "call": self._path,
+                       "key": call_key(self._path, args, kwargs)}
+        start = time.perf_counter()
+        try:
+            result = self._target(*args, **kwargs)
+            if isinstance(result, GeneratorType) or (
+                    hasattr(result, "__next__") and hasattr(result, "__iter__")):
+                result = list(result)
+                interaction["iterator"] = True
+            interaction["result"] = encode(result)
+            return iter(result) if interaction.get("iterator") else result
+        except Exception as e:
+            interaction["error"] = {"type": _type_path(type(e)), "message": str(e)}
+            raise
+        finally:
+            interaction["elapsed"] = round(time.perf_counter() - start, 6)
+            self._cassette.add(interaction)
+
+
+class ReplayProxy:
+    """Serves calls from a cassette without touching the network"""
+
+    def __init__(self, cassette: Cassette, client: str, timing: float = 0.0,
+                 path: str = "", _state: Dict = None):
+        if _state is None:
+            queues = defaultdict(deque)
+            for interaction in cassette.interactions:
+                if interaction["client"] == client:
+                    queues[interaction["key"]].append(interaction)
+            _state = {"queues": queues, "last": {}, "calls": 0, "lock": threading.Lock()}
+        object.__setattr__(self, "_cassette", cassette)
+        object.__setattr__(self, "_client", client)
+        object.__setattr__(self, "_timing", timing)
+        object.__setattr__(self, "_path", path)
+        object.__setattr__(self, "_state", _state)
+
+    @property
+    def replayed_calls(self) -> int:
+        """Number of calls served from the cassette so far"""
+        return self._state["calls"]
+
+    def __getattr__(self, name):
+        path = f"{self._path}.{name}" if self._path else name
+        return _ReplayNode(self, path)
+
+    def _next_interaction(self, key: str) -> Dict:
+        state = self._state
+        with state["lock"]:
+            state["calls"] += 1
+            queue = state["queues"].get(key)
+            if queue:
+                interaction = queue.popleft()
+                state["last"][key] = interaction
+                return interaction
+            if key in state["last"]:
+                # Exhausted: keep answering with the final recorded response
+                return state["last"][key]
+        raise CassetteMiss(f"No recorded {self._client} interaction for {key}")
+
+    def _play(self, path: str, args: tuple, kwargs: Dict):
+        interaction = self._next_interaction(call_key(path, args, kwargs))
+        if self._timing:
+            time.sleep(interaction.get("elapsed", 0.0) * self._timing)
+        if "error" in interaction:
+            raise _rebuild_error(interaction["error"])
+        result = decode(interaction["result"])
+        return iter(result) if interaction.get("iterator") else result
+
+
+class _ReplayNode:
+    """Attribute chain under a ReplayProxy; calling it replays the recorded result"""
+
+    def __init__(self, root: ReplayProxy, path: str):
+        self._root = root
+        self._path = path
+
+    def __getattr__(self, name):
+        return _ReplayNode(self._root, f"{self._path}.{name}")
+
+    def __call__(self, *args, **kwargs):
+        return self._root._play(self._path, args, kwargs)
+
+
+def _rebuild_error(error: Dict) -> Exception:
+    error_type = _load_type(error["type"])
+    if isinstance(error_type, type) and issubclass(error_type, Exception):
+        try:
+            return error_type(error["message"])
+        except TypeError:
+            pass
+    return ReplayedError(f"{error['type']}: {error['message']}")
+
+
+# ==================== WIRING ====================
+
+def record(target: Any, cassette: Cassette, client: str) -> RecordingProxy:
+    """Wrap a live client so its calls are captured into `cassette`"""
+    return RecordingProxy(target, cassette, client)
+
+
+def replay(cassette: Cassette, client: str, timing: float = 0.0) -> ReplayProxy:
+    """
+    Build a stand-in client for `client` from a cassette.
+
+    `timing` scales recorded latencies: 1.0 replays original timing, 0.1
+    compresses it tenfold and 0 answers immediately.
+    """
+    return ReplayProxy(cassette, client, timing=timing)
+
+
+def install_from_env(uc_service, claude_client):
+    """
+    Apply CASSETTE_MODE/CASSETTE_PATH/CASSETTE_TIMING to freshly built services.
+
+    Returns the (possibly wrapped) Claude client; the Databricks client is
+    swapped on the service in place.
+    """
+    mode = os.getenv("CASSETTE_MODE", "").lower()
+    path = os.getenv("CASSETTE_PATH", "cassettes/session-{pid}.jsonl.gz")
+
+    if mode == "record":
+        # Each process saves at exit, so workers must not share one file
+        cassette = Cassette(path.replace("{pid}", str(os.getpid())))
+        atexit.register(cassette.save)
+        uc_service.client = record(uc_service.client, cassette, "databricks")
+        return record(claude_client, cassette, "anthropic")
+
+    if mode == "replay":
+        cassette = Cassette.load(path)
+        timing = float(os.getenv("CASSETTE_TIMING", "0"))
+        uc_service.client = replay(cassette, "databricks", timing)
+        return replay(cassette, "anthropic", timing)
+
+    return claude_client
@@ -0,0 +1,155 @@
+"""
+Securable Resolution
+Precomputed lookups for Unity Catalog privileges and securable types, and a single parser
+for dotted object paths shared by the service and intent execution
+"""
+
+import functools
+import re
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from startup import LazyImport
+
+catalog_sdk = LazyImport("databricks.sdk.service.catalog")
+
+# Spellings users and the LLM produce that differ from the enum names
+PRIVILEGE_ALIASES = {
+    'ALL': 'ALL_PRIVILEGES',
+    'READ': 'SELECT',
+    'WRITE': 'MODIFY',
+    'USE': 'USAGE',
+}
+
+SECURABLE_ALIASES = {
+    'DATABASE': 'SCHEMA',
+    'VIEW': 'TABLE',
+    'MATERIALIZED_VIEW': 'TABLE',
+    'MODEL': 'FUNCTION',
+    'LOCATION': 'EXTERNAL_LOCATION',
+    'CREDENTIAL': 'STORAGE_CREDENTIAL',
+}
+
+# WorkspaceClient API that owns `update(full_name, owner=...)` for each securable type
+OWNER_APIS = {
+    'CATALOG': 'catalogs',
+    'SCHEMA': 'schemas',
+    'TABLE': 'tables',
+    'VOLUME': 'volumes',
+    'FUNCTION': 'functions',
+    'EXTERNAL_LOCATION': 'external_locations',
+    'STORAGE_CREDENTIAL': 'storage_credentials',
+    'SHARE': 'shares',
+    'RECIPIENT': 'recipients',
+    'PROVIDER': 'providers',
+}
+
+# Securable type implied by the number of parts in an object path
+PATH_SECURABLE_TYPES = {1: 'CATALOG', 2: 'SCHEMA', 3: 'TABLE'}
+
+NAME_PART_RE = re.compile(r'^[A-Za-z0-9_\-]+$')
+
+
+def _normalize(value: str) -> str:
+    return re.sub(r'[\s\-]+', '_', value.strip().upper())
+
+
+@functools.lru_cache(maxsize=None)
+def privilege_lookup() -> Dict[str, object]:
+    """Every Privilege member keyed by normalized name, plus aliases (built once)"""
+    lookup = {member.name: member for member in catalog_sdk.Privilege}
+    for alias, name in PRIVILEGE_ALIASES.items():
+        lookup.setdefault(alias, lookup[name])
+    return lookup
+
+
+@functools.lru_cache(maxsize=None)
+def securable_type_lookup() -> Dict[str, object]:
+    """Every SecurableType member keyed by normalized name, plus aliases (built once)"""
+    lookup = {member.name: member for member in catalog_sdk.SecurableType}
+    for alias, name in SECURABLE_ALIASES.items():
+        lookup.setdefault(alias, lookup[name])
+    return lookup
+
+
+def resolve_privilege(privilege: str):
+    """Privilege enum for a user-supplied name such as 'select' or 'USE CATALOG'"""
+    member = privilege_lookup().get(_normalize(privilege or ''))
+    if member is None:
+        raise ValueError(f"Invalid privilege: {privilege}")
+    return member
+
+
+def resolve_securable_type(securable_type: str):
+    """SecurableType enum for a user-supplied name such as 'table' or 'external location'"""
+    member = securable_type_lookup().get(_normalize(securable_type or ''))
+    if member is None:
+        raise ValueError(f"Invalid securable type: {securable_type}")
+    return member
+
+
+def privilege_sql(privilege) -> str:
+    """SQL keyword form of a Privilege, e.g. USE_CATALOG -> USE CATALOG"""
+    return privilege.value.replace('_', ' ')
+
+
+def securable_sql(securable_type) -> str:
+    """SQL keyword form of a SecurableType, e.g. external_location -> EXTERNAL LOCATION"""
+    return securable_type.value.replace('_', ' ').upper()
+
+
+@dataclass(frozen=True)
+class ObjectPath:
+    """A parsed catalog[.schema[.table]] path"""
+    catalog: str
+    schema: Optional[str] = None
+    table: Optional[str] = None
+
+    @property
+    def depth(self) -> int:
+        return 1 + (self.schema is not None) + (self.table is not None)
+
+    @property
+    def full_name(self) -> str:
+        return '.'.join(part for part in (self.catalog, self.schema, self.table) if part)
+
+    @property
+    def securable_type(self) -> str:
+        return PATH_SECURABLE_TYPES[self.depth]
+
+    def as_dict(self) -> Dict[str, str]:
+        return {
+            key: value for key, value in
+            (('catalog', self.catalog), ('schema', self.schema), ('table', self.table))
+            if value is not None
+        }
+
+
+@functools.lru_cache(maxsize=4096)
+def parse_object_path(path: str) -> ObjectPath:
+    """
+    Parse and validate a dotted object path.
+
+    Backtick quoting is stripped from each part; empty parts, more than three
+    parts and characters Unity Catalog does not allow raise ValueError.
+    """
+    parts = [part.strip().strip('`') for part in (path or '').strip().split('.')]
+    if not 1 <= len(parts) <= 3 or not all(NAME_PART_RE.match(part) for part in parts):
+        raise ValueError(f"Invalid object path: {path}")
+    return ObjectPath(*parts)
+
+
+def qualify(name: str, catalog: str = None, schema: str = None, depth: int = 3) -> ObjectPath:
+    """
+    Parse `name` and fill its missing leading parts from `catalog`/`schema`.
+
+    qualify("analytics.customers", catalog="sales") -> sales.analytics.customers
+    """
+    path = parse_object_path(name)
+    missing = depth - path.depth
+    if missing < 0:
+        raise ValueError(f"Invalid object path: {name}")
+    prefix = [catalog, schema][:missing]
+    if missing and not all(prefix):
+        raise ValueError(f"'{name}' must be qualified as {'.'.join(['catalog', 'schema', 'table'][:depth])}")
+    return ObjectPath(*prefix, *[part for part in (path.catalog, path.schema, path.table) if part])
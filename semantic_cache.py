@@ -0,0 +1,252 @@
+"""
+Semantic Intent Cache
+Reuses earlier LLM parses for paraphrased or re-targeted messages: messages are reduced to
+templates with identifier slots, embedded with a hashed n-gram vectorizer (no model, no
+network) and matched by cosine similarity against templates parsed before
+"""
+
+import copy
+import math
+import re
+import threading
+import zlib
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+# Tokens: quoted or backticked text, dotted paths and words (column patterns keep '*'), punctuation
+_TOKEN_RE = re.compile(r"`[^`]+`|'[^']*'|\"[^\"]*\"|[\w*][\w*-]*(?:\.[\w*][\w*-]*)*|[^\w\s]")
+_WORD_RE = re.compile(r"[\w*][\w*-]*")
+
+# Words that change what a message means; two templates only match when these agree
+KEY_TERMS = {
+    **dict.fromkeys(("create", "make", "add"), "create"),
+    **dict.fromkeys(("grant", "give", "allow"), "grant"),
+    **dict.fromkeys(("revoke", "remove", "deny"), "revoke"),
+    **dict.fromkeys(("drop", "delete"), "drop"),
+    **dict.fromkeys(("owner", "ownership", "owns", "own"), "owner"),
+    **dict.fromkeys(("owned",), "owned"),
+    **dict.fromkeys(("catalog", "catalogs"), "catalog"),
+    **dict.fromkeys(("schema", "schemas", "database", "databases"), "schema"),
+    **dict.fromkeys(("table", "tables"), "table"),
+    **dict.fromkeys(("column", "columns", "field", "fields"), "column"),
+    **dict.fromkeys(("view", "views"), "view"),
+    **dict.fromkeys(("volume", "volumes"), "volume"),
+    **dict.fromkeys(("function", "functions"), "function"),
+    **dict.fromkeys(("grants", "permission", "permissions", "privilege", "privileges", "access"),
+                    "permissions"),
+    **dict.fromkeys(("details", "detail", "describe", "structure", "definition"), "details"),
+    **dict.fromkeys(("description", "descriptions", "comment", "comments", "documented",
+                     "undocumented"), "comment"),
+    **dict.fromkeys(("how", "many", "count", "number"), "count"),
+    **dict.fromkeys(("largest", "biggest"), "largest"),
+    **dict.fromkeys(("inventory",), "inventory"),
+    **dict.fromkeys(("export", "refresh"), "export"),
+    **dict.fromkeys(("not", "no", "without"), "not"),
+    **{word: word for word in (
+        "select", "modify", "usage", "use", "read", "write", "execute", "manage", "browse",
+        "string", "int", "integer", "bigint", "long", "timestamp", "date", "decimal", "double",
+        "float", "boolean", "binary", "each", "then", "help", "workspace", "medallion",
+    )},
+}
+
+# Filler: known words that are not identifiers and do not change the meaning
+FILLER = frozenset("""
+a an the me my our us we i you your it its this that these those them they there here
+show list display get see find view tell know let what which who where whose is are be
+was were exist exists existing available please can could would will should do does did
+have has had want need like to in on of for from by with into at under inside within about
+called named containing contains currently current now too also just and or only all
+every any some up new again same one info information kind sort type types
+""".split())
+
+SLOT = "#"
+# Parsed params whose values must come entirely from the message's identifiers to be reused
+IDENTIFIER_FIELDS = ("catalog", "schema", "table", "object", "principal", "owner", "column",
+                     "name", "comment")
+# Parses that depend on more than the message's identifiers
+UNCACHEABLE_INTENTS = ("complex", "analyticsQuery")
+
+_MARKER_RE = re.compile("\x00(\\d+)\x00")
+_DIMENSIONS = 1 << 20
+
+
+@dataclass
+class Template:
+    """A message reduced to its meaning and the identifiers filling it"""
+    text: str
+    slots: List[str]
+    gate: Tuple
+    vector: Dict[int, float] = field(default_factory=dict)
+
+
+def template(message: str) -> Template:
+    """
+    Split a message into template words and identifier slots.
+
+    Quoted text, dotted paths, and words outside the known vocabulary (or with
+    '_', digits or '*') are identifiers. The gate (key terms plus the word
+    before and depth of each path) must match exactly between two templates.
+    """
+    words: List[str] = []
+    slots: List[str] = []
+    keys = set()
+    shape = []
+    for token in _TOKEN_RE.findall(message or ""):
+        lower = token.lower()
+        if token[0] in "`'\"":
+            parts = [token[1:-1]]
+        elif "." in token:
+            parts = token.split(".")
+        elif lower in KEY_TERMS:
+            words.append(lower)
+            keys.add(KEY_TERMS[lower])
+            continue
+        elif lower in FILLER and not any(char.isdigit() or char in "_*" for char in token):
+            words.append(lower)
+            continue
+        elif token[0].isalnum() or token[0] in "_*":
+            parts = [token]
+        else:
+            continue
+        shape.append((words[-1] if words else "", len(parts)))
+        words.append(".".join(SLOT for _ in parts))
+        slots.extend(parts)
+    return Template(" ".join(words), slots, (tuple(sorted(keys)), tuple(shape)))
+
+
+def embed(text: str) -> Dict[int, float]:
+    """L2-normalized hashed vector of a template's words and word bigrams; key terms weigh most"""
+    words = text.split()
+    weights: Counter = Counter()
+    for word in words:
+        weights[word] += 3.0 if word in KEY_TERMS else 1.0 if SLOT in word else 0.5
+    for left, right in zip(words, words[1:]):
+        weights[f"{left} {right}"] += 0.5
+    vector: Dict[int, float] = {}
+    for feature, weight in weights.items():
+        index = zlib.crc32(feature.encode()) % _DIMENSIONS
+        vector[index] = vector.get(index, 0.0) + weight
+    norm = math.sqrt(sum(value * value for value in vector.values())) or 1.0
+    return {index: value / norm for index, value in vector.items()}
+
+
+def cosine(a: Dict[int, float], b: Dict[int, float]) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(value * b.get(index, 0.0) for index, value in a.items())
+
+
+def _abstract(value: Any, slots: Dict[str, int], identifier: bool = False) -> Tuple[Any, bool]:
+    """
+    `value` with identifier occurrences replaced by slot markers, and whether
+    every identifier field was fully made of slots.
+    """
+    if isinstance(value, dict):
+        result, covered = {}, True
+        for key, item in value.items():
+            result[key], ok = _abstract(item, slots, key in IDENTIFIER_FIELDS)
+            covered = covered and ok
+        return result, covered
+    if isinstance(value, list):
+        items = [_abstract(item, slots, identifier) for item in value]
+        return [item for item, _ in items], all(ok for _, ok in items)
+    if not isinstance(value, str):
+        return value, True
+    if value.lower() in slots:
+        return f"\x00{slots[value.lower()]}\x00", True
+
+    def replace(match):
+        index = slots.get(match.group(0).lower())
+        return match.group(0) if index is None else f"\x00{index}\x00"
+    text = _WORD_RE.sub(replace, value)
+    covered = not identifier or not _MARKER_RE.sub("", text).replace(".", "").strip()
+    return text, covered
+
+
+def _fill(value: Any, slots: List[str]) -> Any:
+    if isinstance(value, dict):
+        return {key: _fill(item, slots) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_fill(item, slots) for item in value]
+    if isinstance(value, str) and "\x00" in value:
+        return _MARKER_RE.sub(lambda match: slots[int(match.group(1))], value)
+    return value
+
+
+class SemanticIntentCache:
+    """
+    Nearest-neighbour cache of parses keyed by message template.
+
+    Entries are bucketed by gate, so only templates with the same key terms
+    and identifier layout are compared. Within a bucket the closest template
+    by cosine similarity is reused when it reaches `threshold`, with the new
+    message's identifiers substituted into the stored parse.
+    """
+
+    def __init__(self, threshold: float = 0.8, max_entries: int = 2000):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.stats: Counter = Counter()
+        self._entries: "OrderedDict[str, Tuple[Template, Dict]]" = OrderedDict()
+        self._buckets: Dict[Tuple, List[str]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, intent_cache_config) -> Optional["SemanticIntentCache"]:
+        if not intent_cache_config.enabled:
+            return None
+        return cls(intent_cache_config.threshold, intent_cache_config.max_entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, message: str) -> Optional[Dict]:
+        """A parse for `message` built from the closest cached template, or None"""
+        query = template(message)
+        self.stats['lookups'] += 1
+        with self._lock:
+            entry = self._entries.get(query.text)
+            if entry is None:
+                vector = embed(query.text)
+                best, best_score = None, self.threshold
+                for text in self._buckets.get(query.gate, ()):
+                    score = cosine(vector, self._entries[text][0].vector)
+                    if score >= best_score:
+                        best, best_score = self._entries[text], score
+                entry = best
+            if entry is None:
+                return None
+            self._entries.move_to_end(entry[0].text)
+        self.stats['hits'] += 1
+        return _fill(copy.deepcopy(entry[1]), query.slots)
+
+    def store(self, message: str, parsed: Dict) -> bool:
+        """Remember a parse; skipped when it uses anything beyond the message's identifiers"""
+        if parsed.get("intent") in UNCACHEABLE_INTENTS:
+            self.stats['skipped'] += 1
+            return False
+        entry = template(message)
+        lowered = [slot.lower() for slot in entry.slots]
+        if len(set(lowered)) != len(lowered):
+            self.stats['skipped'] += 1
+            return False
+        abstract, covered = _abstract(parsed, {slot: i for i, slot in enumerate(lowered)})
+        if not covered:
+            self.stats['skipped'] += 1
+            return False
+
+        entry.vector = embed(entry.text)
+        with self._lock:
+            if entry.text not in self._entries:
+                self._buckets.setdefault(entry.gate, []).append(entry.text)
+            self._entries[entry.text] = (entry, abstract)
+            self._entries.move_to_end(entry.text)
+            while len(self._entries) > self.max_entries:
+                text, (evicted, _) = self._entries.popitem(last=False)
+                self._buckets[evicted.gate].remove(text)
+        self.stats['stores'] += 1
+        return True
+
+    def hit_rate(self) -> float:
+        return self.stats['hits'] / self.stats['lookups'] if self.stats['lookups'] else 0.0
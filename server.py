@@ -0,0 +1,125 @@
+"""
+Production Server Launcher
+Runs the Flask app under gunicorn with a worker profile derived from Config
+"""
+
+import importlib.util
+import logging
+import os
+from typing import Dict, Optional
+
+from gunicorn.app.base import BaseApplication
+
+from config import Config, ServerConfig
+import startup
+
+logger = logging.getLogger(__name__)
+
+# Worker classes that need an optional event-loop package installed
+ASYNC_WORKER_MODULES = {
+    'gevent': 'gevent',
+    'eventlet': 'eventlet',
+}
+
+
+def resolve_worker_class(server: ServerConfig) -> str:
+    """
+    Pick the gunicorn worker class for a server configuration.
+
+    Chat requests spend most of their time waiting on Claude and the
+    Databricks API, so "auto" resolves to threaded workers: a slow call
+    occupies one thread instead of a whole worker process, and the worker
+    keeps heartbeating so gunicorn does not kill it at the timeout.
+    """
+    worker_class = server.worker_class
+
+    if worker_class == 'auto':
+        return 'gthread' if server.threads > 1 else 'sync'
+
+    module = ASYNC_WORKER_MODULES.get(worker_class)
+    if module and importlib.util.find_spec(module) is None:
+        logger.warning(f"{worker_class} is not installed, falling back to gthread workers")
+        return 'gthread'
+
+    return worker_class
+
+
+def build_gunicorn_options(config: Config) -> Dict:
+    """Translate the server section of Config into gunicorn settings"""
+    server = config.server
+    worker_class = resolve_worker_class(server)
+
+    options = {
+        'bind': f"{server.host}:{server.port}",
+        'workers': server.workers,
+        'worker_class': worker_class,
+        'timeout': server.timeout,
+        'graceful_timeout': server.graceful_timeout,
+        'keepalive': server.keepalive,
+        'preload_app': server.preload,
+        'accesslog': '-',
+        'errorlog': '-',
+        'loglevel': config.logging.level.lower(),
+    }
+
+    if worker_class == 'gthread':
+        options['threads'] = server.threads
+    elif worker_class in ASYNC_WORKER_MODULES:
+        # Each greenlet holds one in-flight request
+        options['worker_connections'] = server.threads * 125
+
+    if server.max_requests:
+        options['max_requests'] = server.max_requests
+        options['max_requests_jitter'] = max(1, server.max_requests // 10)
+
+    # Docker overlay filesystems make the default heartbeat file slow
+    if os.path.isdir('/dev/shm'):
+        options['worker_tmp_dir'] = '/dev/shm'
+
+    if config.startup.warm_up:
+        # Clients and sockets must not cross fork(), so warm each worker after boot
+        options['post_worker_init'] = lambda worker: startup.warm_up(config.startup)
+
+    return options
+
+
+class ChatbotServer(BaseApplication):
+    """Embedded gunicorn application serving the chatbot WSGI app"""
+
+    def __init__(self, options: Dict, app_uri: str = "app:app"):
+        self.options = options
+        self.app_uri = app_uri
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            if key in self.cfg.settings and value is not None:
+                self.cfg.set(key.lower(), value)
+
+    def load(self):
+        if self.cfg.preload_app:
+            # Heavy imports happen once in the master and are shared copy-on-write
+            startup.preload_imports()
+        module_name, attr = self.app_uri.split(':', 1)
+        module = importlib.import_module(module_name)
+        # "module:factory()" builds the app by calling the factory
+        if attr.endswith('()'):
+            return getattr(module, attr[:-2])()
+        return getattr(module, attr)
+
+
+def main(config: Optional[Config] = None, app_uri: str = "app:app"):
+    """Start gunicorn with the configured worker profile"""
+    config = config or Config()
+    config.server.validate()
+    config.audit.validate(config.server.workers)
+    config.conversation.validate(config.server.workers)
+    startup.configure_logging(config.logging)
+
+    options = build_gunicorn_options(config)
+    logger.info(f"Starting gunicorn with {options}")
+    ChatbotServer(options, app_uri=app_uri).run()
+
+
+if __name__ == "__main__":
+    main()
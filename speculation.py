@@ -0,0 +1,173 @@
+"""
+Speculative Reads
+Starts the read calls a chat message most likely needs (table details, a table listing or
+grants) while the LLM is still parsing it; a result is used only if the parsed intent asks
+for exactly the same call
+"""
+
+import contextvars
+import re
+import threading
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Dict, List, Optional, Tuple
+
+from securables import parse_object_path
+
+# (service method, *args), e.g. ('get_table', 'sales', 'bronze', 'orders')
+Call = Tuple[str, ...]
+
+# Two- or three-part dotted names such as sales_data.bronze.raw_orders, optionally backticked
+_PATH_RE = re.compile(
+    r"(?<![\w.`])(`?[A-Za-z_]\w*`?(?:\.`?[A-Za-z_]\w*`?){1,2})(?![\w`]|\.\w)"
+)
+
+# "e.g." or "app.py" look like paths but are not worth a call
+_FILE_SUFFIXES = {"py", "js", "jsx", "json", "csv", "txt", "md", "sql", "yaml", "yml", "html", "parquet"}
+
+# Messages that start with one of these change something; nothing is read ahead for them
+_WRITE_RE = re.compile(
+    r"^\W*(?:please\s+|can you\s+|could you\s+)?"
+    r"(?:create|make|add|grant|give|revoke|remove|drop|delete|rename|alter|set|change|transfer)\b",
+    re.IGNORECASE,
+)
+
+# Questions about who may do what on an object
+_GRANTS_RE = re.compile(
+    r"\b(?:permissions?|privileges|grants|who (?:can|has)|access (?:on|to|for))\b", re.IGNORECASE
+)
+
+
+def plan(message: str, max_calls: int = 2) -> List[Call]:
+    """Read calls worth starting for a message, in the order its objects appear"""
+    text = message or ""
+    if _WRITE_RE.match(text):
+        return []
+    wants_grants = bool(_GRANTS_RE.search(text))
+
+    calls: List[Call] = []
+    for match in _PATH_RE.finditer(text):
+        try:
+            path = parse_object_path(match.group(1).replace("`", ""))
+        except ValueError:
+            continue
+        parts = path.full_name.split(".")
+        if min(len(part) for part in parts) < 2 or parts[-1].lower() in _FILE_SUFFIXES:
+            continue
+        if wants_grants:
+            call = ('show_grants', path.securable_type, path.full_name)
+        elif path.depth == 3:
+            call = ('get_table', path.catalog, path.schema, path.table)
+        else:
+            call = ('list_tables', path.catalog, path.schema)
+        if call not in calls:
+            calls.append(call)
+    return calls[:max_calls]
+
+
+def intent_call(intent_data: Dict) -> Optional[Call]:
+    """The read call a parsed intent executes, in the same form `plan` produces"""
+    intent = intent_data.get("intent")
+    params = intent_data.get("params") or {}
+    try:
+        if intent == "getTableDetails":
+            path = parse_object_path(params.get("table", ""))
+            return ('get_table', path.catalog, path.schema, path.table) if path.depth == 3 else None
+        if intent == "listTables":
+            return ('list_tables', params.get("catalog"), params.get("schema"))
+        if intent == "showPermissions":
+            path = parse_object_path(params.get("object", ""))
+            securable_type = (params.get("securable_type") or path.securable_type).upper()
+            return ('show_grants', securable_type, path.full_name)
+    except ValueError:
+        pass
+    return None
+
+
+class Speculation:
+    """The reads started for one message"""
+
+    def __init__(self, futures: Dict[Call, Future], stats: Counter, wait_timeout: float):
+        self._futures = futures
+        self._stats = stats
+        self.wait_timeout = wait_timeout
+
+    @property
+    def calls(self) -> List[Call]:
+        return list(self._futures)
+
+    def take(self, intent_data: Dict) -> Optional[Dict]:
+        """
+        Result of the speculative read matching the parsed intent, waiting for
+        it if still running; None when nothing matched or the read failed.
+        The other reads are discarded.
+        """
+        call = intent_call(intent_data)
+        future = self._futures.pop(call, None) if call is not None else None
+        self.discard()
+        if future is None:
+            return None
+        try:
+            result = future.result(timeout=self.wait_timeout)
+        except FutureTimeout:
+            self._stats['timed_out'] += 1
+            return None
+        except Exception:
+            self._stats['failed'] += 1
+            return None
+        self._stats['used'] += 1
+        return result
+
+    def discard(self) -> None:
+        """Drop unused reads; ones not started yet are cancelled"""
+        for future in self._futures.values():
+            future.cancel()
+        self._stats['discarded'] += len(self._futures)
+        self._futures = {}
+
+
+class Speculator:
+    """
+    Runs speculative reads on a small shared thread pool.
+
+    Only side-effect-free service reads are started, at most `max_calls` per
+    message. Each runs in a copy of the caller's context so its spans stay
+    under the request's trace.
+    """
+
+    def __init__(self, enabled: bool = True, max_workers: int = 4, max_calls: int = 2,
+                 wait_timeout: float = 30.0):
+        self.enabled = enabled
+        self.max_calls = max_calls
+        self.wait_timeout = wait_timeout
+        self.stats: Counter = Counter()
+        self._max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, speculation_config) -> "Speculator":
+        return cls(
+            enabled=speculation_config.enabled,
+            max_workers=speculation_config.max_workers,
+            max_calls=speculation_config.max_calls,
+            wait_timeout=speculation_config.wait_timeout,
+        )
+
+    def start(self, uc_service, message: str) -> Speculation:
+        calls = plan(message, self.max_calls) if self.enabled else []
+        futures = {}
+        for call in calls:
+            method, *args = call
+            context = contextvars.copy_context()
+            futures[call] = self._pool().submit(context.run, getattr(uc_service, method), *args)
+        self.stats['started'] += len(futures)
+        return Speculation(futures, self.stats, self.wait_timeout)
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self._max_workers,
+                                                    thread_name_prefix="speculation")
+            return self._executor
@@ -0,0 +1,164 @@
+"""
+SQL Scripts
+Compiles a batch of creates and grants into one ordered SQL script and runs it on a SQL warehouse
+as a single compound (BEGIN ... END) statement instead of one REST call per object
+"""
+
+import re
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from securables import (
+    ObjectPath, parse_object_path, privilege_sql, resolve_privilege,
+    resolve_securable_type, securable_sql,
+)
+from startup import LazyImport
+
+sql_sdk = LazyImport("databricks.sdk.service.sql")
+
+# Statements run catalogs first, then schemas, tables, and finally grants and ownership
+PHASES = {'CATALOG': 0, 'SCHEMA': 1, 'TABLE': 2, 'GRANT': 3}
+
+# Column types such as BIGINT, DECIMAL(10,2) or ARRAY<STRING>; no quotes or separators
+_COLUMN_TYPE_RE = re.compile(r"^[A-Za-z][A-Za-z0-9_<>,:() ]*$")
+
+TERMINAL_STATES = ("SUCCEEDED", "FAILED", "CANCELED", "CLOSED")
+
+
+def quote_identifier(name: str) -> str:
+    return "`" + name.replace("`", "``") + "`"
+
+
+def quote_name(path: ObjectPath) -> str:
+    return ".".join(quote_identifier(part) for part in (path.catalog, path.schema, path.table) if part)
+
+
+def quote_string(text: str) -> str:
+    return "'" + text.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+class SqlScript:
+    """Ordered DDL and GRANT statements for one batch"""
+
+    def __init__(self):
+        self._statements: List[Tuple[int, int, str]] = []
+        self.objects: List[ObjectPath] = []
+        self.errors: List[Dict] = []
+
+    def __len__(self) -> int:
+        return len(self._statements)
+
+    @property
+    def statements(self) -> List[str]:
+        return [sql for _, _, sql in sorted(self._statements)]
+
+    def _add(self, phase: str, sql: str, path: ObjectPath) -> None:
+        self._statements.append((PHASES[phase], len(self._statements), sql))
+        self.objects.append(path)
+
+    def create(self, spec: Dict, if_not_exists: bool = True) -> None:
+        """Add a create from a batch spec ({'name', 'type', 'comment', 'columns'})"""
+        path = parse_object_path(spec.get('name'))
+        kind = spec.get('type', path.securable_type).upper()
+        if kind != path.securable_type:
+            raise ValueError(f"'{path.full_name}' is not a {kind.lower()} name")
+
+        sql = f"CREATE {kind} {'IF NOT EXISTS ' if if_not_exists else ''}{quote_name(path)}"
+        if kind == 'TABLE':
+            columns = spec.get('columns') or [{'name': 'id', 'type_name': 'BIGINT'}]
+            sql += " (\n  " + ",\n  ".join(self._column(col) for col in columns) + "\n) USING DELTA"
+        if spec.get('comment'):
+            sql += f" COMMENT {quote_string(spec['comment'])}"
+        self._add(kind, sql, path)
+
+    def grant(self, spec: Dict, revoke: bool = False) -> None:
+        """Add a GRANT (or REVOKE) from {'principal', 'privilege', 'object', 'securable_type'}"""
+        path = parse_object_path(spec.get('object'))
+        securable = securable_sql(resolve_securable_type(spec.get('securable_type') or path.securable_type))
+        privileges = spec.get('privilege')
+        if isinstance(privileges, str):
+            privileges = [privileges]
+        names = ", ".join(privilege_sql(resolve_privilege(privilege)) for privilege in privileges or [None])
+        if not spec.get('principal'):
+            raise ValueError("A principal is required")
+        target = "FROM" if revoke else "TO"
+        self._add('GRANT', f"{'REVOKE' if revoke else 'GRANT'} {names} ON {securable} {quote_name(path)} "
+                           f"{target} {quote_identifier(spec['principal'])}", path)
+
+    def set_owner(self, full_name: str, owner: str, securable_type: str = None) -> None:
+        path = parse_object_path(full_name)
+        securable = securable_sql(resolve_securable_type(securable_type or path.securable_type))
+        self._add('GRANT', f"ALTER {securable} {quote_name(path)} OWNER TO {quote_identifier(owner)}", path)
+
+    def render(self, compound: bool = True) -> str:
+        """The script as one compound statement, or as plain ';'-separated statements"""
+        if not compound:
+            return "".join(f"{sql};\n" for sql in self.statements)
+        indented = "".join("  " + sql.replace("\n", "\n  ") + ";\n" for sql in self.statements)
+        return f"BEGIN\n{indented}END"
+
+    @staticmethod
+    def _column(column: Dict) -> str:
+        type_name = str(column.get('type_name') or 'STRING').strip()
+        if not _COLUMN_TYPE_RE.match(type_name):
+            raise ValueError(f"Invalid column type: {type_name}")
+        sql = f"{quote_identifier(column['name'])} {type_name.upper()}"
+        if column.get('comment'):
+            sql += f" COMMENT {quote_string(column['comment'])}"
+        return sql
+
+
+def compile_batch(objects: Iterable[Dict] = (), grants: Iterable[Dict] = (),
+                  if_not_exists: bool = True) -> SqlScript:
+    """Script for a batch; invalid entries are collected in `script.errors` instead of raising"""
+    script = SqlScript()
+    for spec in objects or ():
+        try:
+            script.create(spec, if_not_exists=if_not_exists)
+        except (ValueError, KeyError, TypeError) as e:
+            script.errors.append({'name': spec.get('name'), 'message': str(e)})
+    for spec in grants or ():
+        try:
+            script.grant(spec, revoke=bool(spec.get('revoke')))
+        except (ValueError, KeyError, TypeError) as e:
+            script.errors.append({'name': spec.get('object'), 'message': str(e)})
+    return script
+
+
+class WarehouseExecutor:
+    """Runs one statement on a SQL warehouse through the Statement Execution API and waits for it"""
+
+    def __init__(self, client, warehouse_id: str, wait_timeout: str = "30s",
+                 poll_interval: float = 0.5, timeout: float = 600):
+        self.client = client
+        self.warehouse_id = warehouse_id
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+
+    def execute(self, statement: str) -> Dict:
+        api = self.client.statement_execution
+        response = api.execute_statement(
+            statement=statement,
+            warehouse_id=self.warehouse_id,
+            wait_timeout=self.wait_timeout,
+            on_wait_timeout=sql_sdk.ExecuteStatementRequestOnWaitTimeout.CONTINUE,
+        )
+        deadline = time.monotonic() + self.timeout
+        while _state(response) not in TERMINAL_STATES and time.monotonic() < deadline:
+            time.sleep(self.poll_interval)
+            response = api.get_statement(response.statement_id)
+
+        state = _state(response) or "UNKNOWN"
+        error = response.status.error if response.status else None
+        return {
+            'success': state == "SUCCEEDED",
+            'statement_id': response.statement_id,
+            'state': state,
+            'message': (error.message if error else None) or f"Statement {state.lower()}",
+        }
+
+
+def _state(response) -> Optional[str]:
+    state = response.status.state if response.status else None
+    return getattr(state, "value", state)
@@ -0,0 +1,151 @@
+"""
+Startup and Warm-Up
+Deferred heavy imports plus explicit warm-up of clients, connections and metadata at worker boot
+"""
+
+import importlib
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Modules that dominate import time; loaded once in the gunicorn master when preloading
+HEAVY_MODULES = (
+    "databricks.sdk",
+    "databricks.sdk.service.catalog",
+    "anthropic",
+)
+
+
+class LazyImport:
+    """
+    Stand-in for a module (or one of its attributes) imported on first use.
+
+    Attribute access and calls resolve the real object once and forward to
+    it, so `WorkspaceClient = LazyImport("databricks.sdk", "WorkspaceClient")`
+    can be used exactly like the eager import.
+    """
+
+    def __init__(self, module: str, attr: str = None):
+        self._module = module
+        self._attr = attr
+        self._target = None
+        self._lock = threading.Lock()
+
+    def _resolve(self) -> Any:
+        if self._target is None:
+            with self._lock:
+                if self._target is None:
+                    target = importlib.import_module(self._module)
+                    self._target = getattr(target, self._attr) if self._attr else target
+        return self._target
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self._resolve(), name)
+
+    def __call__(self, *args, **kwargs):
+        return self._resolve()(*args, **kwargs)
+
+    def __repr__(self) -> str:
+        target = f"{self._module}.{self._attr}" if self._attr else self._module
+        state = "loaded" if self._target is not None else "deferred"
+        return f"<LazyImport {target} ({state})>"
+
+
+def configure_logging(logging_config) -> None:
+    """
+    Root logging from a LoggingConfig section. Called by the process entry
+    point, never on import, and a no-op once the root logger has handlers.
+    """
+    handlers = [logging.StreamHandler()]
+    if logging_config.log_to_file:
+        directory = os.path.dirname(logging_config.log_file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        handlers.append(logging.FileHandler(logging_config.log_file_path))
+    logging.basicConfig(level=logging_config.level.upper(), format=logging_config.format, handlers=handlers)
+
+
+def preload_imports() -> Dict[str, float]:
+    """Import the heavy modules now; returns seconds spent per module"""
+    timings = {}
+    for module in HEAVY_MODULES:
+        started = time.perf_counter()
+        importlib.import_module(module)
+        timings[module] = round(time.perf_counter() - started, 4)
+    return timings
+
+
+def _preopen_databricks(uc_service) -> None:
+    # Cheapest authenticated call; leaves a pooled TLS connection behind
+    uc_service.client.current_user.me()
+
+
+def _preopen_anthropic(claude_client) -> None:
+    import httpx
+
+    try:
+        claude_client.get("/v1/models", cast_to=httpx.Response)
+    except Exception as e:
+        # Any HTTP answer means the connection is open and pooled
+        if getattr(e, "status_code", None) is None:
+            raise
+
+
+def warm_up(startup_config, prime_cache: Optional[bool] = None) -> Dict[str, Any]:
+    """
+    Build the app's clients and open their connections before traffic arrives.
+
+    Each step is best-effort: a failure is logged and reported but never
+    prevents the worker from serving.
+    """
+    import app as app_module
+
+    prime_cache = startup_config.prime_cache if prime_cache is None else prime_cache
+    report: Dict[str, Any] = {}
+
+    def step(name, func):
+        started = time.perf_counter()
+        try:
+            func()
+            report[name] = {'ok': True}
+        except Exception as e:
+            logger.warning(f"Warm-up step {name} failed: {e}")
+            report[name] = {'ok': False, 'error': str(e)}
+        report[name]['seconds'] = round(time.perf_counter() - started, 4)
+
+    step('imports', preload_imports)
+    step('clients', app_module._init_services)
+
+    if startup_config.preopen_connections:
+        uc, claude = app_module.uc_service, app_module.claude_client
+        if uc is not None:
+            step('databricks_connection', lambda: _preopen_databricks(uc))
+        if claude is not None:
+            step('anthropic_connection', lambda: _preopen_anthropic(claude))
+
+    # Resume background jobs a previous worker left unfinished (one worker at a time, see JobManager.recover)
+    step('jobs', app_module._job_manager)
+
+    if prime_cache and app_module.uc_service is not None:
+        step('metadata_cache', lambda: prime_metadata_cache(app_module.uc_service))
+
+    logger.info(f"Worker warm-up finished: {report}")
+    return report
+
+
+def prime_metadata_cache(uc_service, max_catalogs: int = 20) -> int:
+    """Fill the metadata cache with catalog and schema listings"""
+    catalogs = uc_service.list_catalogs()
+    if not catalogs.get('success'):
+        raise RuntimeError(catalogs.get('message'))
+    primed = 1
+    for catalog in catalogs['catalogs'][:max_catalogs]:
+        uc_service.list_schemas(catalog['name'])
+        primed += 1
+    return primed
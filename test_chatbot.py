@@ -2,6 +2,9 @@
 Test Suite for Unity Catalog Chatbot
 """
 
+import threading
+import time
+
 import pytest
 from unittest.mock import Mock, patch
 from unity_catalog_service import UnityCatalogService
@@ -282,3 +285,1641 @@ class TestPerformance:
         """Test listing large number of catalogs"""
         # Test performance with hundreds of catalogs
         pass
+
+
+class TestServerLauncher:
+    """Tests for the gunicorn worker profile"""
+
+    def test_auto_worker_class_uses_threads(self):
+        """Test auto resolves to threaded workers"""
+        from config import ServerConfig
+        from server import resolve_worker_class
+
+        assert resolve_worker_class(ServerConfig(worker_class="auto", threads=8)) == "gthread"
+        assert resolve_worker_class(ServerConfig(worker_class="auto", threads=1)) == "sync"
+
+    def test_gunicorn_options_follow_config(self, monkeypatch):
+        """Test gunicorn settings are derived from ServerConfig"""
+        from config import Config
+        from server import build_gunicorn_options
+
+        monkeypatch.setenv("SERVER_PORT", "7860")
+        monkeypatch.setenv("SERVER_WORKERS", "3")
+        monkeypatch.setenv("SERVER_TIMEOUT", "90")
+        monkeypatch.setenv("SERVER_THREADS", "16")
+
+        options = build_gunicorn_options(Config())
+
+        assert options['bind'].endswith(":7860")
+        assert options['workers'] == 3
+        assert options['timeout'] == 90
+        assert options['worker_class'] == "gthread"
+        assert options['threads'] == 16
+        assert options['preload_app'] is True
+
+    def test_invalid_worker_class_rejected(self):
+        """Test unknown worker classes fail validation"""
+        from config import ServerConfig
+
+        with pytest.raises(ValueError):
+            ServerConfig(worker_class="tornado").validate()
+
+
+class TestBenchmarkSuite:
+    """Tests for the fake backends and benchmark result comparison"""
+
+    def test_stub_parse_routes_sample_queries(self):
+        """Test the fake model maps sample queries to intents"""
+        from fake_backends import stub_parse
+
+        assert stub_parse("List all catalogs")['intent'] == 'listCatalogs'
+        grant = stub_parse("Grant SELECT on sales_data.bronze.raw_orders to data_analysts")
+        assert grant['intent'] == 'grantPermission'
+        assert grant['params']['object'] == 'sales_data.bronze.raw_orders'
+        assert grant['params']['principal'] == 'data_analysts'
+
+    def test_fake_databricks_lists_tables(self):
+        """Test the fake UC REST server answers table listings"""
+        import json
+        import urllib.request
+        from fake_backends import FakeDatabricksServer, FakeWorkspace
+
+        with FakeDatabricksServer(FakeWorkspace(catalogs=1, schemas=1, tables=3)) as server:
+            url = f"{server.url}/api/2.1/unity-catalog/tables?catalog_name=sales_data&schema_name=bronze"
+            with urllib.request.urlopen(url) as response:
+                payload = json.loads(response.read())
+
+        assert len(payload['tables']) == 3
+        assert payload['tables'][0]['full_name'] == 'sales_data.bronze.raw_orders'
+
+    def test_http_batch_scenario_runs_as_one_script(self, uc_service):
+        """Test the HTTP suite's batch payload is applied as one statement on the fake warehouse"""
+        from app import app
+        from benchmark import http_scenarios
+        from databricks.sdk import WorkspaceClient
+        from fake_backends import FakeDatabricksServer, FakeWorkspace
+
+        scenario = http_scenarios(batch_size=5)["batch_sql"]
+        with FakeDatabricksServer(FakeWorkspace(catalogs=1, schemas=1, tables=1)) as databricks:
+            uc_service.client = WorkspaceClient(host=databricks.url, token="dapi-benchmark-token")
+            uc_service.warehouse_id = "benchmark-warehouse"
+            with app.test_client() as client:
+                response = client.post(scenario["path"], json=scenario["payloads"][0])
+
+            assert response.get_json()['success'] is True
+            assert databricks.request_count == 1
+            assert databricks.sql.statements_run == 5
+
+    def test_compare_results_flags_regressions(self):
+        """Test throughput drops beyond the threshold are reported"""
+        from benchmark import compare_results
+
+        baseline = [{'suite': 'http', 'scenario': 'chat', 'concurrency': 8, 'rps': 100, 'p95_ms': 50}]
+        current = [{'suite': 'http', 'scenario': 'chat', 'concurrency': 8, 'rps': 70, 'p95_ms': 52}]
+
+        regressions = compare_results(baseline, current, max_regression=0.2)
+
+        assert len(regressions) == 1
+        assert 'rps' in regressions[0]
+
+
+class TestReplay:
+    """Tests for cassette record/replay"""
+
+    def test_encode_decode_sdk_objects(self):
+        """Test SDK dataclasses and enums survive a cassette round trip"""
+        from databricks.sdk.service.catalog import CatalogInfo, SecurableType
+        from replay import decode, encode
+
+        catalog = CatalogInfo(name="sales", owner="admin")
+
+        assert decode(encode(catalog)) == catalog
+        assert decode(encode(SecurableType.TABLE)) is SecurableType.TABLE
+
+    def test_record_then_replay(self, tmp_path, workspace_client):
+        """Test recorded calls replay offline with identical results"""
+        from databricks.sdk.service.catalog import CatalogInfo
+        from replay import Cassette, record, replay
+
+        workspace_client.catalogs.list.return_value = [CatalogInfo(name="sales", owner="admin")]
+        cassette = Cassette(str(tmp_path / "session.jsonl.gz"))
+        recorded = record(workspace_client, cassette, "databricks").catalogs.list()
+        cassette.save()
+
+        replayed = replay(Cassette.load(cassette.path), "databricks")
+
+        assert replayed.catalogs.list() == recorded
+        assert replayed.replayed_calls == 1
+
+    def test_replay_miss_raises(self):
+        """Test unrecorded calls fail loudly instead of reaching the network"""
+        from replay import Cassette, CassetteMiss, replay
+
+        with pytest.raises(CassetteMiss):
+            replay(Cassette(), "databricks").catalogs.get("missing")
+
+    def test_workers_record_separate_cassettes(self, tmp_path, monkeypatch, uc_service, workspace_client):
+        """Test each recording process saves its own file and loading the {pid} path merges them"""
+        import os
+        import replay as replay_module
+        from databricks.sdk.service.catalog import CatalogInfo
+        from replay import Cassette, install_from_env, record, replay
+
+        saves = []
+        monkeypatch.setattr(replay_module.atexit, "register", saves.append)
+        monkeypatch.setenv("CASSETTE_MODE", "record")
+        monkeypatch.setenv("CASSETTE_PATH", str(tmp_path / "session-{pid}.jsonl.gz"))
+        install_from_env(uc_service, Mock())
+        assert saves[0]() == str(tmp_path / f"session-{os.getpid()}.jsonl.gz")
+
+        # Another worker's recording of a different call
+        workspace_client.catalogs.get.return_value = CatalogInfo(name="sales", owner="admin")
+        other = Cassette(str(tmp_path / "session-99999999.jsonl.gz"))
+        record(workspace_client, other, "databricks").catalogs.get("sales")
+        other.save()
+
+        merged = Cassette.load(str(tmp_path / "session-{pid}.jsonl.gz"))
+        assert replay(merged, "databricks").catalogs.get("sales").owner == "admin"
+
+
+class TestProfiling:
+    """Tests for per-request profiling"""
+
+    def test_profiling_disabled_by_default(self):
+        """Test the default profiler never selects requests"""
+        from config import Config
+        from profiling import RequestProfiler
+
+        profiler = RequestProfiler.from_config(Config().profiling)
+        assert profiler.enabled is False
+
+    def test_header_triggers_profile(self, monkeypatch):
+        """Test an authorized profiled request is stored under a generated ID and labelled"""
+        import app as app_module
+        from profiling import RequestProfiler
+
+        profiler = RequestProfiler(enabled=True, mode="deterministic", interval_ms=1, authorize=lambda: True)
+        monkeypatch.setattr(app_module, "request_profiler", profiler)
+        monkeypatch.setattr(app_module.config.security, "admin_token", "secret")
+        view = profiler.wrap(lambda: ("ok", 200))
+
+        with app_module.app.test_request_context(
+                "/api/chat", method="POST", headers={"X-Profile": "1", "X-Request-ID": "req-1"}):
+            view()
+
+        [summary] = profiler.store.summaries()
+        assert summary['label'] == "req-1" and summary['request_id'] != "req-1"
+        assert profiler.store.get(summary['request_id'])['top_functions']
+
+        with app_module.app.test_client() as client:
+            listing = client.get('/api/admin/profiles', headers={'X-Admin-Token': 'secret'}).json
+            collapsed = client.get(f"/api/admin/profiles/{summary['request_id']}?format=collapsed",
+                                   headers={'X-Admin-Token': 'secret'})
+
+        assert listing['profiles'][0]['label'] == "req-1"
+        assert collapsed.status_code == 200
+
+    def test_client_cannot_choose_profile_file_or_force_profiling(self, monkeypatch, tmp_path):
+        """Test X-Request-ID never becomes a path and X-Profile needs authorization"""
+        import app as app_module
+        from profiling import RequestProfiler
+
+        allowed = []
+        profiler = RequestProfiler(enabled=True, interval_ms=1, directory=str(tmp_path / "profiles"),
+                                   authorize=lambda: bool(allowed))
+        view = profiler.wrap(lambda: ("ok", 200))
+        headers = {"X-Profile": "1", "X-Request-ID": "../escaped"}
+
+        with app_module.app.test_request_context("/api/chat", method="POST", headers=headers):
+            view()
+        assert profiler.store.summaries() == []
+
+        allowed.append(True)
+        with app_module.app.test_request_context("/api/chat", method="POST", headers=headers):
+            view()
+        [summary] = profiler.store.summaries()
+        assert summary['label'] is None
+        assert not (tmp_path / "escaped.json").exists()
+        assert sorted(p.name for p in (tmp_path / "profiles").iterdir()) == [
+            f"{summary['request_id']}.collapsed", f"{summary['request_id']}.json"]
+
+    def test_admin_routes_need_token(self, monkeypatch):
+        """Test admin endpoints are off without ADMIN_TOKEN and reject callers without it"""
+        import app as app_module
+
+        with app_module.app.test_client() as client:
+            assert client.get('/api/admin/profiles').status_code == 404
+            monkeypatch.setattr(app_module.config.security, "admin_token", "secret")
+            for path in ('/api/admin/profiles', '/api/admin/llm', '/api/admin/audit'):
+                assert client.get(path).status_code == 403
+                assert client.get(path, headers={'X-Admin-Token': 'wrong'}).status_code == 403
+            assert client.get('/api/admin/llm', headers={'X-Admin-Token': 'secret'}).status_code == 200
+
+    def test_unprofiled_request_not_stored(self, monkeypatch):
+        """Test requests without the header are not profiled at zero sample rate"""
+        import app as app_module
+        from profiling import RequestProfiler
+
+        profiler = RequestProfiler(enabled=True, sample_rate=0.0)
+        view = profiler.wrap(lambda: ("ok", 200))
+
+        with app_module.app.test_request_context("/api/chat", method="POST"):
+            view()
+
+        assert profiler.store.summaries() == []
+
+
+class TestTracing:
+    """Tests for distributed tracing spans"""
+
+    @pytest.fixture
+    def exporter(self, monkeypatch):
+        """Enable the process tracer with an in-memory exporter"""
+        from tracing import BatchSpanProcessor, InMemoryExporter, tracer
+
+        exporter = InMemoryExporter()
+        processor = BatchSpanProcessor(exporter, flush_interval=3600)
+        monkeypatch.setattr(tracer, "enabled", True)
+        monkeypatch.setattr(tracer, "processor", processor)
+        yield exporter
+        processor.flush()
+
+    def test_parse_traceparent(self):
+        """Test W3C traceparent parsing and rejection of invalid IDs"""
+        from tracing import parse_traceparent
+
+        header = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+        assert parse_traceparent(header) == ("4bf92f3577b34da6a3ce929d0e0e4736", "00f067aa0ba902b7")
+        assert parse_traceparent("00-" + "0" * 32 + "-00f067aa0ba902b7-01") is None
+        assert parse_traceparent("garbage") is None
+
+    def test_service_and_client_spans_nest(self, exporter, uc_service):
+        """Test service method spans parent the SDK call spans"""
+        from tracing import TracedClient, tracer
+
+        uc_service.client = TracedClient(uc_service.client, tracer, "databricks")
+        uc_service.list_schemas("sales")
+        tracer.processor.flush()
+
+        spans = {span['name']: span for span in exporter.spans}
+        client_span = spans['databricks.schemas.list']
+        method_span = spans['UnityCatalogService.list_schemas']
+        assert client_span['parent_span_id'] == method_span['span_id']
+        assert method_span['attributes']['uc.catalog'] == "sales"
+
+    def test_request_continues_incoming_trace(self, exporter):
+        """Test the root request span joins the caller's trace"""
+        from app import app
+        from tracing import tracer
+
+        trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+        with app.test_client() as client:
+            response = client.get('/api/health', headers={
+                'traceparent': f"00-{trace_id}-00f067aa0ba902b7-01"
+            })
+        tracer.processor.flush()
+
+        assert response.headers['traceparent'].startswith(f"00-{trace_id}-")
+        root = exporter.spans[-1]
+        assert root['trace_id'] == trace_id
+        assert root['parent_span_id'] == "00f067aa0ba902b7"
+
+
+    @pytest.mark.skipif(not hasattr(__import__("os"), "fork"), reason="needs fork()")
+    def test_exporter_thread_runs_in_forked_worker(self, tmp_path):
+        """Test spans ended in a process forked after the processor started are still exported"""
+        import json
+        import os
+        from tracing import BatchSpanProcessor, FileSpanExporter
+
+        path = tmp_path / "traces.jsonl"
+        processor = BatchSpanProcessor(FileSpanExporter(str(path)), flush_interval=0.02)
+        processor.on_end({'name': 'master'})  # starts the exporter thread before the fork, as preloading does
+        time.sleep(0.1)
+
+        pid = os.fork()
+        if pid == 0:
+            try:
+                processor.on_end({'name': 'worker'})
+                deadline = time.monotonic() + 5
+                while time.monotonic() < deadline:
+                    if path.exists() and any('worker' in line for line in path.read_text().splitlines()):
+                        os._exit(0)
+                    time.sleep(0.02)
+            finally:
+                os._exit(1)
+        _, status = os.waitpid(pid, 0)
+
+        assert os.waitstatus_to_exitcode(status) == 0
+        assert [json.loads(line)['name'] for line in path.read_text().splitlines()] == ['master', 'worker']
+
+
+class TestStartup:
+    """Tests for deferred imports, warm-up and the metadata cache"""
+
+    def test_lazy_import_resolves_on_first_use(self):
+        """Test LazyImport defers the import until an attribute is used"""
+        from startup import LazyImport
+
+        lazy = LazyImport("json", "dumps")
+        assert "deferred" in repr(lazy)
+        assert lazy({"a": 1}) == '{"a": 1}'
+        assert "loaded" in repr(lazy)
+
+    def test_cached_listing_invalidated_on_create(self, uc_service, workspace_client):
+        """Test catalog listings are served from cache until a create invalidates them"""
+        from metadata_cache import MetadataCache
+
+        uc_service.cache = MetadataCache(ttl=60)
+        uc_service.list_catalogs()
+        uc_service.list_catalogs()
+        assert workspace_client.catalogs.list.call_count == 1
+
+        uc_service.create_catalog("sales")
+        uc_service.list_catalogs()
+        assert workspace_client.catalogs.list.call_count == 2
+
+    def test_warm_up_reports_failed_steps(self, monkeypatch, uc_service, claude_client_mock):
+        """Test warm-up is best-effort and reports each step"""
+        import app as app_module
+        from config import StartupConfig
+        from startup import warm_up
+
+        monkeypatch.setattr(app_module, "uc_service", uc_service)
+        monkeypatch.setattr(app_module, "claude_client", None)
+        uc_service.client.current_user = Mock()
+        uc_service.client.current_user.me.side_effect = ConnectionError("unreachable")
+
+        report = warm_up(StartupConfig(warm_up=True, preopen_connections=True, prime_cache=True))
+
+        assert report['clients']['ok']
+        assert report['databricks_connection'] == {
+            'ok': False, 'error': "unreachable", 'seconds': report['databricks_connection']['seconds']
+        }
+        assert report['metadata_cache']['ok']
+        assert 'anthropic_connection' not in report
+
+
+class TestSecurables:
+    """Tests for privilege/securable resolution and intent dispatch"""
+
+    def test_resolves_full_enums_and_aliases(self):
+        """Test every SDK privilege resolves, including spaced SQL spellings"""
+        from databricks.sdk.service.catalog import Privilege, SecurableType
+        from securables import resolve_privilege, resolve_securable_type
+
+        assert all(resolve_privilege(p.value) is p for p in Privilege)
+        assert resolve_privilege("use catalog") is Privilege.USE_CATALOG
+        assert resolve_privilege("ALL") is Privilege.ALL_PRIVILEGES
+        assert resolve_securable_type("external location") is SecurableType.EXTERNAL_LOCATION
+        with pytest.raises(ValueError):
+            resolve_privilege("READ_EVERYTHING")
+
+    def test_grant_uses_resolved_enums(self, uc_service, workspace_client):
+        """Test grant_permission sends enum values and emits SQL keywords"""
+        from databricks.sdk.service.catalog import Privilege, SecurableType
+
+        result = uc_service.grant_permission("analysts", "use schema", "schema", "sales.bronze")
+
+        assert result['success'] is True
+        assert result['sql'] == "GRANT USE SCHEMA ON SCHEMA sales.bronze TO `analysts`"
+        kwargs = workspace_client.grants.update.call_args.kwargs
+        assert kwargs['securable_type'] is SecurableType.SCHEMA
+        assert kwargs['changes'][0].add == [Privilege.USE_SCHEMA]
+
+    def test_dispatch_derives_securable_from_path(self):
+        """Test permission intents parse the object path once and honour explicit types"""
+        mock_uc = Mock()
+        with patch('app._init_services', return_value=(mock_uc, Mock())):
+            execute_intent({'intent': 'revokePermission', 'params': {
+                'privilege': 'SELECT', 'object': 'sales.`bronze`', 'principal': 'bob'}})
+            execute_intent({'intent': 'setOwner', 'params': {
+                'object': 'sales.bronze.files', 'securable_type': 'VOLUME', 'owner': 'ops'}})
+            invalid = execute_intent({'intent': 'showPermissions', 'params': {'object': 'a..b'}})
+
+        assert mock_uc.revoke_permission.call_args.kwargs['securable_type'] == "SCHEMA"
+        assert mock_uc.revoke_permission.call_args.kwargs['securable_name'] == "sales.bronze"
+        assert mock_uc.set_owner.call_args.kwargs['securable_type'] == "VOLUME"
+        assert invalid['success'] is False
+
+
+class TestConversation:
+    """Tests for per-session conversation memory"""
+
+    @pytest.fixture
+    def client(self):
+        """Flask test client"""
+        from app import app
+        app.config['TESTING'] = True
+        with app.test_client() as client:
+            yield client
+
+    def test_follow_up_reuses_resolved_object(self, client, claude_client_mock, uc_service):
+        """Test a follow-up without an object is resolved from the session"""
+        uc_service.grant_permission = Mock(return_value={'success': True, 'message': 'ok'})
+        replies = iter([
+            '{"intent": "grantPermission", "params": {"privilege": "SELECT", '
+            '"object": "sales.bronze.orders", "principal": "data_engineers"}}',
+            '{"intent": "grantPermission", "params": {"privilege": "SELECT", "principal": "analysts"}}',
+        ])
+        claude_client_mock.messages.create.side_effect = lambda **kwargs: Mock(
+            content=[Mock(text=next(replies))]
+        )
+
+        first = client.post('/api/chat', json={'message': 'Grant SELECT on sales.bronze.orders to data_engineers'})
+        client.post('/api/chat', json={'message': 'now grant it to analysts too',
+                                       'session_id': first.json['session_id']})
+
+        system = claude_client_mock.messages.create.call_args.kwargs['system']
+        assert "current object: sales.bronze.orders (TABLE)" in system
+        assert uc_service.grant_permission.call_args.kwargs['securable_name'] == "sales.bronze.orders"
+        assert uc_service.grant_permission.call_args.kwargs['principal'] == "analysts"
+
+    def test_context_stays_bounded(self):
+        """Test the rendered context does not grow with conversation length"""
+        from conversation import ConversationStore
+
+        store = ConversationStore(max_recent=3, max_context_chars=300)
+        for i in range(50):
+            store.record("s1", {'intent': 'listTables', 'params': {'catalog': f"catalog_{i}", 'schema': 'bronze'}},
+                         {'success': True})
+
+        state = store.get("s1")
+        assert len(state.recent) == 3
+        assert state.schema == "catalog_49.bronze"
+        assert len(store.context(state)) <= 300
+
+    def test_sqlite_store_shared_between_instances(self, tmp_path):
+        """Test sessions persisted to SQLite are visible to another worker's store"""
+        from conversation import ConversationStore
+
+        path = str(tmp_path / "conversations.db")
+        ConversationStore(path=path).record(
+            "s1", {'intent': 'createCatalog', 'params': {'catalog': 'sales'}}, {'success': True})
+
+        state = ConversationStore(path=path).get("s1")
+        assert state.catalog == "sales"
+        assert state.recent == [['createCatalog', 'sales', True]]
+
+    @pytest.mark.skipif(not hasattr(__import__("os"), "fork"), reason="needs fork()")
+    def test_sqlite_store_reconnects_in_forked_worker(self, tmp_path):
+        """Test a store built before fork opens its own connection in the worker"""
+        import os
+        from conversation import ConversationStore
+
+        path = str(tmp_path / "conversations.db")
+        store = ConversationStore(path=path)
+        assert not os.path.exists(path)
+        store.get("s0")
+        parent_conn = store._db()
+
+        pid = os.fork()
+        if pid == 0:
+            try:
+                ok = store._db() is not parent_conn
+                store.record("s1", {'intent': 'createCatalog', 'params': {'catalog': 'sales'}}, {'success': True})
+            except BaseException:
+                ok = False
+            os._exit(0 if ok else 1)
+        _, status = os.waitpid(pid, 0)
+
+        assert os.WEXITSTATUS(status) == 0
+        assert store._db() is parent_conn
+        assert store.get("s1").catalog == "sales"
+
+    def test_in_memory_store_rejected_with_several_workers(self):
+        """Test per-process sessions are refused when more than one worker serves requests"""
+        from config import ConversationConfig
+
+        conversation = ConversationConfig(store_path=None)
+        assert conversation.validate(workers=1)
+        with pytest.raises(ValueError, match="CONVERSATION_STORE_PATH"):
+            conversation.validate(workers=4)
+        assert ConversationConfig(store_path=None, enabled=False).validate(workers=4)
+        assert ConversationConfig().validate(workers=4)
+
+
+class TestEntityResolver:
+    """Tests for fuzzy correction of object references"""
+
+    @pytest.fixture
+    def resolver(self, uc_service, workspace_client):
+        from types import SimpleNamespace
+        from entity_resolver import EntityResolver
+
+        def named(*names):
+            return [SimpleNamespace(name=n, full_name=n, owner=None, comment=None,
+                                    table_type=None, data_source_format=None) for n in names]
+
+        workspace_client.catalogs.list.return_value = named("sales_data", "sales_archive", "marketing")
+        workspace_client.schemas.list.return_value = named("bronze", "silver", "gold")
+        workspace_client.tables.list.return_value = named("raw_orders", "raw_customers")
+        return EntityResolver(uc_service)
+
+    def test_corrects_misspelled_path(self, resolver):
+        """Test a misspelled schema and table are corrected in place for a read"""
+        intent = {'intent': 'showPermissions', 'params': {'object': 'sales_data.brnze.raw_ordrs'}}
+
+        resolution = resolver.resolve(intent)
+
+        assert not resolution.ambiguous
+        assert intent['params']['object'] == "sales_data.bronze.raw_orders"
+        assert [c['to'] for c in resolution.corrections] == ["bronze", "raw_orders"]
+
+    def test_null_securable_type_is_resolved(self, resolver):
+        """Test a securable_type of null from the model does not skip resolution"""
+        intent = {'intent': 'showPermissions',
+                  'params': {'object': 'sales_data.brnze.raw_ordrs', 'securable_type': None}}
+
+        resolution = resolver.resolve(intent)
+
+        assert intent['params']['object'] == "sales_data.bronze.raw_orders"
+        assert [c['to'] for c in resolution.corrections] == ["bronze", "raw_orders"]
+
+    def test_writes_are_never_redirected(self, resolver):
+        """Test a grant on a near-miss name asks for confirmation instead of targeting another object"""
+        for intent_name in ('grantPermission', 'revokePermission', 'setOwner'):
+            intent = {'intent': intent_name,
+                      'params': {'privilege': 'SELECT', 'object': 'sales_data.bronze.raw_ordrs', 'principal': 'bob'}}
+
+            resolution = resolver.resolve(intent)
+
+            assert resolution.ambiguous and not resolution.corrections
+            assert intent['params']['object'] == "sales_data.bronze.raw_ordrs"
+            assert resolution.suggestions[0]['name'] == "sales_data.bronze.raw_orders"
+
+    def test_ambiguous_name_returns_ranked_suggestions(self, resolver, workspace_client):
+        """Test an ambiguous abbreviation yields suggestions and no table lookups"""
+        resolution = resolver.resolve({'intent': 'listTables', 'params': {'catalog': 'sales', 'schema': 'gold'}})
+
+        assert resolution.ambiguous
+        assert [s['name'] for s in resolution.suggestions][:2] == ["sales_data", "sales_archive"]
+        assert "Did you mean" in resolution.clarification()['message']
+        workspace_client.schemas.list.assert_not_called()
+
+    def test_new_object_name_is_not_corrected(self, resolver):
+        """Test creates only check the parents of the new object, and suggest rather than correct them"""
+        intent = {'intent': 'createSchema', 'params': {'catalog': 'sales_dta', 'schema': 'brnze'}}
+
+        resolution = resolver.resolve(intent)
+
+        assert intent['params'] == {'catalog': 'sales_dta', 'schema': 'brnze'}
+        assert resolution.suggestions[0] == {'query': 'sales_dta', 'name': 'sales_data',
+                                             'score': resolution.suggestions[0]['score']}
+        assert resolver.resolve({'intent': 'createSchema', 'params': {'catalog': 'sales_data', 'schema': 'brnze'}}
+                                ).suggestions == []
+
+
+class TestPrefetch:
+    """Tests for background metadata prefetching"""
+
+    @pytest.fixture
+    def warm_service(self, uc_service, workspace_client):
+        from types import SimpleNamespace
+        from metadata_cache import MetadataCache
+
+        workspace_client.schemas.list.return_value = [
+            SimpleNamespace(name=n, full_name=f"sales.{n}", owner=None, comment=None)
+            for n in ("bronze", "silver", "gold", "platinum")
+        ]
+        uc_service.cache = MetadataCache(ttl=60)
+        return uc_service
+
+    def test_schema_listing_warms_table_listings(self, warm_service, workspace_client):
+        """Test tables of the listed schemas are fetched in the background and then served from cache"""
+        from prefetch import PrefetchScheduler
+
+        warm_service.prefetcher = PrefetchScheduler(warm_service, max_per_trigger=2)
+        warm_service.list_schemas("sales")
+        assert warm_service.prefetcher.drain()
+
+        prefetched = {call.kwargs['schema_name'] for call in workspace_client.tables.list.call_args_list}
+        assert prefetched == {"bronze", "silver"}
+        warm_service.list_tables("sales", "bronze")
+        assert workspace_client.tables.list.call_count == 2
+
+    def test_hot_schemas_first_and_budget_enforced(self, warm_service, workspace_client):
+        """Test access counts rank prefetch targets and the call budget caps them"""
+        from prefetch import PrefetchScheduler
+
+        prefetcher = PrefetchScheduler(warm_service, max_per_trigger=3, calls_per_minute=1)
+        prefetcher.schema_hits["sales.gold"] = 5
+        warm_service.prefetcher = prefetcher
+        warm_service.list_schemas("sales")
+        assert prefetcher.drain()
+
+        assert [call.kwargs['schema_name'] for call in workspace_client.tables.list.call_args_list] == ["gold"]
+        assert prefetcher.snapshot()['stats']['skipped_budget'] == 2
+
+
+class TestColumnIndex:
+    """Tests for bulk column loading and the columnar index"""
+
+    @pytest.fixture
+    def loaded_service(self, uc_service, workspace_client):
+        from types import SimpleNamespace
+
+        def column(name, type_name):
+            return SimpleNamespace(name=name, type_name=SimpleNamespace(value=type_name),
+                                   type_text=type_name.lower(), comment=None)
+
+        def table(name, *columns):
+            return SimpleNamespace(name=name, full_name=f"sales.bronze.{name}", columns=list(columns))
+
+        workspace_client.tables.list.return_value = [
+            table("orders", column("order_id", "STRING"), column("customer_id", "STRING")),
+            table("customers", column("customer_id", "STRING"), column("signup_date", "DATE")),
+            table("events"),
+        ]
+        workspace_client.tables.get.return_value = SimpleNamespace(columns=[column("event_ts", "TIMESTAMP")])
+        return uc_service
+
+    def test_find_by_name_loads_schema_once(self, loaded_service, workspace_client):
+        """Test one listing per schema answers column questions, with per-table fallback"""
+        result = loaded_service.find_columns(column="customer_id", catalog="sales", schema="bronze")
+
+        assert result['tables'] == ["sales.bronze.customers", "sales.bronze.orders"]
+        assert workspace_client.tables.list.call_count == 1
+        workspace_client.tables.get.assert_called_once_with("sales.bronze.events")
+        assert "information_schema.columns WHERE column_name = 'customer_id'" in result['sql']
+
+    def test_find_by_pattern_and_type(self, loaded_service):
+        """Test glob name patterns and type filters use the index"""
+        loaded_service.load_columns("sales", "bronze")
+
+        by_pattern = loaded_service.columns.find(column="*_id")
+        by_type = loaded_service.columns.find(data_type="timestamp")
+
+        assert {c['column'] for c in by_pattern} == {"order_id", "customer_id"}
+        assert by_type == [{'table': "sales.bronze.events", 'column': "event_ts", 'type': "timestamp", 'comment': None}]
+
+
+class TestMetadataExport:
+    """Tests for the inventory export pipeline and inventory queries"""
+
+    @pytest.fixture
+    def inventory_db(self, tmp_path, uc_service):
+        """Export a small fake workspace into SQLite"""
+        from databricks.sdk import WorkspaceClient
+        from fake_backends import FakeDatabricksServer, FakeWorkspace
+        from metadata_export import export_inventory
+
+        path = str(tmp_path / "inventory.db")
+        with FakeDatabricksServer(FakeWorkspace(catalogs=2, schemas=2, tables=5, columns=3)) as server:
+            uc_service.client = WorkspaceClient(host=server.url, token="dummytoken123")
+            stats = export_inventory(uc_service, sqlite_path=path, max_workers=4, batch_size=7)
+        return path, stats
+
+    def test_export_streams_full_inventory(self, inventory_db):
+        """Test every level lands in SQLite with one listing per schema"""
+        import sqlite3
+
+        path, stats = inventory_db
+        with sqlite3.connect(path) as conn:
+            counts = {kind: conn.execute(f"SELECT COUNT(*) FROM {kind}").fetchone()[0]
+                      for kind in ("catalogs", "schemas", "tables", "columns")}
+
+        assert counts == {'catalogs': 2, 'schemas': 4, 'tables': 20, 'columns': 60}
+        assert stats['errors'] == []
+        # 1 catalog listing + 2 schema listings + 4 table listings + 26 grant lookups
+        assert stats['api_calls'] == 1 + 2 + 4 + (2 + 4 + 20)
+
+    def test_inventory_intent_queries_local_store(self, inventory_db, monkeypatch):
+        """Test the inventoryQuery intent answers from the export without API calls"""
+        import app as app_module
+        from metadata_export import InventoryStore
+
+        monkeypatch.setattr(app_module, "inventory_store", InventoryStore(inventory_db[0]))
+        mock_uc = Mock()
+        with patch('app._init_services', return_value=(mock_uc, Mock())):
+            result = execute_intent({'intent': 'inventoryQuery', 'params': {'report': 'summary', 'catalog': 'sales_data'}})
+
+        assert result['success'] is True
+        assert result['rows'] == [{'catalog': 'sales_data', 'schemas': 2, 'tables': 10, 'columns': 30}]
+        assert mock_uc.method_calls == []
+
+    def test_analytics_query_runs_generated_sql_locally(self, inventory_db, monkeypatch):
+        """Test the analyticsQuery intent aggregates over the export"""
+        import app as app_module
+        from metadata_export import InventoryStore
+
+        monkeypatch.setattr(app_module, "inventory_store", InventoryStore(inventory_db[0]))
+        sql = "SELECT owner, COUNT(*) AS tables FROM tables GROUP BY owner ORDER BY tables DESC"
+        with patch('app._init_services', return_value=(Mock(), Mock())):
+            result = execute_intent({'intent': 'analyticsQuery', 'params': {'sql': sql}})
+
+        assert result['success'] is True
+        assert sum(row['tables'] for row in result['rows']) == 20
+        assert result['columns'] == ['owner', 'tables']
+
+    @pytest.mark.parametrize("sql", [
+        "DELETE FROM tables",
+        "SELECT 1; DROP TABLE tables",
+        "WITH x AS (SELECT 1) SELECT * FROM x; ATTACH 'other.db' AS other",
+        "SELECT * FROM pragma_table_info('tables') JOIN sqlite_master",
+    ])
+    def test_analytics_query_rejects_non_reads(self, inventory_db, sql):
+        """Test generated SQL cannot modify the store or run several statements"""
+        from metadata_export import InventoryStore
+
+        store = InventoryStore(inventory_db[0])
+        result = store.query(sql)
+
+        assert result['success'] is False
+        assert store.report('summary')['rows'][0]['tables'] == 10
+
+
+class TestIdempotentCreate:
+    """Tests for idempotent creates backed by the known-objects cache"""
+
+    @pytest.fixture
+    def fake_server(self, uc_service):
+        from databricks.sdk import WorkspaceClient
+        from fake_backends import FakeDatabricksServer, FakeWorkspace
+
+        with FakeDatabricksServer(FakeWorkspace(catalogs=1, schemas=2, tables=2)) as server:
+            uc_service.client = WorkspaceClient(host=server.url, token="dummytoken123")
+            yield server
+
+    def test_batch_skips_known_and_existing_objects(self, uc_service, fake_server):
+        """Test listed objects cost no call and already-exists errors count as skipped"""
+        uc_service.list_catalogs()
+        before = fake_server.request_count
+
+        result = uc_service.create_objects([
+            {'name': 'sales_data'},                        # known from the listing
+            {'name': 'sales_data.bronze'},                 # exists, not listed yet
+            {'name': 'sales_data.gold'},
+            {'name': 'marketing'},
+            {'name': 'sales_data.gold', 'type': 'table'},  # wrong type
+        ])
+
+        assert (result['created'], result['skipped'], result['failed']) == (2, 2, 1)
+        assert result['success'] is False
+        # Only bronze (409), gold and marketing reach the API
+        assert fake_server.request_count - before == 3
+
+        rerun = uc_service.create_objects([{'name': 'sales_data.bronze'}, {'name': 'marketing'}])
+        assert rerun['skipped'] == 2
+        assert fake_server.request_count - before == 3
+
+    def test_plain_create_still_fails_on_existing(self, uc_service, fake_server):
+        """Test creates without if_not_exists keep their strict behaviour"""
+        result = uc_service.create_schema("sales_data", "bronze")
+
+        assert result['success'] is False
+        assert "already exists" in result['message']
+
+    def test_deleted_objects_are_created_again(self, uc_service, fake_server):
+        """Test deletes drop the object and its children from the known set"""
+        uc_service.list_tables("sales_data", "bronze")
+        uc_service.delete_schema("sales_data", "bronze")
+
+        assert 'sales_data.bronze.raw_orders' not in uc_service.known
+        assert uc_service.create_schema("sales_data", "bronze", if_not_exists=True).get('created') is True
+
+
+class TestSqlScript:
+    """Tests for compiling batches into one SQL script and running it on a warehouse"""
+
+    @pytest.fixture
+    def fake_server(self, uc_service):
+        from databricks.sdk import WorkspaceClient
+        from fake_backends import FakeDatabricksServer, FakeWorkspace
+
+        with FakeDatabricksServer(FakeWorkspace(catalogs=1, schemas=1, tables=1)) as server:
+            uc_service.client = WorkspaceClient(host=server.url, token="dummytoken123")
+            uc_service.warehouse_id = "fake-warehouse"
+            yield server
+
+    def test_compile_orders_ddl_before_grants(self):
+        """Test statements run parents first and grants last, with quoted names"""
+        from sql_script import compile_batch
+
+        script = compile_batch(
+            objects=[{'name': 'ops.raw.events', 'columns': [{'name': 'id', 'type_name': 'BIGINT'}]},
+                     {'name': 'ops'}, {'name': 'ops.raw', 'comment': "it's raw"}],
+            grants=[{'principal': 'data eng', 'privilege': ['SELECT', 'MODIFY'], 'object': 'ops.raw.events'}],
+        )
+
+        assert script.errors == []
+        assert [sql.split(' `')[0] for sql in script.statements] == [
+            'CREATE CATALOG IF NOT EXISTS', 'CREATE SCHEMA IF NOT EXISTS',
+            'CREATE TABLE IF NOT EXISTS', 'GRANT SELECT, MODIFY ON TABLE']
+        assert "COMMENT 'it\\'s raw'" in script.statements[1]
+        assert script.render().startswith("BEGIN\n") and script.render().endswith(";\nEND")
+
+    def test_grants_run_as_one_submission(self, uc_service, fake_server):
+        """Test 500 grants cost one request instead of 500"""
+        from sql_script import compile_batch
+
+        grants = [{'principal': f'user_{i}', 'privilege': 'SELECT', 'object': 'sales_data.bronze.raw_orders'}
+                  for i in range(500)]
+        before = fake_server.request_count
+        result = uc_service.execute_script(compile_batch(grants=grants))
+
+        assert result['success'] is True
+        assert result['statements'] == 500
+        assert fake_server.request_count - before == 1
+        table_grants = fake_server.workspace.grants[('table', 'sales_data.bronze.raw_orders')]
+        assert table_grants['user_499'] == {'SELECT'}
+
+    def test_invalid_entry_runs_nothing(self, uc_service, fake_server):
+        """Test a batch with an invalid entry is rejected before submission"""
+        from sql_script import compile_batch
+
+        before = fake_server.request_count
+        result = uc_service.execute_script(compile_batch(
+            objects=[{'name': 'ops'}],
+            grants=[{'principal': 'x', 'privilege': 'FLY', 'object': 'ops'}],
+        ))
+
+        assert result['success'] is False
+        assert result['errors'][0]['message'] == "Invalid privilege: FLY"
+        assert fake_server.request_count == before
+        assert 'ops' not in fake_server.workspace.catalogs
+
+
+class TestFrontendAssets:
+    """Tests for serving the precompiled frontend bundle"""
+
+    @pytest.fixture
+    def client(self):
+        """Flask test client"""
+        from app import app
+        app.config['TESTING'] = True
+        with app.test_client() as client:
+            yield client
+
+    @pytest.fixture
+    def dist(self, tmp_path, monkeypatch):
+        import app as app_module
+
+        (tmp_path / "assets").mkdir()
+        (tmp_path / "assets" / "app-3F2A9C1B.js").write_text("console.log('bundle')")
+        (tmp_path / "index.html").write_text('<script defer src="/assets/app-3F2A9C1B.js"></script>')
+        monkeypatch.setattr(app_module, "FRONTEND_DIST", str(tmp_path))
+        return tmp_path
+
+    def test_built_index_is_served_uncached(self, client, dist):
+        """Test the bundle's index.html replaces the in-browser Babel page"""
+        response = client.get('/')
+
+        assert b'/assets/app-3F2A9C1B.js' in response.data
+        assert b'babel' not in response.data
+        assert response.headers['Cache-Control'] == 'no-store'
+
+    def test_hashed_assets_are_immutable(self, client, dist):
+        """Test fingerprinted bundles get a long-lived immutable cache policy"""
+        response = client.get('/assets/app-3F2A9C1B.js')
+
+        assert response.status_code == 200
+        assert response.headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+        assert client.get('/assets/app-00000000.js').status_code == 404
+
+    def test_falls_back_to_development_page(self, client, tmp_path, monkeypatch):
+        """Test the unbundled page is served until a bundle has been built"""
+        import app as app_module
+
+        monkeypatch.setattr(app_module, "FRONTEND_DIST", str(tmp_path / "missing"))
+        response = client.get('/')
+
+        assert b'dev-scripts:start' in response.data
+        response.close()
+
+    def test_local_stores_are_not_served(self, client, tmp_path, monkeypatch):
+        """Test databases, logs, cassettes and sources in the working directory are never downloadable"""
+        import app as app_module
+
+        for name in ("data/jobs.db", "data/inventory.db", "logs/audit.jsonl", "cassettes/session.jsonl.gz"):
+            (tmp_path / name).parent.mkdir(exist_ok=True)
+            (tmp_path / name).write_text("secret")
+        (tmp_path / "app.py").write_text("secret")
+        (tmp_path / "index.html").write_text("dev page")
+        monkeypatch.setattr(app_module.app, "root_path", str(tmp_path))
+
+        for path in ('/data/jobs.db', '/data/inventory.db', '/logs/audit.jsonl', '/cassettes/session.jsonl.gz',
+                     '/app.py', '/../app.py', '/logs/', '/data/'):
+            response = client.get(path)
+            assert b'secret' not in response.data, path
+            response.close()
+        assert client.get('/logs/audit.jsonl').status_code == 404
+        assert client.get('/data/inventory.db').status_code == 404
+        assert client.get('/data/jobs.db').status_code == 404
+        response = client.get('/index.html')
+        assert response.data == b'dev page'
+        response.close()
+
+
+class TestHttpCaching:
+    """Tests for listing ETags, conditional GETs and response compression"""
+
+    @pytest.fixture
+    def client(self):
+        """Flask test client"""
+        from app import app
+        app.config['TESTING'] = True
+        with app.test_client() as client:
+            yield client
+
+    @pytest.fixture
+    def catalogs(self, uc_service):
+        from metadata_cache import MetadataCache
+
+        uc_service.cache = MetadataCache(ttl=60)
+        listing = [Mock(owner="admin", comment="x" * 40) for _ in range(100)]
+        for i, catalog in enumerate(listing):
+            catalog.name = f"catalog_{i}"
+        uc_service.client.catalogs.list.return_value = listing
+        return uc_service
+
+    def test_unchanged_listing_returns_304(self, client, catalogs):
+        """Test polling with the last ETag gets an empty 304 until the listing changes"""
+        first = client.get('/api/catalogs')
+        etag = first.headers['ETag']
+
+        again = client.get('/api/catalogs', headers={'If-None-Match': etag})
+        assert again.status_code == 304
+        assert again.data == b''
+
+        catalogs.cache.invalidate(('catalogs',))
+        catalogs.client.catalogs.list.return_value = catalogs.client.catalogs.list.return_value[:1]
+        changed = client.get('/api/catalogs', headers={'If-None-Match': etag})
+        assert changed.status_code == 200
+        assert changed.headers['ETag'] != etag
+        assert changed.json['catalogs'][0]['name'] == "catalog_0"
+
+    def test_large_listing_is_gzipped(self, client, catalogs):
+        """Test large payloads are compressed when the client accepts gzip"""
+        import gzip
+        import json
+
+        response = client.get('/api/catalogs', headers={'Accept-Encoding': 'gzip, deflate'})
+
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response.headers['Vary']
+        assert len(json.loads(gzip.decompress(response.data))['catalogs']) == 100
+        assert 'Content-Encoding' not in client.get('/api/catalogs').headers
+
+    def test_encoding_negotiation(self):
+        """Test q-values and wildcards in Accept-Encoding"""
+        from http_cache import etag_matches, negotiate_encoding
+
+        assert negotiate_encoding("gzip;q=0, identity") is None
+        assert negotiate_encoding("*") in ("br", "gzip")
+        assert negotiate_encoding("") is None
+        assert etag_matches('"abc", W/"def"', 'W/"def"')
+
+
+class TestJsonProvider:
+    """Tests for listing records and the orjson/stdlib JSON provider"""
+
+    def test_records_read_like_dicts(self):
+        """Test records support the dict access existing callers use"""
+        from records import TableRecord
+
+        record = TableRecord("orders", "sales.bronze.orders", "admin", "MANAGED", "DELTA")
+
+        assert record['name'] == "orders"
+        assert record.get('owner') == "admin"
+        assert record.get('missing', 'n/a') == 'n/a'
+        assert dict(record) == record.to_dict()
+        assert list(record.keys())[:2] == ['name', 'full_name']
+        with pytest.raises(KeyError):
+            record['missing']
+
+    def test_orjson_and_stdlib_paths_agree(self, monkeypatch):
+        """Test both serialization paths produce the same JSON for records, dates and nesting"""
+        import json
+        from datetime import datetime, timezone
+        import json_provider
+        from records import ColumnRecord
+
+        payload = {'columns': [ColumnRecord("id", "LONG", None), ColumnRecord("näme", "STRING", "x")],
+                   'at': datetime(2024, 1, 2, tzinfo=timezone.utc), 'count': 2}
+        fast = json_provider.dumps(payload)
+        monkeypatch.setattr(json_provider, "orjson", None)
+        fallback = json_provider.dumps(payload)
+
+        assert json.loads(fast) == json.loads(fallback)
+        assert json.loads(fallback)['columns'][1] == {'name': "näme", 'type': "STRING", 'comment': "x"}
+
+    def test_listing_body_shape_unchanged(self, uc_service):
+        """Test the tables endpoint still returns plain objects per table"""
+        from app import app
+
+        table = Mock(owner="admin", full_name="sales.bronze.orders", table_type="MANAGED",
+                     data_source_format="DELTA")
+        table.name = "orders"
+        uc_service.client.tables.list.return_value = [table]
+        app.config['TESTING'] = True
+        with app.test_client() as client:
+            body = client.get('/api/tables/sales/bronze').json
+
+        assert body['tables'] == [{'name': "orders", 'full_name': "sales.bronze.orders", 'owner': "admin",
+                                   'table_type': "MANAGED", 'data_source_format': "DELTA"}]
+
+
+class TestSpeculation:
+    """Tests for speculative reads started while the LLM parses"""
+
+    @pytest.fixture
+    def client(self):
+        """Flask test client"""
+        from app import app
+        app.config['TESTING'] = True
+        with app.test_client() as client:
+            yield client
+
+    @staticmethod
+    def _reply(claude_client_mock, text, delay=0.0):
+        def create(**kwargs):
+            time.sleep(delay)
+            return Mock(content=[Mock(text=text)])
+        claude_client_mock.messages.create.side_effect = create
+
+    def test_plan_picks_reads_only(self):
+        """Test read messages map to the likely call and write messages start nothing"""
+        from speculation import plan
+
+        assert plan("Show details for sales_data.bronze.raw_orders") == \
+            [('get_table', 'sales_data', 'bronze', 'raw_orders')]
+        assert plan("Who has access to sales.bronze?") == [('show_grants', 'SCHEMA', 'sales.bronze')]
+        assert plan("list tables in `sales`.`bronze`") == [('list_tables', 'sales', 'bronze')]
+        assert plan("Grant SELECT on sales.bronze.orders to analysts") == []
+        assert plan("e.g. see app.py") == []
+
+    def test_read_overlaps_llm_call(self, client, claude_client_mock, uc_service):
+        """Test a matching read runs concurrently with parsing and is not repeated"""
+        def slow_get_table(catalog, schema, table):
+            time.sleep(0.3)
+            return {'success': True, 'message': f"Table {catalog}.{schema}.{table}", 'columns': []}
+        uc_service.get_table = Mock(side_effect=slow_get_table)
+        self._reply(claude_client_mock, '{"intent": "getTableDetails", '
+                                        '"params": {"table": "sales_data.bronze.raw_orders"}}', delay=0.3)
+
+        started = time.perf_counter()
+        response = client.post('/api/chat', json={'message': 'Describe sales_data.bronze.raw_orders'})
+        elapsed = time.perf_counter() - started
+
+        assert response.json['message'] == "Table sales_data.bronze.raw_orders"
+        assert uc_service.get_table.call_count == 1
+        assert elapsed < 0.55
+
+    def test_mismatched_read_is_discarded(self, client, claude_client_mock, uc_service):
+        """Test the parsed intent runs normally when it differs from the speculation"""
+        uc_service.get_table = Mock(return_value={'success': True, 'message': 'speculative'})
+        uc_service.show_grants = Mock(return_value={'success': True, 'message': 'grants', 'permissions': []})
+        self._reply(claude_client_mock, '{"intent": "showPermissions", '
+                                        '"params": {"object": "sales_data.bronze.raw_orders"}}')
+
+        response = client.post('/api/chat', json={'message': 'What about sales_data.bronze.raw_orders?'})
+
+        assert response.json['message'] == 'grants'
+        uc_service.show_grants.assert_called_once_with("TABLE", "sales_data.bronze.raw_orders")
+
+
+class TestSemanticIntentCache:
+    """Tests for reusing parses of paraphrased and re-targeted messages"""
+
+    def test_retargeted_and_paraphrased_messages_hit(self):
+        """Test a stored parse is reused with the new message's identifiers"""
+        from semantic_cache import SemanticIntentCache
+
+        cache = SemanticIntentCache()
+        cache.store("Grant SELECT on sales.bronze.orders to analysts", {
+            'intent': 'grantPermission',
+            'params': {'privilege': 'SELECT', 'object': 'sales.bronze.orders', 'principal': 'analysts'},
+            'explanation': 'Will grant SELECT on sales.bronze.orders to analysts'})
+        cache.store("What catalogs exist?", {'intent': 'listCatalogs', 'params': {}})
+
+        hit = cache.lookup("grant select on finance.gold.trades to auditors")
+        assert hit['params'] == {'privilege': 'SELECT', 'object': 'finance.gold.trades', 'principal': 'auditors'}
+        assert hit['explanation'] == 'Will grant SELECT on finance.gold.trades to auditors'
+        assert cache.lookup("Show me the catalogs")['intent'] == 'listCatalogs'
+        assert cache.hit_rate() == 1.0
+
+    def test_meaning_changes_miss(self):
+        """Test different privileges, swapped roles or unexplained identifiers are never reused"""
+        from semantic_cache import SemanticIntentCache
+
+        cache = SemanticIntentCache()
+        cache.store("Grant SELECT on sales.bronze.orders to analysts", {
+            'intent': 'grantPermission',
+            'params': {'privilege': 'SELECT', 'object': 'sales.bronze.orders', 'principal': 'analysts'}})
+
+        assert cache.lookup("Grant MODIFY on sales.bronze.orders to analysts") is None
+        assert cache.lookup("Grant SELECT to analysts on sales.bronze.orders") is None
+        assert cache.lookup("Grant SELECT on sales.bronze to analysts") is None
+        # The object came from conversation context, not the message
+        assert not cache.store("Grant it to auditors too", {
+            'intent': 'grantPermission',
+            'params': {'privilege': 'SELECT', 'object': 'sales.bronze.orders', 'principal': 'auditors'}})
+
+    def test_parse_skips_llm_on_hit(self, claude_client_mock):
+        """Test parse_with_claude answers a repeat from the cache without calling the LLM"""
+        claude_client_mock.messages.create.return_value = Mock(content=[Mock(
+            text='{"intent": "listTables", "params": {"catalog": "sales", "schema": "bronze"}}')])
+
+        parse_with_claude("Show tables in sales.bronze")
+        result = parse_with_claude("Show tables in finance.gold")
+
+        assert claude_client_mock.messages.create.call_count == 1
+        assert result['params'] == {'catalog': 'finance', 'schema': 'gold'}
+
+
+class TestLLMScheduler:
+    """Tests for admission control of outbound LLM calls"""
+
+    @staticmethod
+    def _wait_queued(scheduler, count):
+        deadline = time.monotonic() + 2
+        while scheduler.snapshot()['queued'] < count and time.monotonic() < deadline:
+            time.sleep(0.005)
+
+    def test_priority_then_fair_share_order(self):
+        """Test interactive calls go first and a user's burst does not starve another user"""
+        from llm_scheduler import LLMScheduler
+
+        scheduler = LLMScheduler(max_in_flight=1)
+        order, threads = [], []
+        with scheduler.slot("interactive", "holder"):
+            for label, priority, user in [("batch", "batch", "carol"), ("a1", "interactive", "alice"),
+                                          ("a2", "interactive", "alice"), ("a3", "interactive", "alice"),
+                                          ("b1", "interactive", "bob")]:
+                thread = threading.Thread(target=scheduler.call,
+                                          args=(lambda label=label: order.append(label), priority, user))
+                thread.start()
+                threads.append(thread)
+                self._wait_queued(scheduler, len(threads))
+        for thread in threads:
+            thread.join(timeout=2)
+
+        assert order == ["a1", "b1", "a2", "a3", "batch"]
+        assert scheduler.snapshot()['admitted'] == 6
+
+    def test_rate_limit_backs_off_and_retries(self):
+        """Test a 429 honours Retry-After, then retries; persistent 429s raise LLMOverloaded"""
+        from llm_scheduler import LLMOverloaded, LLMScheduler
+
+        class RateLimited(Exception):
+            status_code = 429
+            response = Mock(headers={'retry-after-ms': '60'})
+
+        calls = []
+
+        def flaky():
+            calls.append(time.monotonic())
+            if len(calls) == 1:
+                raise RateLimited()
+            return "ok"
+
+        scheduler = LLMScheduler(backoff_base=0.01, max_retries=1)
+        assert scheduler.call(flaky) == "ok"
+        assert calls[1] - calls[0] >= 0.06
+        assert scheduler.snapshot()['rate_limited'] == 1
+
+        with pytest.raises(LLMOverloaded):
+            scheduler.call(Mock(side_effect=RateLimited()))
+        with pytest.raises(ValueError):
+            scheduler.call(Mock(side_effect=ValueError("not retried")))
+
+    def test_chat_overload_returns_503(self, monkeypatch, claude_client_mock):
+        """Test a chat that cannot get LLM capacity gets a 503 with Retry-After, not the help intent"""
+        import app as app_module
+        from llm_scheduler import LLMScheduler
+
+        scheduler = LLMScheduler(max_in_flight=1, queue_timeout=0.05)
+        monkeypatch.setattr(app_module, "llm_scheduler", scheduler)
+        app_module.app.config['TESTING'] = True
+
+        with scheduler.slot("interactive", "someone-else"):
+            with app_module.app.test_client() as client:
+                response = client.post('/api/chat', json={'message': 'List all catalogs'})
+
+        assert response.status_code == 503
+        assert int(response.headers['Retry-After']) >= 1
+        assert response.json['success'] is False
+        claude_client_mock.messages.create.assert_not_called()
+
+    def test_sdk_retries_off_and_fairness_by_trusted_caller(self, monkeypatch, claude_client_mock):
+        """Test the SDK leaves retries to the scheduler and X-Forwarded-For cannot pick a fairness bucket"""
+        import app as app_module
+        from llm_scheduler import LLMScheduler
+
+        sdk = Mock(DEFAULT_MAX_RETRIES=2)
+        monkeypatch.setattr(app_module, "anthropic", sdk)
+        monkeypatch.setattr(app_module, "llm_scheduler", None)
+        app_module._anthropic_client()
+        assert sdk.Anthropic.call_args.kwargs['max_retries'] == 2
+
+        scheduler = LLMScheduler()
+        monkeypatch.setattr(app_module, "llm_scheduler", scheduler)
+        app_module._anthropic_client()
+        assert sdk.Anthropic.call_args.kwargs['max_retries'] == 0
+
+        users = []
+        real_call = scheduler.call
+        monkeypatch.setattr(scheduler, "call", lambda fn, priority, user: users.append(user) or real_call(fn))
+        claude_client_mock.messages.create.return_value = Mock(content=[Mock(
+            text='{"intent": "listCatalogs", "params": {}}')])
+        with app_module.app.test_client() as client:
+            client.post('/api/chat', json={'message': 'List all catalogs'}, headers={'X-Forwarded-For': 'me-again'})
+        assert users == ['127.0.0.1']
+
+
+class TestJobs:
+    """Tests for the background job queue"""
+
+    @staticmethod
+    def _wait(manager, job_id, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            job = manager.get(job_id)
+            if job['status'] in ('succeeded', 'failed', 'cancelled'):
+                return job
+            time.sleep(0.02)
+        raise AssertionError(f"job {job_id} did not finish")
+
+    def test_bulk_grant_chat_returns_job_with_progress(self, uc_service, claude_client_mock, workspace_client):
+        """Test a catalog-wide grant answers with a job handle and the job records every grant"""
+        import json
+        from types import SimpleNamespace
+        import app as app_module
+
+        workspace_client.tables.list.return_value = [
+            SimpleNamespace(name=n, full_name=f"sales.bronze.{n}", owner=None, table_type=None,
+                            data_source_format=None) for n in ("orders", "customers", "refunds")
+        ]
+        claude_client_mock.messages.create.return_value = Mock(content=[Mock(text=json.dumps({
+            "intent": "bulkGrant",
+            "params": {"privilege": "SELECT", "catalog": "sales", "schema": "bronze", "principal": "analysts"},
+            "explanation": "Will grant SELECT on every table in sales.bronze"
+        }))])
+        app_module.app.config['TESTING'] = True
+
+        with app_module.app.test_client() as client:
+            response = client.post('/api/chat', json={'message': 'Grant SELECT on all tables in sales.bronze to analysts'})
+            job_id = response.json['job']['id']
+            self._wait(app_module.job_manager, job_id)
+            polled = client.get(f'/api/jobs/{job_id}?offset=1').json['job']
+
+        assert response.json['intent'] == 'bulkGrant'
+        assert polled['status'] == 'succeeded'
+        assert (polled['done'], polled['total'], polled['progress']) == (3, 3, 1.0)
+        assert len(polled['items']) == 2 and {item['outcome'] for item in polled['items']} == {'granted'}
+        assert polled['result']['granted'] == 3 and 'results' not in polled['result']
+        assert workspace_client.grants.update.call_count == 3
+
+    def test_cancel_stops_running_job(self, tmp_path):
+        """Test cancelling a running job stops it at its next progress report and keeps partial results"""
+        from jobs import JobManager, JobStore
+
+        started = threading.Event()
+
+        def slow(job):
+            for i in range(1000):
+                job.progress(i + 1, 1000, {'n': i})
+                started.set()
+                time.sleep(0.005)
+            return {'success': True}
+
+        manager = JobManager(JobStore(str(tmp_path / "jobs.db")), {'slow': slow})
+        job_id = manager.submit('slow')['id']
+        assert started.wait(2)
+        assert manager.cancel(job_id)['cancel_requested']
+        job = self._wait(manager, job_id)
+
+        assert job['status'] == 'cancelled'
+        assert 0 < job['done'] < 1000
+        assert len(manager.get(job_id, items_from=0)['items']) == job['done']
+
+    def test_restart_recovers_unfinished_jobs(self, tmp_path):
+        """Test queued jobs and jobs of a dead worker run again after a restart"""
+        from jobs import JobManager, JobStore
+
+        path = str(tmp_path / "jobs.db")
+        store = JobStore(path)
+        queued = store.create('echo', {'value': 1})
+        orphaned = store.create('echo', {'value': 2})
+        assert store.claim(orphaned, "gone-host:1")
+        store._db().execute("UPDATE jobs SET updated_at = 0 WHERE id = ?", (orphaned,))
+
+        manager = JobManager(JobStore(path), {'echo': lambda job: {'success': True, 'value': job.params['value']}})
+        assert sorted(manager.recover()) == sorted([queued, orphaned])
+
+        assert self._wait(manager, queued)['result'] == {'success': True, 'value': 1}
+        assert self._wait(manager, orphaned)['result'] == {'success': True, 'value': 2}
+        assert manager.recover() == []
+
+    def test_abandoned_job_is_taken_over_once(self, tmp_path):
+        """Test concurrent recoveries of a dead worker's job claim and run it only once"""
+        from jobs import JobManager, JobStore
+
+        path = str(tmp_path / "jobs.db")
+        store = JobStore(path)
+        orphaned = store.create('count', {})
+        assert store.claim(orphaned, "gone-host:1")
+        store._db().execute("UPDATE jobs SET updated_at = 0 WHERE id = ?", (orphaned,))
+        seen = (store.get(orphaned)['owner'], store.get(orphaned)['updated_at'])
+        assert store.claim(orphaned, "h:2", seen)
+        assert not store.claim(orphaned, "h:3", seen)
+        store._db().execute("UPDATE jobs SET owner = 'gone-host:1', updated_at = 0 WHERE id = ?", (orphaned,))
+
+        runs = []
+        managers = [JobManager(JobStore(path), {'count': lambda job: runs.append(1) or {'success': True}})
+                    for _ in range(4)]
+        recovered = [None] * len(managers)
+        threads = [threading.Thread(target=lambda i=i: recovered.__setitem__(i, managers[i].recover()))
+                   for i in range(len(managers))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sum(len(ids) for ids in recovered) == 1
+        owner = next(m for m, ids in zip(managers, recovered) if ids)
+        assert self._wait(owner, orphaned)['status'] == 'succeeded'
+        assert runs == [1]
+
+
+class TestCheckpoint:
+    """Tests for checkpointed, resumable bulk operations"""
+
+    @pytest.fixture
+    def tables(self, workspace_client):
+        from types import SimpleNamespace
+        names = [f"t{i:03d}" for i in range(40)]
+        workspace_client.tables.list.return_value = [
+            SimpleNamespace(name=n, full_name=f"sales.bronze.{n}", owner=None, table_type=None,
+                            data_source_format=None) for n in names
+        ]
+        return [f"sales.bronze.{n}" for n in names]
+
+    def test_resume_retries_only_failed_items(self, uc_service, workspace_client, tables, tmp_path):
+        """Test a second attempt skips applied grants and re-issues only the failed ones"""
+        from checkpoint import Checkpoint
+
+        def flaky(full_name, **kwargs):
+            if full_name in tables[5:8]:
+                raise ConnectionError("rate limited")
+        workspace_client.grants.update.side_effect = flaky
+        path = str(tmp_path / "checkpoints.db")
+
+        first = uc_service.grant_on_all("analysts", "SELECT", "sales", "bronze",
+                                        checkpoint=Checkpoint(path, "run-1"), max_workers=4)
+        assert (first['granted'], first['failed']) == (37, 3)
+
+        workspace_client.grants.update.reset_mock(side_effect=True)
+        checkpoint = Checkpoint(path, "run-1")
+        second = uc_service.grant_on_all("analysts", "SELECT", "sales", "bronze", checkpoint=checkpoint)
+
+        retried = sorted(call.kwargs['full_name'] for call in workspace_client.grants.update.call_args_list)
+        assert retried == tables[5:8]
+        assert (second['success'], second['granted'], second['resumed']) == (True, 40, 37)
+        assert checkpoint.counts() == {'done': 40, 'failed': 0}
+
+    def test_interrupted_run_resumes_where_it_stopped(self, uc_service, workspace_client, tables, tmp_path):
+        """Test a run stopped midway keeps its batched checkpoint and the next attempt finishes the rest"""
+        from checkpoint import Checkpoint
+
+        class Stop(Exception):
+            pass
+
+        def progress(done, total, item):
+            if done == 25:
+                raise Stop()
+        path = str(tmp_path / "checkpoints.db")
+
+        with pytest.raises(Stop):
+            uc_service.grant_on_all("analysts", "SELECT", "sales", "bronze", progress=progress,
+                                    checkpoint=Checkpoint(path, "run-2", batch_size=10), max_workers=4)
+        first_calls = workspace_client.grants.update.call_count
+        recorded = Checkpoint(path, "run-2").finished()
+        assert len(recorded) >= 25
+
+        result = uc_service.grant_on_all("analysts", "SELECT", "sales", "bronze",
+                                         checkpoint=Checkpoint(path, "run-2"), max_workers=4)
+        assert result['success'] and result['resumed'] == len(recorded)
+        assert workspace_client.grants.update.call_count - first_calls == 40 - len(recorded)
+        granted = {call.kwargs['full_name'] for call in workspace_client.grants.update.call_args_list}
+        assert granted == set(tables)
+
+    def test_retried_job_redoes_only_failures(self, uc_service, workspace_client, tables):
+        """Test retrying a failed bulk-grant job re-issues only its failed grants"""
+        import app as app_module
+
+        def flaky(full_name, **kwargs):
+            if full_name == tables[-1]:
+                raise ConnectionError("boom")
+        workspace_client.grants.update.side_effect = flaky
+        app_module.app.config['TESTING'] = True
+
+        with app_module.app.test_client() as client:
+            job_id = client.post('/api/jobs', json={'kind': 'bulk_grant', 'params': {
+                'principal': 'analysts', 'privilege': 'SELECT', 'catalog': 'sales', 'schema': 'bronze'
+            }}).json['job']['id']
+            assert TestJobs._wait(app_module.job_manager, job_id)['status'] == 'failed'
+
+            workspace_client.grants.update.reset_mock(side_effect=True)
+            assert client.post(f'/api/jobs/{job_id}/retry').status_code == 202
+            job = TestJobs._wait(app_module.job_manager, job_id)
+            assert client.post(f'/api/jobs/{job_id}/retry').status_code == 409
+
+        assert job['status'] == 'succeeded' and job['result']['resumed'] == 39
+        assert [call.kwargs['full_name'] for call in workspace_client.grants.update.call_args_list] == [tables[-1]]
+
+
+class TestParserEvaluation:
+    """Tests for the intent parsing evaluation bench"""
+
+    def test_paraphrases_rename_identifiers_consistently(self):
+        """Test generated paraphrases rename identifiers in both the message and the expected parse"""
+        from evaluate_parser import load_cases
+
+        cases = load_cases(paraphrases=2)
+        grants = [case for case in cases if case.expected["intent"] == "grantPermission"]
+
+        assert len(cases) == 33 and len(grants) == 3
+        renamed = grants[2]
+        assert renamed.variant == "paraphrase"
+        assert renamed.expected["params"] == {"privilege": "SELECT", "object": "sales_data_2.bronze_2.raw_orders_2",
+                                              "principal": "data_analysts_2"}
+        assert "sales_data_2.bronze_2.raw_orders_2" in renamed.message and "data_analysts_2" in renamed.message
+
+    def test_evaluates_full_parse_pipeline(self, monkeypatch, uc_service):
+        """Test accuracy, token and cache metrics come from running the real parse path"""
+        import json
+        from types import SimpleNamespace
+        import app as app_module
+        from evaluate_parser import UsageMeter, check_thresholds, evaluate, load_cases
+        from fake_backends import stub_parse
+
+        def create(**kwargs):
+            text = json.dumps(stub_parse(kwargs["messages"][-1]["content"]))
+            return Mock(content=[Mock(text=text)], usage=SimpleNamespace(input_tokens=1000, output_tokens=20))
+        meter = UsageMeter(SimpleNamespace(messages=SimpleNamespace(create=create)))
+        monkeypatch.setattr(app_module, "_init_services", lambda: (uc_service, meter))
+
+        report = evaluate(load_cases(paraphrases=3), app_module.parse_with_claude, meter, app_module.intent_cache)
+        overall = {row["scenario"]: row for row in report["results"]}["all"]
+
+        assert (overall["intent_accuracy"], overall["params_accuracy"]) == (1.0, 1.0)
+        assert overall["cache_hit_rate"] > 0.3
+        assert overall["llm_calls"] == meter.calls < overall["requests"]
+        assert overall["input_tokens_per_query"] == round(1000 * meter.calls / overall["requests"], 1)
+        assert check_thresholds(report["results"], 0.95, 0.95) == []
+
+    def test_flags_accuracy_and_cost_regressions(self):
+        """Test thresholds and baseline comparison catch a worse parser"""
+        from evaluate_parser import check_thresholds, compare, evaluate, load_cases
+
+        cases = load_cases(paraphrases=1)
+        broken = evaluate(cases, lambda message: {"intent": "help", "params": {}})
+        baseline = [{"suite": "parser", "scenario": "all", "intent_accuracy": 1.0, "params_accuracy": 1.0,
+                     "p95_ms": 5.0, "input_tokens_per_query": 0.0, "output_tokens_per_query": 0.0}]
+
+        assert len(broken["failures"]) == len(cases)
+        assert len(check_thresholds(broken["results"], 0.9, 0.8)) == 2
+        assert [problem.split(":")[1].split()[0] for problem in compare(baseline, broken["results"], 0.02, 0.2)] \
+            == ["intent_accuracy", "params_accuracy"]
+
+
+class TestAuditLog:
+    """Tests for the asynchronous, batched audit trail"""
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        """Test recording never waits on a stuck sink and reports what it dropped"""
+        from audit import AuditLog
+
+        release = threading.Event()
+        written = []
+
+        class StuckSink:
+            def write(self, records):
+                release.wait(5)
+                written.extend(records)
+
+        log = AuditLog(StuckSink(), max_queue=5, batch_size=2, flush_interval=0.01)
+        log.record(intent='first')
+        time.sleep(0.05)  # the writer picks it up and blocks in the sink
+        started = time.perf_counter()
+        accepted = [log.record(intent=f"op-{i}") for i in range(20)]
+        elapsed = time.perf_counter() - started
+
+        assert elapsed < 0.05
+        assert accepted.count(True) == 5 and log.stats['dropped'] == 15
+        release.set()
+        assert log.flush()
+        kept = [r['intent'] for r in written if r['intent'] != 'audit.dropped']
+        assert kept == ['first'] + [f"op-{i}" for i in range(5)]
+        assert [r['count'] for r in written if r['intent'] == 'audit.dropped'] == [15]
+
+    def test_jsonl_batches_and_rotates(self, tmp_path):
+        """Test records are written in batches and the file rotates at its size limit"""
+        import json
+        from audit import AuditLog, JsonlAuditSink
+
+        sink = JsonlAuditSink(str(tmp_path / "audit" / "audit.jsonl"), max_bytes=2000, backups=2)
+        log = AuditLog(sink, batch_size=10, flush_interval=0.5)
+        for i in range(100):
+            log.record(intent='grantPermission', securable=f"sales.bronze.t{i:03d}", outcome='success')
+        assert log.flush()
+
+        assert log.stats['written'] == 100 and log.stats['batches'] <= 12
+        files = sorted(p.name for p in (tmp_path / "audit").iterdir())
+        assert files == ['audit.jsonl', 'audit.jsonl.1', 'audit.jsonl.2']
+        assert all(p.stat().st_size <= 2000 for p in (tmp_path / "audit").iterdir())
+        newest = [json.loads(line) for line in open(tmp_path / "audit" / "audit.jsonl")]
+        assert newest[-1]['securable'] == 'sales.bronze.t099'
+
+    def test_chat_writes_audit_record(self, monkeypatch, claude_client_mock, tmp_path):
+        """Test a chat operation is audited with caller, intent, securable, SQL, latency and outcome"""
+        import sqlite3
+        import app as app_module
+        from audit import AuditLog, SQLiteAuditSink
+
+        log = AuditLog(SQLiteAuditSink(str(tmp_path / "audit.db")), flush_interval=0.01)
+        monkeypatch.setattr(app_module, "audit_log", log)
+        monkeypatch.setattr(app_module.config.security, "trusted_proxy_hops", 1)
+        claude_client_mock.messages.create.return_value = Mock(content=[Mock(text=(
+            '{"intent": "grantPermission", "params": {"privilege": "SELECT", '
+            '"object": "sales.bronze.orders", "principal": "analysts"}}'))])
+
+        with app_module.app.test_client() as client:
+            response = client.post('/api/chat', json={'message': 'Grant SELECT on sales.bronze.orders to analysts'},
+                                   headers={'X-Forwarded-Email': 'ana@example.com'})
+        assert response.status_code == 200 and log.flush()
+
+        conn = sqlite3.connect(str(tmp_path / "audit.db"))
+        row = conn.execute("SELECT principal, intent, securable, sql, latency_ms, outcome, source, extra "
+                           "FROM audit_log").fetchone()
+        assert row[:3] == ('ana@example.com', 'grantPermission', 'sales.bronze.orders')
+        assert row[3].startswith('GRANT SELECT ON TABLE sales.bronze.orders')
+        assert row[4] >= 0 and row[5:7] == ('success', 'chat')
+        assert '"grantee":"analysts"' in row[7]
+
+    def test_identity_headers_need_trusted_proxy(self, monkeypatch, claude_client_mock, tmp_path):
+        """Test a client cannot choose who its audit records are attributed to"""
+        import sqlite3
+        import app as app_module
+        from audit import AuditLog, SQLiteAuditSink
+
+        log = AuditLog(SQLiteAuditSink(str(tmp_path / "audit.db")), flush_interval=0.01)
+        monkeypatch.setattr(app_module, "audit_log", log)
+        claude_client_mock.messages.create.return_value = Mock(content=[Mock(
+            text='{"intent": "listCatalogs", "params": {}}')])
+
+        with app_module.app.test_client() as client:
+            client.post('/api/chat', json={'message': 'List catalogs'},
+                        headers={'X-Forwarded-Email': 'ceo@example.com', 'X-Forwarded-For': '10.9.9.9'})
+        assert log.flush()
+
+        conn = sqlite3.connect(str(tmp_path / "audit.db"))
+        assert conn.execute("SELECT principal FROM audit_log").fetchone() == ('127.0.0.1',)
+
+    @pytest.mark.skipif(not hasattr(__import__("os"), "fork"), reason="needs fork()")
+    def test_sqlite_sink_reconnects_in_forked_worker(self, tmp_path):
+        """Test a SQLite sink built before fork writes through the worker's own connection"""
+        import os
+        import sqlite3
+        from audit import AuditLog, SQLiteAuditSink
+
+        path = str(tmp_path / "audit.db")
+        sink = SQLiteAuditSink(path)
+        assert not os.path.exists(path)
+        log = AuditLog(sink, flush_interval=0.01)
+        log.record(intent='master')
+        assert log.flush()
+        parent_conn = sink._conn
+
+        pid = os.fork()
+        if pid == 0:
+            try:
+                log.record(intent='worker')
+                ok = log.flush() and sink._conn is not parent_conn
+            except BaseException:
+                ok = False
+            os._exit(0 if ok else 1)
+        _, status = os.waitpid(pid, 0)
+
+        assert os.WEXITSTATUS(status) == 0
+        assert sink._conn is parent_conn
+        rows = sqlite3.connect(path).execute("SELECT intent FROM audit_log ORDER BY ts").fetchall()
+        assert rows == [('master',), ('worker',)]
+
+    def test_jsonl_defaults_to_one_file_per_worker(self, tmp_path):
+        """Test the default JSON-lines path is per process and a shared one is refused for several workers"""
+        import os
+        from audit import JsonlAuditSink
+        from config import AuditConfig
+
+        assert "{pid}" in AuditConfig().path
+        assert AuditConfig().validate(workers=4)
+        with pytest.raises(ValueError, match="pid"):
+            AuditConfig(path="logs/audit.jsonl").validate(workers=4)
+        assert AuditConfig(sink="sqlite", path="data/audit.db").validate(workers=4)
+
+        sink = JsonlAuditSink(str(tmp_path / "audit-{pid}.jsonl"))
+        sink.write([{'intent': 'listCatalogs'}])
+        assert (tmp_path / f"audit-{os.getpid()}.jsonl").exists()
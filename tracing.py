@@ -0,0 +1,414 @@
+"""
+Distributed Tracing
+OpenTelemetry-style spans for HTTP requests, intent parsing/execution, service methods and
+SDK calls, with W3C trace-context propagation and file or collector exporters
+"""
+
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import queue
+import re
+import secrets
+import threading
+import time
+import urllib.request
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+TRACEPARENT_RE = re.compile(r"^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+# Call arguments copied onto spans as attributes
+SPAN_ARGUMENTS = (
+    "name", "catalog", "schema", "table", "principal", "privilege", "owner",
+    "securable_type", "securable_name", "full_name", "catalog_name", "schema_name",
+)
+
+
+# ==================== SPANS ====================
+
+class Span:
+    """A timed operation within a trace"""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns",
+                 "attributes", "status", "status_message", "_tracer", "_token")
+
+    def __init__(self, tracer: "Tracer", name: str, trace_id: str, parent_id: Optional[str],
+                 attributes: Dict = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = dict(attributes or {})
+        self.status = "UNSET"
+        self.status_message = None
+        self._tracer = tracer
+        self._token = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        if value is not None:
+            self.attributes[key] = value if isinstance(value, (str, int, float, bool)) else str(value)
+
+    def set_status(self, status: str, message: str = None) -> None:
+        self.status = status
+        self.status_message = message
+
+    def record_exception(self, exc: BaseException) -> None:
+        self.set_status("ERROR", str(exc))
+        self.attributes["exception.type"] = type(exc).__name__
+        self.attributes["exception.message"] = str(exc)
+
+    def end(self) -> None:
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            self._tracer._on_end(self)
+
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def to_dict(self) -> Dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_id,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "duration_ms": round(((self.end_ns or time.time_ns()) - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "status": {"code": self.status, "message": self.status_message},
+            "resource": {"service.name": self._tracer.service_name},
+        }
+
+    # Context manager protocol makes the span current for its duration
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None:
+            self.record_exception(exc)
+        elif self.status == "UNSET":
+            self.status = "OK"
+        try:
+            _current_span.reset(self._token)
+        except ValueError:
+            # Ended from a different context than it was entered in
+            _current_span.set(None)
+        self.end()
+        return False
+
+
+class _NoopSpan:
+    """Span stand-in returned while tracing is disabled"""
+
+    def set_attribute(self, key, value):
+        pass
+
+    def set_status(self, status, message=None):
+        pass
+
+    def record_exception(self, exc):
+        pass
+
+    def end(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def current_span() -> Optional[Span]:
+    """The active span in this context, if any"""
+    return _current_span.get()
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[Tuple[str, str]]:
+    """Extract (trace_id, parent_span_id) from a W3C traceparent header"""
+    if not header:
+        return None
+    match = TRACEPARENT_RE.match(header.strip().lower())
+    if not match or match.group(2) == "0" * 32 or match.group(3) == "0" * 16:
+        return None
+    return match.group(2), match.group(3)
+
+
+# ==================== EXPORTERS ====================
+
+class InMemoryExporter:
+    """Keeps finished spans in a list (tests and debugging)"""
+
+    def __init__(self):
+        self.spans: List[Dict] = []
+
+    def export(self, spans: List[Dict]) -> None:
+        self.spans.extend(spans)
+
+
+class FileSpanExporter:
+    """Appends finished spans to a JSON-lines file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def export(self, spans: List[Dict]) -> None:
+        with open(self.path, "a") as fh:
+            for span in spans:
+                fh.write(json.dumps(span, separators=(",", ":")) + "\n")
+
+
+class CollectorExporter:
+    """POSTs batches of spans as JSON to a collector endpoint"""
+
+    def __init__(self, url: str, timeout: float = 5.0):
+        self.url = url
+        self.timeout = timeout
+
+    def export(self, spans: List[Dict]) -> None:
+        body = json.dumps({"spans": spans}).encode()
+        req = urllib.request.Request(self.url, data=body, headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(req, timeout=self.timeout) as response:
+            response.read()
+
+
+class BatchSpanProcessor:
+    """
+    Hands finished spans to an exporter from a background thread.
+
+    The thread (and its queue) is started lazily in each process: the app is
+    imported in the gunicorn master when preloading, and a thread started
+    there does not survive the fork into the workers.
+    """
+
+    def __init__(self, exporter, max_batch: int = 256, flush_interval: float = 2.0,
+                 max_queue: int = 10000):
+        self.exporter = exporter
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.dropped = 0
+        self._pid = None
+        self._queue: Optional["queue.Queue[Dict]"] = None
+        self._flush_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+
+    def on_end(self, span: Dict) -> None:
+        try:
+            self._span_queue().put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _span_queue(self) -> "queue.Queue[Dict]":
+        if self._pid != os.getpid():
+            with self._start_lock:
+                if self._pid != os.getpid():
+                    self._queue = queue.Queue(maxsize=self.max_queue)
+                    self._flush_lock = threading.Lock()
+                    threading.Thread(target=self._run, name="span-exporter", daemon=True).start()
+                    self._pid = os.getpid()
+        return self._queue
+
+    def flush(self) -> None:
+        """Export everything this process queued so far"""
+        if self._pid != os.getpid():
+            return
+        with self._flush_lock:
+            batch = []
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+                if len(batch) >= self.max_batch:
+                    self._export(batch)
+                    batch = []
+            if batch:
+                self._export(batch)
+
+    def _export(self, batch: List[Dict]) -> None:
+        try:
+            self.exporter.export(batch)
+        except Exception as e:
+            logger.warning(f"Dropped {len(batch)} span(s), export failed: {e}")
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+
+# ==================== TRACER ====================
+
+class Tracer:
+    """Creates spans and routes finished ones to the configured processor"""
+
+    def __init__(self, service_name: str = "unity-catalog-chatbot"):
+        self.service_name = service_name
+        self.enabled = False
+        self.processor: Optional[BatchSpanProcessor] = None
+
+    def configure(self, tracing_config) -> "Tracer":
+        """Enable tracing from a TracingConfig section"""
+        self.service_name = tracing_config.service_name
+        self.enabled = tracing_config.enabled
+        if not self.enabled:
+            return self
+        if tracing_config.exporter == "collector":
+            exporter = CollectorExporter(tracing_config.collector_url)
+        elif tracing_config.exporter == "memory":
+            exporter = InMemoryExporter()
+        else:
+            exporter = FileSpanExporter(tracing_config.file_path)
+        self.processor = BatchSpanProcessor(exporter)
+        return self
+
+    def start_span(self, name: str, attributes: Dict = None,
+                   remote_parent: Tuple[str, str] = None):
+        """
+        Start a span as a child of the current span (or of a remote parent).
+
+        Use as a context manager; returns a no-op span while disabled.
+        """
+        if not self.enabled:
+            return NOOP_SPAN
+        parent = _current_span.get()
+        if remote_parent:
+            trace_id, parent_id = remote_parent
+        elif parent is not None:
+            trace_id, parent_id = parent.trace_id, parent.span_id
+        else:
+            trace_id, parent_id = secrets.token_hex(16), None
+        return Span(self, name, trace_id, parent_id, attributes)
+
+    def traced(self, name: str = None) -> Callable:
+        """Decorator wrapping a function call in a span"""
+        def decorator(func):
+            span_name = name or func.__qualname__
+            signature = inspect.signature(func)
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with self.start_span(span_name, _argument_attributes(signature, args, kwargs)) as span:
+                    result = func(*args, **kwargs)
+                    if isinstance(result, dict) and result.get("success") is False:
+                        span.set_status("ERROR", str(result.get("message", ""))[:200])
+                    return result
+            return wrapper
+        return decorator
+
+    def _on_end(self, span: Span) -> None:
+        if self.processor is not None:
+            self.processor.on_end(span.to_dict())
+
+
+def _argument_attributes(signature: inspect.Signature, args: tuple, kwargs: Dict) -> Dict:
+    try:
+        bound = signature.bind_partial(*args, **kwargs).arguments
+    except TypeError:
+        bound = kwargs
+    return {
+        f"uc.{key}": value for key, value in bound.items()
+        if key in SPAN_ARGUMENTS and isinstance(value, str)
+    }
+
+
+def trace_methods(tracer: Tracer, prefix: str) -> Callable:
+    """Class decorator adding a span around every public method"""
+    def decorator(cls):
+        for attr, value in list(vars(cls).items()):
+            if not attr.startswith("_") and inspect.isfunction(value):
+                setattr(cls, attr, tracer.traced(f"{prefix}.{attr}")(value))
+        return cls
+    return decorator
+
+
+class TracedClient:
+    """Proxy that opens a span for every call made through an SDK client"""
+
+    def __init__(self, target: Any, tracer: Tracer, path: str):
+        object.__setattr__(self, "_target", target)
+        object.__setattr__(self, "_tracer", tracer)
+        object.__setattr__(self, "_path", path)
+
+    def __getattr__(self, name):
+        value = getattr(self._target, name)
+        if isinstance(value, (str, int, float, bool, type(None))):
+            return value
+        return TracedClient(value, self._tracer, f"{self._path}.{name}")
+
+    def __setattr__(self, name, value):
+        setattr(self._target, name, value)
+
+    def __call__(self, *args, **kwargs):
+        if not self._tracer.enabled:
+            return self._target(*args, **kwargs)
+        attributes = {"rpc.method": self._path}
+        for key in SPAN_ARGUMENTS:
+            if isinstance(kwargs.get(key), str):
+                attributes[f"uc.{key}"] = kwargs[key]
+        if args and isinstance(args[0], str):
+            attributes["uc.full_name"] = args[0]
+        if "securable_type" in kwargs:
+            attributes["uc.securable_type"] = str(getattr(kwargs["securable_type"], "value",
+                                                          kwargs["securable_type"]))
+        with self._tracer.start_span(self._path, attributes):
+            result = self._target(*args, **kwargs)
+            # Materialize paginated iterators so the span covers the fetch
+            if inspect.isgenerator(result):
+                result = iter(list(result))
+            return result
+
+
+def instrument_app(app, tracer: Tracer) -> None:
+    """Open a root span per HTTP request, continuing any incoming trace"""
+    from flask import g, request
+
+    @app.before_request
+    def _start_request_span():
+        if not tracer.enabled:
+            return
+        span = tracer.start_span(
+            f"{request.method} {request.url_rule.rule if request.url_rule else request.path}",
+            {"http.method": request.method, "http.target": request.path},
+            remote_parent=parse_traceparent(request.headers.get("traceparent")),
+        )
+        g.trace_span = span.__enter__()
+
+    @app.after_request
+    def _tag_response(response):
+        span = g.get("trace_span")
+        if span is not None:
+            span.set_attribute("http.status_code", response.status_code)
+            if response.status_code >= 500:
+                span.set_status("ERROR")
+            response.headers["traceparent"] = span.traceparent()
+        return response
+
+    @app.teardown_request
+    def _end_request_span(exc):
+        span = g.pop("trace_span", None)
+        if span is not None:
+            span.__exit__(type(exc) if exc else None, exc, None)
+
+
+# Process-wide tracer used by the app, service and SDK proxies
+tracer = Tracer()
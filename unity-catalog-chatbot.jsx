@@ -40,6 +40,7 @@ const UnityCatalogChatbot = () => {
   const [copiedId, setCopiedId] = useState(null);
   const [dbxStatus, setDbxStatus] = useState('disconnected'); // 'connected', 'disconnected', 'loading'
   const messagesEndRef = useRef(null);
+  const sessionIdRef = useRef(null); // server-side conversation memory for follow-ups
 
   const scrollToBottom = () => {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
@@ -324,6 +325,30 @@ Just tell me what you'd like to do in natural language!`,
     };
   };
 
+  // Bulk operations answer with a background job; poll it about once a second until it finishes
+  const pollJob = async (jobId) => {
+    const finished = ['succeeded', 'failed', 'cancelled'];
+    for (;;) {
+      await new Promise(resolve => setTimeout(resolve, 1000));
+      let job;
+      try {
+        const response = await fetch(`/api/jobs/${jobId}`);
+        if (response.status === 404) return;
+        if (!response.ok) continue;
+        job = (await response.json()).job;
+      } catch (error) {
+        continue;
+      }
+      const count = job.total ? `${job.done} / ${job.total} (${Math.round(job.progress * 100)}%)` : `${job.done}`;
+      setMessages(prev => prev.map(m => m.jobId === jobId ? {
+        ...m,
+        jobStatus: `Job ${job.id}: ${job.status}, ${count} done${job.message ? `\n${job.message}` : ''}`,
+        isError: job.status === 'failed'
+      } : m));
+      if (finished.includes(job.status)) return;
+    }
+  };
+
   const handleSend = async () => {
     if (!input.trim() || isLoading) return;
 
@@ -344,14 +369,18 @@ Just tell me what you'd like to do in natural language!`,
         headers: {
           'Content-Type': 'application/json',
         },
-        body: JSON.stringify({ message: input.trim() })
+        body: JSON.stringify({ message: input.trim(), session_id: sessionIdRef.current })
       });
 
-      if (!response.ok) {
+      // 503 means the assistant is busy; its body says when to retry
+      if (!response.ok && response.status !== 503) {
         throw new Error(`API error: ${response.statusText}`);
       }
 
       const result = await response.json();
+      if (result.session_id) {
+        sessionIdRef.current = result.session_id;
+      }
       
       // Log the action if SQL was generated
       if (result.sql) {
@@ -367,17 +396,24 @@ Just tell me what you'd like to do in natural language!`,
         setActionLog(prev => [...prev, logEntry]);
       }
 
-      // Add assistant response
+      // Add assistant response, noting any names the server corrected
+      const corrections = (result.corrections || [])
+        .map(c => `'${c.from}' → '${c.to}'`)
+        .join(', ');
       const assistantMessage = {
         role: 'assistant',
-        content: result.message,
+        content: corrections ? `${result.message}\n\n(Interpreted ${corrections})` : result.message,
         sql: result.sql,
         intent: result.intent,
         timestamp: new Date(),
-        isError: !result.success
+        isError: !result.success,
+        jobId: result.job?.id
       };
 
       setMessages(prev => [...prev, assistantMessage]);
+      if (result.job) {
+        pollJob(result.job.id);
+      }
     } catch (error) {
       console.error('Error:', error);
       const errorMessage = {
@@ -768,6 +804,11 @@ Just tell me what you'd like to do in natural language!`,
                     whiteSpace: 'pre-wrap'
                   }}>
                     {msg.content}
+                    {msg.jobStatus && (
+                      <div style={{ marginTop: '0.5rem', color: '#8892b0', fontSize: '0.8rem' }}>
+                        {msg.jobStatus}
+                      </div>
+                    )}
                   </div>
                   {msg.sql && (
                     <div style={{
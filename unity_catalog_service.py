@@ -3,28 +3,46 @@ Unity Catalog Chatbot Backend Service
 Handles authentication and execution of Unity Catalog operations
 """
 
-from databricks.sdk import WorkspaceClient
-from databricks.sdk.service.catalog import *
-from typing import Dict, List, Optional, Any
+from typing import Any, Callable, Dict, List, Optional
+import functools
 import os
 import re
 from datetime import datetime
 import logging
 
-logging.basicConfig(level=logging.INFO)
+from checkpoint import BulkRun, Checkpoint
+from column_index import ColumnIndex, load_column_definitions
+from metadata_cache import KnownObjects, MetadataCache
+from records import CatalogRecord, ColumnRecord, SchemaRecord, TableRecord
+from securables import (
+    OWNER_APIS, parse_object_path, privilege_sql, resolve_privilege,
+    resolve_securable_type, securable_sql,
+)
+from sql_script import SqlScript, WarehouseExecutor
+from startup import LazyImport
+from tracing import tracer, trace_methods
+
+# The SDK is imported on first use to keep worker cold start fast
+WorkspaceClient = LazyImport("databricks.sdk", "WorkspaceClient")
+catalog_sdk = LazyImport("databricks.sdk.service.catalog")
+
 logger = logging.getLogger(__name__)
 
 
+@trace_methods(tracer, "UnityCatalogService")
 class UnityCatalogService:
     """Service for managing Unity Catalog operations through natural language"""
     
-    def __init__(self, workspace_url: str = None, token: str = None):
+    def __init__(self, workspace_url: str = None, token: str = None, cache: MetadataCache = None,
+                 known_objects: KnownObjects = None):
         """
         Initialize Databricks workspace client
         
         Args:
             workspace_url: Databricks workspace URL
             token: Personal access token
+            cache: Listing cache (defaults to a disabled cache)
+            known_objects: Objects known to exist, consulted by idempotent creates
         """
         self.workspace_url = workspace_url or os.getenv("DATABRICKS_HOST")
         self.token = token or os.getenv("DATABRICKS_TOKEN")
@@ -34,27 +52,34 @@ class UnityCatalogService:
             token=self.token
         )
         
-        # Cache for frequently accessed data
-        self._catalog_cache = {}
-        self._schema_cache = {}
+        # Cache for frequently accessed listings
+        self.cache = cache if cache is not None else MetadataCache(ttl=0)
+        
+        # Optional PrefetchScheduler told about listings and reads
+        self.prefetcher = None
+        
+        # Column definitions bulk-loaded per schema or catalog
+        self.columns = ColumnIndex()
+        
+        # Objects seen in listings or created here; idempotent creates skip these
+        self.known = known_objects if known_objects is not None else KnownObjects()
+        
+        # SQL warehouse for script execution (an executor can be injected, e.g. in tests)
+        self.warehouse_id = os.getenv("DATABRICKS_WAREHOUSE_ID")
+        self.sql_executor = None
         
     def parse_object_path(self, path: str) -> Dict[str, str]:
         """Parse a Unity Catalog object path into components"""
-        parts = path.split('.')
-        
-        if len(parts) == 1:
-            return {'catalog': parts[0]}
-        elif len(parts) == 2:
-            return {'catalog': parts[0], 'schema': parts[1]}
-        elif len(parts) == 3:
-            return {'catalog': parts[0], 'schema': parts[1], 'table': parts[2]}
-        else:
-            raise ValueError(f"Invalid object path: {path}")
+        return parse_object_path(path).as_dict()
     
     # ==================== CATALOG OPERATIONS ====================
     
-    def create_catalog(self, name: str, comment: str = None, properties: Dict = None) -> Dict:
-        """Create a new catalog"""
+    def create_catalog(self, name: str, comment: str = None, properties: Dict = None,
+                       if_not_exists: bool = False) -> Dict:
+        """Create a new catalog; with if_not_exists, an existing one counts as success"""
+        sql = f"CREATE CATALOG {'IF NOT EXISTS ' if if_not_exists else ''}{name}"
+        if if_not_exists and name in self.known:
+            return self._already_exists("catalog", name, sql)
         try:
             catalog = self.client.catalogs.create(
                 name=name,
@@ -63,18 +88,24 @@ class UnityCatalogService:
             )
             
             logger.info(f"Created catalog: {name}")
+            self.cache.invalidate(('catalogs',))
+            self.known.add(name)
             
             return {
                 'success': True,
+                'created': True,
                 'message': f"Successfully created catalog '{name}'",
                 'catalog': {
                     'name': catalog.name,
                     'owner': catalog.owner,
                     'created_at': catalog.created_at
                 },
-                'sql': f"CREATE CATALOG IF NOT EXISTS {name}"
+                'sql': sql
             }
         except Exception as e:
+            if if_not_exists and _is_already_exists(e):
+                self.known.add(name)
+                return self._already_exists("catalog", name, sql)
             logger.error(f"Error creating catalog {name}: {e}")
             return {
                 'success': False,
@@ -83,22 +114,22 @@ class UnityCatalogService:
     
     def list_catalogs(self) -> Dict:
         """List all available catalogs"""
+        cached = self.cache.get(('catalogs',))
+        if cached is not None:
+            return dict(cached)
+        
         try:
             catalogs = list(self.client.catalogs.list())
             
-            return {
+            result = {
                 'success': True,
                 'message': f"Found {len(catalogs)} catalog(s)",
-                'catalogs': [
-                    {
-                        'name': cat.name,
-                        'owner': cat.owner,
-                        'comment': cat.comment
-                    }
-                    for cat in catalogs
-                ],
+                'catalogs': [CatalogRecord(cat.name, cat.owner, cat.comment) for cat in catalogs],
                 'sql': "SHOW CATALOGS"
             }
+            self.cache.put(('catalogs',), result)
+            self.known.add(*(cat.name for cat in catalogs))
+            return dict(result)
         except Exception as e:
             logger.error(f"Error listing catalogs: {e}")
             return {
@@ -132,6 +163,9 @@ class UnityCatalogService:
         """Delete a catalog"""
         try:
             self.client.catalogs.delete(name, force=force)
+            self.cache.invalidate(('catalogs',), ('schemas', name))
+            self.columns.invalidate(name)
+            self.known.discard(name)
             
             return {
                 'success': True,
@@ -146,11 +180,14 @@ class UnityCatalogService:
     
     # ==================== SCHEMA OPERATIONS ====================
     
-    def create_schema(self, catalog: str, schema: str, comment: str = None) -> Dict:
-        """Create a new schema"""
+    def create_schema(self, catalog: str, schema: str, comment: str = None,
+                      if_not_exists: bool = False) -> Dict:
+        """Create a new schema; with if_not_exists, an existing one counts as success"""
+        full_name = f"{catalog}.{schema}"
+        sql = f"CREATE SCHEMA {'IF NOT EXISTS ' if if_not_exists else ''}{full_name}"
+        if if_not_exists and full_name in self.known:
+            return self._already_exists("schema", full_name, sql)
         try:
-            full_name = f"{catalog}.{schema}"
-            
             schema_obj = self.client.schemas.create(
                 name=schema,
                 catalog_name=catalog,
@@ -158,18 +195,24 @@ class UnityCatalogService:
             )
             
             logger.info(f"Created schema: {full_name}")
+            self.cache.invalidate(('schemas', catalog))
+            self.known.add(catalog, full_name)
             
             return {
                 'success': True,
+                'created': True,
                 'message': f"Successfully created schema '{full_name}'",
                 'schema': {
                     'name': schema_obj.name,
                     'catalog': schema_obj.catalog_name,
                     'owner': schema_obj.owner
                 },
-                'sql': f"CREATE SCHEMA IF NOT EXISTS {full_name}"
+                'sql': sql
             }
         except Exception as e:
+            if if_not_exists and _is_already_exists(e):
+                self.known.add(full_name)
+                return self._already_exists("schema", full_name, sql)
             logger.error(f"Error creating schema {catalog}.{schema}: {e}")
             return {
                 'success': False,
@@ -178,23 +221,26 @@ class UnityCatalogService:
     
     def list_schemas(self, catalog: str) -> Dict:
         """List all schemas in a catalog"""
+        cached = self.cache.get(('schemas', catalog))
+        if cached is not None:
+            if self.prefetcher is not None:
+                self.prefetcher.on_schemas_listed(catalog, cached['schemas'])
+            return dict(cached)
+        
         try:
             schemas = list(self.client.schemas.list(catalog_name=catalog))
             
-            return {
+            result = {
                 'success': True,
                 'message': f"Found {len(schemas)} schema(s) in catalog '{catalog}'",
-                'schemas': [
-                    {
-                        'name': sch.name,
-                        'full_name': sch.full_name,
-                        'owner': sch.owner,
-                        'comment': sch.comment
-                    }
-                    for sch in schemas
-                ],
+                'schemas': [SchemaRecord(sch.name, sch.full_name, sch.owner, sch.comment) for sch in schemas],
                 'sql': f"SHOW SCHEMAS IN {catalog}"
             }
+            self.cache.put(('schemas', catalog), result)
+            self.known.add(*(f"{catalog}.{sch.name}" for sch in schemas))
+            if self.prefetcher is not None:
+                self.prefetcher.on_schemas_listed(catalog, result['schemas'])
+            return dict(result)
         except Exception as e:
             return {
                 'success': False,
@@ -206,6 +252,9 @@ class UnityCatalogService:
         try:
             full_name = f"{catalog}.{schema}"
             self.client.schemas.delete(full_name)
+            self.cache.invalidate(('schemas', catalog), ('tables', catalog, schema))
+            self.columns.invalidate(catalog, schema)
+            self.known.discard(full_name)
             
             return {
                 'success': True,
@@ -227,12 +276,15 @@ class UnityCatalogService:
         table: str,
         columns: List[Dict[str, str]] = None,
         comment: str = None,
-        table_type: str = "MANAGED"
+        table_type: str = "MANAGED",
+        if_not_exists: bool = False
     ) -> Dict:
-        """Create a new table"""
+        """Create a new table; with if_not_exists, an existing one counts as success"""
+        full_name = f"{catalog}.{schema}.{table}"
+        create_sql = f"CREATE TABLE {'IF NOT EXISTS ' if if_not_exists else ''}{full_name}"
+        if if_not_exists and full_name in self.known:
+            return self._already_exists("table", full_name, create_sql)
         try:
-            full_name = f"{catalog}.{schema}.{table}"
-            
             # Default columns if none provided
             if not columns:
                 columns = [
@@ -243,9 +295,9 @@ class UnityCatalogService:
             
             # Build column definitions
             column_defs = [
-                ColumnInfo(
+                catalog_sdk.ColumnInfo(
                     name=col['name'],
-                    type_name=ColumnTypeName[col.get('type_name', 'STRING')],
+                    type_name=catalog_sdk.ColumnTypeName[col.get('type_name', 'STRING')],
                     comment=col.get('comment')
                 )
                 for col in columns
@@ -256,12 +308,15 @@ class UnityCatalogService:
                 catalog_name=catalog,
                 schema_name=schema,
                 columns=column_defs,
-                table_type=TableType[table_type],
-                data_source_format=DataSourceFormat.DELTA,
+                table_type=catalog_sdk.TableType[table_type],
+                data_source_format=catalog_sdk.DataSourceFormat.DELTA,
                 comment=comment or f"Table created via chatbot on {datetime.now().isoformat()}"
             )
             
             logger.info(f"Created table: {full_name}")
+            self.cache.invalidate(('tables', catalog, schema), ('table', catalog, schema, table))
+            self.columns.invalidate(catalog, schema)
+            self.known.add(catalog, f"{catalog}.{schema}", full_name)
             
             # Generate SQL
             col_sql = ",\n  ".join([
@@ -271,6 +326,7 @@ class UnityCatalogService:
             
             return {
                 'success': True,
+                'created': True,
                 'message': f"Successfully created table '{full_name}'",
                 'table': {
                     'name': table_obj.name,
@@ -278,9 +334,12 @@ class UnityCatalogService:
                     'owner': table_obj.owner,
                     'table_type': str(table_obj.table_type)
                 },
-                'sql': f"CREATE TABLE IF NOT EXISTS {full_name} (\n  {col_sql}\n) USING DELTA"
+                'sql': f"{create_sql} (\n  {col_sql}\n) USING DELTA"
             }
         except Exception as e:
+            if if_not_exists and _is_already_exists(e):
+                self.known.add(full_name)
+                return self._already_exists("table", full_name, create_sql)
             logger.error(f"Error creating table {catalog}.{schema}.{table}: {e}")
             return {
                 'success': False,
@@ -289,27 +348,33 @@ class UnityCatalogService:
     
     def list_tables(self, catalog: str, schema: str) -> Dict:
         """List all tables in a schema"""
+        cached = self.cache.get(('tables', catalog, schema))
+        if cached is not None:
+            if self.prefetcher is not None:
+                self.prefetcher.on_tables_listed(catalog, schema, cached['tables'])
+            return dict(cached)
+        
         try:
             tables = list(self.client.tables.list(
                 catalog_name=catalog,
                 schema_name=schema
             ))
             
-            return {
+            result = {
                 'success': True,
                 'message': f"Found {len(tables)} table(s) in {catalog}.{schema}",
                 'tables': [
-                    {
-                        'name': tbl.name,
-                        'full_name': tbl.full_name,
-                        'owner': tbl.owner,
-                        'table_type': str(tbl.table_type),
-                        'data_source_format': str(tbl.data_source_format)
-                    }
+                    TableRecord(tbl.name, tbl.full_name, tbl.owner, str(tbl.table_type),
+                                str(tbl.data_source_format))
                     for tbl in tables
                 ],
                 'sql': f"SHOW TABLES IN {catalog}.{schema}"
             }
+            self.cache.put(('tables', catalog, schema), result)
+            self.known.add(*(f"{catalog}.{schema}.{tbl.name}" for tbl in result['tables']))
+            if self.prefetcher is not None:
+                self.prefetcher.on_tables_listed(catalog, schema, result['tables'])
+            return dict(result)
         except Exception as e:
             return {
                 'success': False,
@@ -318,11 +383,17 @@ class UnityCatalogService:
     
     def get_table(self, catalog: str, schema: str, table: str) -> Dict:
         """Get table details including columns"""
+        if self.prefetcher is not None:
+            self.prefetcher.on_table_read(catalog, schema, table)
+        cached = self.cache.get(('table', catalog, schema, table))
+        if cached is not None:
+            return dict(cached)
+        
         try:
             full_name = f"{catalog}.{schema}.{table}"
             table_obj = self.client.tables.get(full_name)
             
-            return {
+            result = {
                 'success': True,
                 'table': {
                     'name': table_obj.name,
@@ -331,90 +402,296 @@ class UnityCatalogService:
                     'table_type': str(table_obj.table_type),
                     'data_source_format': str(table_obj.data_source_format),
                     'columns': [
-                        {
-                            'name': col.name,
-                            'type': str(col.type_name),
-                            'comment': col.comment
-                        }
+                        ColumnRecord(col.name, str(col.type_name), col.comment)
                         for col in (table_obj.columns or [])
                     ],
                     'comment': table_obj.comment
                 }
             }
+            self.cache.put(('table', catalog, schema, table), result)
+            return dict(result)
         except Exception as e:
             return {
                 'success': False,
                 'message': f"Failed to get table details: {str(e)}"
             }
     
-    # ==================== PERMISSION OPERATIONS ====================
+    # ==================== BATCH OPERATIONS ====================
     
-    def grant_permission(
-        self,
-        principal: str,
-        privilege: str,
-        securable_type: str,
-        securable_name: str
-    ) -> Dict:
-        """Grant permission to a user or group"""
-        try:
-            # Map privilege strings to enum
-            privilege_map = {
-                'SELECT': Privilege.SELECT,
-                'MODIFY': Privilege.MODIFY,
-                'CREATE': Privilege.CREATE,
-                'USAGE': Privilege.USAGE,
-                'READ_METADATA': Privilege.READ_METADATA,
-                'CREATE_TABLE': Privilege.CREATE_TABLE,
-                'CREATE_SCHEMA': Privilege.CREATE_SCHEMA,
-                'USE_CATALOG': Privilege.USE_CATALOG,
-                'USE_SCHEMA': Privilege.USE_SCHEMA,
-                'ALL_PRIVILEGES': Privilege.ALL_PRIVILEGES
+    def create_objects(self, objects: List[Dict], if_not_exists: bool = True,
+                       grants: List[Dict] = None, progress: Callable = None,
+                       checkpoint: Checkpoint = None, max_workers: int = 1) -> Dict:
+        """
+        Create catalogs, schemas and tables in order, then apply grants, one API call each
+        
+        Args:
+            objects: Dicts with 'name' (dotted full name) and optional 'type',
+                'comment' and 'columns'; the type defaults from the name's depth
+            if_not_exists: Skip objects that already exist instead of failing
+            grants: Dicts with 'principal', 'privilege' (one or a list), 'object'
+                and optional 'securable_type'
+            progress: Called as progress(done, total, item) after each object or grant
+            checkpoint: Skip the steps an earlier attempt of this run finished
+            max_workers: Grants applied in parallel (objects are always created in order)
+        """
+        def create(spec: Dict) -> Dict:
+            try:
+                path = parse_object_path(spec.get('name'))
+                expected = spec.get('type', path.securable_type).upper()
+                if expected != path.securable_type:
+                    raise ValueError(f"'{path.full_name}' is not a {expected.lower()} name")
+            except ValueError as e:
+                result = {'success': False, 'message': str(e)}
+            else:
+                if path.depth == 1:
+                    result = self.create_catalog(path.catalog, comment=spec.get('comment'),
+                                                 if_not_exists=if_not_exists)
+                elif path.depth == 2:
+                    result = self.create_schema(path.catalog, path.schema, comment=spec.get('comment'),
+                                                if_not_exists=if_not_exists)
+                else:
+                    result = self.create_table(path.catalog, path.schema, path.table,
+                                               columns=spec.get('columns'), comment=spec.get('comment'),
+                                               if_not_exists=if_not_exists)
+            outcome = 'failed' if not result['success'] else 'skipped' if result.get('skipped') else 'created'
+            return {'name': spec.get('name'), 'outcome': outcome, 'message': result['message']}
+        
+        def grant(spec: Dict, privilege: str) -> Dict:
+            try:
+                path = parse_object_path(spec.get('object'))
+            except ValueError as e:
+                result = {'success': False, 'message': str(e)}
+            else:
+                result = self.grant_permission(spec.get('principal'), privilege,
+                                               spec.get('securable_type') or path.securable_type,
+                                               path.full_name)
+            return {'name': spec.get('object'), 'outcome': 'granted' if result['success'] else 'failed',
+                    'message': result['message']}
+        
+        grant_steps = [
+            (f"grant {spec.get('principal')} {privilege} {spec.get('object')}",
+             functools.partial(grant, spec, privilege))
+            for spec in grants or [] for privilege in _as_list(spec.get('privilege'))
+        ]
+        run = BulkRun(checkpoint, max_workers, progress, total=len(objects) + len(grant_steps))
+        results = run.run([(f"create {spec.get('name')}", functools.partial(create, spec)) for spec in objects],
+                          max_workers=1)
+        results += run.run(grant_steps)
+        
+        counts = {'created': 0, 'skipped': 0, 'granted': 0, 'failed': 0}
+        for item in results:
+            counts[item['outcome']] += 1
+        resumed = f", {run.resumed} already done earlier" if run.resumed else ""
+        return {
+            'success': counts['failed'] == 0,
+            'message': f"Created {counts['created']}, skipped {counts['skipped']} existing, "
+                       f"granted {counts['granted']}, failed {counts['failed']}{resumed}",
+            **counts,
+            'resumed': run.resumed,
+            'results': results,
+        }
+    
+    def grant_on_all(self, principal: str, privileges, catalog: str, schema: str = None,
+                     securable_type: str = 'TABLE', progress: Callable = None,
+                     checkpoint: Checkpoint = None, max_workers: int = 1) -> Dict:
+        """
+        Grant privileges on every schema of a catalog, or every table of a catalog or schema
+        
+        Args:
+            privileges: One privilege or a list
+            securable_type: 'SCHEMA' or 'TABLE'
+            progress: Called as progress(done, total, item) after each grant
+            checkpoint: Skip the grants an earlier attempt of this run applied
+            max_workers: Grants applied in parallel
+        """
+        targets = self.bulk_targets(catalog, schema, securable_type)
+        if not targets['success']:
+            return targets
+        
+        def grant(name: str, privilege: str) -> Dict:
+            result = self.grant_permission(principal, privilege, securable_type, name)
+            return {'name': name, 'privilege': privilege, 'outcome': 'granted' if result['success'] else 'failed',
+                    'message': result['message']}
+        
+        privileges = _as_list(privileges)
+        steps = [(f"{privilege} {name}", functools.partial(grant, name, privilege))
+                 for name in targets['names'] for privilege in privileges]
+        run = BulkRun(checkpoint, max_workers, progress, total=len(steps))
+        results = run.run(steps)
+        counts = {'granted': run.resumed, 'failed': 0}
+        for item in results:
+            counts[item['outcome']] += 1
+        
+        scope = f"{catalog}.{schema}" if schema else catalog
+        return {
+            'success': counts['failed'] == 0,
+            'message': f"Granted {', '.join(map(str, privileges))} to {principal} on "
+                       f"{counts['granted']} of {len(steps)} {securable_type.lower()} grant(s) in {scope}"
+                       + (f" ({run.resumed} applied by an earlier attempt)" if run.resumed else ""),
+            **counts,
+            'resumed': run.resumed,
+            'results': results,
+        }
+    
+    def bulk_targets(self, catalog: str, schema: str = None, securable_type: str = 'TABLE') -> Dict:
+        """Full names of the schemas (or tables) a catalog- or schema-wide operation covers"""
+        securable_type = securable_type.upper()
+        if securable_type not in ('SCHEMA', 'TABLE'):
+            return {'success': False, 'message': f"Bulk operations cover schemas or tables, not {securable_type}"}
+        if schema:
+            schemas = [schema]
+        else:
+            listing = self.list_schemas(catalog)
+            if not listing['success']:
+                return listing
+            schemas = [s['name'] for s in listing['schemas'] if s['name'] != 'information_schema']
+        if securable_type == 'SCHEMA':
+            return {'success': True, 'names': [f"{catalog}.{name}" for name in schemas]}
+        
+        names = []
+        for name in schemas:
+            listing = self.list_tables(catalog, name)
+            if not listing['success']:
+                return listing
+            names.extend(f"{catalog}.{name}.{table['name']}" for table in listing['tables'])
+        return {'success': True, 'names': names}
+    
+    def execute_script(self, script: SqlScript, warehouse_id: str = None) -> Dict:
+        """
+        Run a compiled batch as one compound statement on a SQL warehouse
+        
+        Nothing runs if any batch entry failed to compile. Statements before a
+        failing one stay applied, so touched listings are invalidated either way.
+        """
+        sql = script.render()
+        if script.errors:
+            return {
+                'success': False,
+                'message': f"{len(script.errors)} invalid batch entries; nothing was run",
+                'errors': script.errors,
+                'sql': sql
             }
-            
-            privilege_enum = privilege_map.get(privilege.upper())
-            if not privilege_enum:
-                return {
-                    'success': False,
-                    'message': f"Invalid privilege: {privilege}"
-                }
-            
-            # Map securable type
-            securable_type_map = {
-                'CATALOG': SecurableType.CATALOG,
-                'SCHEMA': SecurableType.SCHEMA,
-                'TABLE': SecurableType.TABLE,
-                'VOLUME': SecurableType.VOLUME,
-                'FUNCTION': SecurableType.FUNCTION
+        executor = self._sql_executor(warehouse_id)
+        if executor is None:
+            return {
+                'success': False,
+                'message': "No SQL warehouse configured (set DATABRICKS_WAREHOUSE_ID)",
+                'sql': sql
             }
+        
+        try:
+            result = executor.execute(sql)
+        except Exception as e:
+            result = {'success': False, 'message': str(e)}
+        finally:
+            for full_name in {path.full_name for path in script.objects}:
+                self._invalidate_listing(full_name)
+            for catalog, schema in {(path.catalog, path.schema) for path in script.objects if path.table}:
+                self.columns.invalidate(catalog, schema)
+        
+        if result['success']:
+            self.known.add(*(path.full_name for path in script.objects))
+            logger.info(f"Ran SQL script with {len(script)} statement(s)")
+        return {
+            'success': result['success'],
+            'message': f"Ran {len(script)} statement(s) as one script" if result['success']
+                       else f"SQL script failed: {result['message']}",
+            'statements': len(script),
+            'statement_id': result.get('statement_id'),
+            'state': result.get('state'),
+            'sql': sql
+        }
+    
+    # ==================== COLUMN OPERATIONS ====================
+    
+    def load_columns(self, catalog: str, schema: str = None, max_workers: int = 8) -> Dict:
+        """Bulk-load column definitions for a schema, or every schema in a catalog"""
+        try:
+            if schema:
+                schemas = [schema]
+            else:
+                listing = self.list_schemas(catalog)
+                if not listing['success']:
+                    return listing
+                schemas = [s['name'] for s in listing['schemas'] if s['name'] != 'information_schema']
             
-            securable_enum = securable_type_map.get(securable_type.upper())
-            
-            self.client.grants.update(
-                securable_type=securable_enum,
-                full_name=securable_name,
-                changes=[
-                    PermissionsChange(
-                        add=[privilege_enum],
-                        principal=principal
-                    )
-                ]
-            )
-            
-            logger.info(f"Granted {privilege} on {securable_name} to {principal}")
+            tables = load_column_definitions(self.client, catalog, schemas, max_workers)
+            self.columns.replace_scope(catalog, schema, tables)
             
+            scope = f"{catalog}.{schema}" if schema else catalog
+            column_count = sum(len(cols) for cols in tables.values())
             return {
                 'success': True,
-                'message': f"Granted {privilege} on '{securable_name}' to '{principal}'",
-                'sql': f"GRANT {privilege.upper()} ON {securable_name} TO `{principal}`"
+                'message': f"Loaded {column_count} column(s) from {len(tables)} table(s) in {scope}",
+                'tables': len(tables),
+                'columns': column_count
             }
         except Exception as e:
-            logger.error(f"Error granting permission: {e}")
+            logger.error(f"Error loading columns for {catalog}: {e}")
             return {
                 'success': False,
-                'message': f"Failed to grant permission: {str(e)}"
+                'message': f"Failed to load columns: {str(e)}"
             }
     
+    def find_columns(
+        self,
+        column: str = None,
+        data_type: str = None,
+        catalog: str = None,
+        schema: str = None,
+        max_catalogs: int = 20
+    ) -> Dict:
+        """Find columns by name (glob patterns allowed) and/or type across loaded tables"""
+        # Reuse loads for as long as listings are cached; reload every time otherwise
+        max_age = self.cache.ttl if self.cache.enabled else 0
+        if catalog:
+            scopes = [catalog]
+        else:
+            listing = self.list_catalogs()
+            if not listing['success']:
+                return listing
+            scopes = [c['name'] for c in listing['catalogs'][:max_catalogs]]
+        
+        for name in scopes:
+            if not self.columns.is_loaded(name, schema if catalog else None, max_age):
+                loaded = self.load_columns(name, schema if catalog else None)
+                if not loaded['success']:
+                    return loaded
+        
+        matches = self.columns.find(column, data_type, catalog, schema)
+        tables = sorted({match['table'] for match in matches})
+        
+        conditions = []
+        if column:
+            operator = "LIKE" if any(c in column for c in "*?") else "="
+            conditions.append(f"column_name {operator} '{column.replace('*', '%').replace('?', '_')}'")
+        if data_type:
+            conditions.append(f"data_type = '{data_type.upper()}'")
+        if schema:
+            conditions.append(f"table_schema = '{schema}'")
+        source = f"{catalog}.information_schema.columns" if catalog else "system.information_schema.columns"
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        
+        return {
+            'success': True,
+            'message': f"Found {len(matches)} matching column(s) in {len(tables)} table(s)",
+            'columns': matches,
+            'tables': tables,
+            'sql': f"SELECT table_catalog, table_schema, table_name, column_name, data_type FROM {source}{where}"
+        }
+    
+    # ==================== PERMISSION OPERATIONS ====================
+    
+    def grant_permission(
+        self,
+        principal: str,
+        privilege: str,
+        securable_type: str,
+        securable_name: str
+    ) -> Dict:
+        """Grant permission to a user or group"""
+        return self._update_permissions(principal, privilege, securable_type, securable_name, grant=True)
+    
     def revoke_permission(
         self,
         principal: str,
@@ -423,59 +700,61 @@ class UnityCatalogService:
         securable_name: str
     ) -> Dict:
         """Revoke permission from a user or group"""
+        return self._update_permissions(principal, privilege, securable_type, securable_name, grant=False)
+    
+    def _update_permissions(
+        self,
+        principal: str,
+        privilege: str,
+        securable_type: str,
+        securable_name: str,
+        grant: bool
+    ) -> Dict:
+        """Add or remove one privilege for a principal"""
+        action = "grant" if grant else "revoke"
         try:
-            privilege_map = {
-                'SELECT': Privilege.SELECT,
-                'MODIFY': Privilege.MODIFY,
-                'CREATE': Privilege.CREATE,
-                'USAGE': Privilege.USAGE,
-                'ALL_PRIVILEGES': Privilege.ALL_PRIVILEGES
-            }
-            
-            privilege_enum = privilege_map.get(privilege.upper())
-            
-            securable_type_map = {
-                'CATALOG': SecurableType.CATALOG,
-                'SCHEMA': SecurableType.SCHEMA,
-                'TABLE': SecurableType.TABLE
+            privilege_enum = resolve_privilege(privilege)
+            securable_enum = resolve_securable_type(securable_type)
+        except ValueError as e:
+            return {
+                'success': False,
+                'message': str(e)
             }
-            
-            securable_enum = securable_type_map.get(securable_type.upper())
-            
+        
+        try:
+            change = {'add' if grant else 'remove': [privilege_enum], 'principal': principal}
             self.client.grants.update(
                 securable_type=securable_enum,
                 full_name=securable_name,
-                changes=[
-                    PermissionsChange(
-                        remove=[privilege_enum],
-                        principal=principal
-                    )
-                ]
+                changes=[catalog_sdk.PermissionsChange(**change)]
             )
             
-            logger.info(f"Revoked {privilege} on {securable_name} from {principal}")
-            
+            privilege_name = privilege_sql(privilege_enum)
+            securable_kind = securable_sql(securable_enum)
+            if grant:
+                logger.info(f"Granted {privilege_name} on {securable_name} to {principal}")
+                return {
+                    'success': True,
+                    'message': f"Granted {privilege_name} on '{securable_name}' to '{principal}'",
+                    'sql': f"GRANT {privilege_name} ON {securable_kind} {securable_name} TO `{principal}`"
+                }
+            logger.info(f"Revoked {privilege_name} on {securable_name} from {principal}")
             return {
                 'success': True,
-                'message': f"Revoked {privilege} on '{securable_name}' from '{principal}'",
-                'sql': f"REVOKE {privilege.upper()} ON {securable_name} FROM `{principal}`"
+                'message': f"Revoked {privilege_name} on '{securable_name}' from '{principal}'",
+                'sql': f"REVOKE {privilege_name} ON {securable_kind} {securable_name} FROM `{principal}`"
             }
         except Exception as e:
+            logger.error(f"Error {action}ing permission: {e}")
             return {
                 'success': False,
-                'message': f"Failed to revoke permission: {str(e)}"
+                'message': f"Failed to {action} permission: {str(e)}"
             }
     
     def show_grants(self, securable_type: str, securable_name: str) -> Dict:
         """Show all grants on a securable object"""
         try:
-            securable_type_map = {
-                'CATALOG': SecurableType.CATALOG,
-                'SCHEMA': SecurableType.SCHEMA,
-                'TABLE': SecurableType.TABLE
-            }
-            
-            securable_enum = securable_type_map.get(securable_type.upper())
+            securable_enum = resolve_securable_type(securable_type)
             
             grants = self.client.grants.get(
                 securable_type=securable_enum,
@@ -487,14 +766,14 @@ class UnityCatalogService:
                 for assignment in grants.privilege_assignments:
                     permissions.append({
                         'principal': assignment.principal,
-                        'privileges': [str(p) for p in (assignment.privileges or [])]
+                        'privileges': [getattr(p, 'value', str(p)) for p in (assignment.privileges or [])]
                     })
             
             return {
                 'success': True,
                 'message': f"Permissions for '{securable_name}'",
                 'permissions': permissions,
-                'sql': f"SHOW GRANTS ON {securable_name}"
+                'sql': f"SHOW GRANTS ON {securable_sql(securable_enum)} {securable_name}"
             }
         except Exception as e:
             return {
@@ -505,22 +784,21 @@ class UnityCatalogService:
     def set_owner(self, securable_type: str, securable_name: str, owner: str) -> Dict:
         """Set the owner of a securable object"""
         try:
-            if securable_type.upper() == 'CATALOG':
-                self.client.catalogs.update(securable_name, owner=owner)
-            elif securable_type.upper() == 'SCHEMA':
-                self.client.schemas.update(securable_name, owner=owner)
-            elif securable_type.upper() == 'TABLE':
-                self.client.tables.update(securable_name, owner=owner)
-            else:
+            securable_enum = resolve_securable_type(securable_type)
+            api_name = OWNER_APIS.get(securable_enum.name)
+            if api_name is None:
                 return {
                     'success': False,
-                    'message': f"Invalid securable type: {securable_type}"
+                    'message': f"Changing the owner of a {securable_enum.value} is not supported"
                 }
             
+            getattr(self.client, api_name).update(securable_name, owner=owner)
+            self._invalidate_listing(securable_name)
+            
             return {
                 'success': True,
                 'message': f"Set owner of '{securable_name}' to '{owner}'",
-                'sql': f"ALTER {securable_type.upper()} {securable_name} OWNER TO `{owner}`"
+                'sql': f"ALTER {securable_sql(securable_enum)} {securable_name} OWNER TO `{owner}`"
             }
         except Exception as e:
             return {
@@ -530,11 +808,42 @@ class UnityCatalogService:
     
     # ==================== HELPER METHODS ====================
     
+    def _already_exists(self, kind: str, full_name: str, sql: str) -> Dict:
+        """Result for an idempotent create of an object that already exists"""
+        return {
+            'success': True,
+            'skipped': True,
+            'message': f"{kind.capitalize()} '{full_name}' already exists",
+            'sql': sql
+        }
+    
+    def _invalidate_listing(self, full_name: str) -> None:
+        """Drop the cached listing that contains an object"""
+        try:
+            path = parse_object_path(full_name)
+        except ValueError:
+            return
+        if path.depth == 1:
+            self.cache.invalidate(('catalogs',))
+        elif path.depth == 2:
+            self.cache.invalidate(('schemas', path.catalog))
+        else:
+            self.cache.invalidate(('tables', path.catalog, path.schema),
+                                  ('table', path.catalog, path.schema, path.table))
+    
     def execute_sql(self, sql: str, warehouse_id: str = None) -> Dict:
-        """Execute a SQL statement"""
+        """Execute a SQL statement on a SQL warehouse, or just return it when none is configured"""
         try:
-            # This would require SQL execution API
-            # For now, return the SQL that should be executed
+            executor = self._sql_executor(warehouse_id)
+            if executor is not None:
+                result = executor.execute(sql)
+                return {
+                    'success': result['success'],
+                    'message': result['message'],
+                    'statement_id': result['statement_id'],
+                    'state': result['state'],
+                    'sql': sql
+                }
             return {
                 'success': True,
                 'message': "SQL statement prepared",
@@ -547,6 +856,13 @@ class UnityCatalogService:
                 'message': f"Failed to execute SQL: {str(e)}"
             }
     
+    def _sql_executor(self, warehouse_id: str = None):
+        if warehouse_id and warehouse_id != self.warehouse_id:
+            return WarehouseExecutor(self.client, warehouse_id)
+        if self.sql_executor is None and self.warehouse_id:
+            self.sql_executor = WarehouseExecutor(self.client, self.warehouse_id)
+        return self.sql_executor
+    
     def validate_name(self, name: str) -> bool:
         """Validate a catalog/schema/table name"""
         # Unity Catalog naming rules
@@ -554,6 +870,19 @@ class UnityCatalogService:
         return bool(re.match(pattern, name))
 
 
+def _as_list(value) -> List:
+    """One value or a list of them as a list (nothing as an empty list)"""
+    if not value:
+        return []
+    return [value] if isinstance(value, str) else list(value)
+
+
+def _is_already_exists(error: Exception) -> bool:
+    """Whether an SDK error reports that the object being created exists"""
+    error_code = getattr(error, 'error_code', None) or ''
+    return error_code.endswith('ALREADY_EXISTS') or 'already exists' in str(error).lower()
+
+
 # ==================== USAGE EXAMPLES ====================
 
 if __name__ == "__main__":